@@ -0,0 +1,350 @@
+"""
+This script benchmarks the AsyncRedisSaver checkpointer with a simulated conversation load.
+
+It simulates concurrent conversation threads. Every thread runs a number of graph steps
+with a realistic CompanionState payload. Each step stores the pending writes of the nodes
+(`aput_writes`), stores the next checkpoint (`aput`) and reads the latest checkpoint back
+(`aget_tuple`), as the follow-up questions do. At the end, the history of every thread
+is listed (`alist`).
+
+It reports per operation the p50/p95/p99 latencies, the number of Redis round trips,
+the overall throughput and the number of bytes stored in Redis.
+
+Usage:
+    poetry run python scripts/python/benchmark_checkpointer.py
+    or
+    python scripts/python/benchmark_checkpointer.py --threads 50 --steps 20
+
+By default, the benchmark runs against an in-memory fakeredis server. This is good for
+comparing round trips and payload sizes between versions. Latencies need a real
+server, e.g. a local one:
+    python scripts/python/benchmark_checkpointer.py --redis-url redis://localhost:6379/15
+
+WARNING: The benchmark flushes the given Redis database before and after the run.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any, cast
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+import fakeredis  # noqa: E402
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from langchain_core.runnables import RunnableConfig  # noqa: E402
+from langgraph.checkpoint.base import Checkpoint  # noqa: E402
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer  # noqa: E402
+from redis.asyncio import Redis  # noqa: E402
+
+from agents.common.state import SubTask, UserInput  # noqa: E402
+from agents.memory.async_redis_checkpointer import AsyncRedisSaver  # noqa: E402
+from agents.memory.compression import (  # noqa: E402
+    COMPRESSION_CODECS,
+    NO_COMPRESSION,
+    CompressedSerializer,
+    create_compression_codec,
+)
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class OperationStats:
+    """Latencies and round trips of all calls of an operation."""
+
+    latencies: list[float] = field(default_factory=list)
+    round_trips: list[int] = field(default_factory=list)
+
+
+# Round trips of the operation running in the current asyncio task.
+_round_trips: ContextVar[list[int] | None] = ContextVar("round_trips", default=None)
+
+
+class Recorder:
+    """Records latencies and round trips per operation."""
+
+    def __init__(self, conn: Redis):
+        self.stats: dict[str, OperationStats] = defaultdict(OperationStats)
+        self._count_round_trips(conn)
+
+    @staticmethod
+    def _count_round_trips(conn: Redis) -> None:
+        """Count single commands and pipelines sent by the connection as round trips."""
+        execute_command = conn.execute_command
+        pipeline = conn.pipeline
+
+        async def counting_execute_command(*args: Any, **kwargs: Any) -> Any:
+            if (round_trips := _round_trips.get()) is not None:
+                round_trips[0] += 1
+            return await execute_command(*args, **kwargs)
+
+        def counting_pipeline(*args: Any, **kwargs: Any) -> Any:
+            if (round_trips := _round_trips.get()) is not None:
+                round_trips[0] += 1
+            return pipeline(*args, **kwargs)
+
+        conn.execute_command = counting_execute_command  # type: ignore[method-assign]
+        conn.pipeline = counting_pipeline  # type: ignore[method-assign]
+
+    @asynccontextmanager
+    async def measure(self, operation: str) -> AsyncIterator[None]:
+        """Measure the latency and round trips of the operation within the context."""
+        round_trips = [0]
+        token = _round_trips.set(round_trips)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stats[operation].latencies.append(time.perf_counter() - start)
+            self.stats[operation].round_trips.append(round_trips[0])
+            _round_trips.reset(token)
+
+
+def create_text(size: int) -> str:
+    """Create a text of the given size in bytes."""
+    words = "kyma function pod deployment namespace error status ready ".split()
+    text = " ".join(words[i % len(words)] for i in range(size // 6 + 1))
+    return text[:size]
+
+
+def create_step_values(step: int, message_size: int) -> dict[str, Any]:
+    """Create the channel values written by a graph step of a conversation."""
+    return {
+        "messages": [
+            HumanMessage(content=create_text(message_size // 4), id=str(uuid.uuid4())),
+            AIMessage(content=create_text(message_size), id=str(uuid.uuid4())),
+        ],
+        "next": "Finalizer" if step % 2 else "KymaAgent",
+        "subtasks": [
+            SubTask(
+                description=create_text(100),
+                assigned_to="KymaAgent",
+                status="completed",
+                result=create_text(message_size // 2),
+            )
+        ],
+    }
+
+
+async def run_thread(
+    saver: AsyncRedisSaver,
+    recorder: Recorder,
+    thread_id: str,
+    steps: int,
+    writes_per_step: int,
+    message_size: int,
+) -> None:
+    """Simulate a conversation thread with the given number of graph steps."""
+    channel_values: dict[str, Any] = {
+        "input": UserInput(
+            query=create_text(200),
+            resource_kind="Function",
+            resource_name="my-function",
+            namespace="default",
+        ),
+        "messages": [],
+        "messages_summary": "",
+        "error": None,
+    }
+    channel_versions: dict[str, int] = {channel: 1 for channel in channel_values}
+    new_versions: dict[str, int] = dict(channel_versions)
+    config: RunnableConfig = {
+        "configurable": {"thread_id": thread_id, "checkpoint_ns": ""}
+    }
+
+    for step in range(steps):
+        checkpoint_id = f"{step:08d}-{uuid.uuid4()}"
+        if step > 0:
+            values = create_step_values(step, message_size)
+            writes = list(values.items())
+            writes += [
+                (f"branch:agent:{i}", create_text(50))
+                for i in range(writes_per_step - len(writes))
+            ]
+            async with recorder.measure("aput_writes"):
+                await saver.aput_writes(config, writes[:writes_per_step], "task-1")
+
+            channel_values["messages"] = [
+                *channel_values["messages"],
+                *values["messages"],
+            ]
+            channel_values["next"] = values["next"]
+            channel_values["subtasks"] = values["subtasks"]
+            new_versions = {}
+            for channel in ("messages", "next", "subtasks"):
+                new_versions[channel] = channel_versions.get(channel, 0) + 1
+            channel_versions.update(new_versions)
+
+        checkpoint = Checkpoint(
+            v=1,
+            id=checkpoint_id,
+            ts=datetime.now(UTC).isoformat(),
+            channel_values=dict(channel_values),
+            channel_versions=dict(channel_versions),
+            versions_seen={},
+            pending_sends=[],
+        )
+        metadata = {"source": "loop", "step": step, "writes": {}, "parents": {}}
+        async with recorder.measure("aput"):
+            config = await saver.aput(config, checkpoint, metadata, new_versions)
+
+        async with recorder.measure("aget_tuple"):
+            await saver.aget_tuple(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+            )
+
+    async with recorder.measure("alist"):
+        async for _ in saver.alist(
+            {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+        ):
+            pass
+
+
+async def get_stored_bytes(conn: Redis) -> tuple[int, int]:
+    """Get the number of keys and the number of payload bytes stored in Redis."""
+    keys = 0
+    stored_bytes = 0
+    async for key in conn.scan_iter(count=1000):
+        keys += 1
+        stored_bytes += len(key)
+        key_type = (await conn.type(key)).decode()
+        if key_type == "hash":
+            hash_values = await cast(Awaitable[dict[bytes, bytes]], conn.hgetall(key))
+            stored_bytes += sum(
+                len(name) + len(value) for name, value in hash_values.items()
+            )
+        elif key_type == "zset":
+            stored_bytes += sum(len(member) for member in await conn.zrange(key, 0, -1))
+        elif key_type == "set":
+            members = await cast(Awaitable[set[bytes]], conn.smembers(key))
+            stored_bytes += sum(len(member) for member in members)
+    return keys, stored_bytes
+
+
+def print_report(
+    stats: dict[str, OperationStats], duration: float, keys: int, stored_bytes: int
+) -> None:
+    """Print the benchmark results as a table."""
+    header = (
+        f"{'operation':<12}{'calls':>8}"
+        + "".join(f"{f'p{p} ms':>10}" for p in PERCENTILES)
+        + f"{'round trips':>13}{'ops/s':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for operation, operation_stats in stats.items():
+        quantiles = (
+            statistics.quantiles(operation_stats.latencies, n=100, method="inclusive")
+            if len(operation_stats.latencies) > 1
+            else operation_stats.latencies * 99
+        )
+        print(
+            f"{operation:<12}{len(operation_stats.latencies):>8}"
+            + "".join(f"{quantiles[p - 1] * 1000:>10.2f}" for p in PERCENTILES)
+            + f"{statistics.mean(operation_stats.round_trips):>13.1f}"
+            + f"{len(operation_stats.latencies) / duration:>10.0f}"
+        )
+    print()
+    print(f"Duration: {duration:.2f}s")
+    print(f"Keys stored: {keys}")
+    print(f"Bytes stored: {stored_bytes} ({stored_bytes / 1024 / 1024:.2f} MiB)")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--threads", type=int, default=20, help="number of concurrent threads"
+    )
+    parser.add_argument("--steps", type=int, default=10, help="graph steps per thread")
+    parser.add_argument(
+        "--writes-per-step", type=int, default=3, help="pending writes per step"
+    )
+    parser.add_argument(
+        "--message-size", type=int, default=2000, help="size of an answer in bytes"
+    )
+    parser.add_argument(
+        "--redis-url",
+        default=None,
+        help="URL of the Redis database to use instead of fakeredis",
+    )
+    parser.add_argument("--ttl", type=int, default=None, help="TTL of the keys")
+    parser.add_argument(
+        "--max-checkpoints",
+        type=int,
+        default=None,
+        help="number of checkpoints kept per thread",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=[NO_COMPRESSION, *COMPRESSION_CODECS],
+        default="zlib",
+        help="compression codec of the checkpoints and writes",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=None,
+        help="number of threads whose latest checkpoint is cached",
+    )
+    return parser.parse_args()
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    args = parse_args()
+    conn = (
+        Redis.from_url(args.redis_url) if args.redis_url else fakeredis.FakeAsyncRedis()
+    )
+    await conn.flushdb()
+    recorder = Recorder(conn)
+    saver = AsyncRedisSaver(
+        conn,
+        ttl=args.ttl,
+        max_checkpoints=args.max_checkpoints,
+        serde=CompressedSerializer(
+            JsonPlusSerializer(), codec=create_compression_codec(args.compression)
+        ),
+        cache_size=args.cache_size,
+    )
+
+    print(
+        f"Running {args.threads} threads with {args.steps} steps and "
+        f"{args.writes_per_step} writes per step against "
+        f"{args.redis_url or 'fakeredis'}...\n"
+    )
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            run_thread(
+                saver,
+                recorder,
+                f"thread-{i}",
+                args.steps,
+                args.writes_per_step,
+                args.message_size,
+            )
+            for i in range(args.threads)
+        )
+    )
+    duration = time.perf_counter() - start
+
+    keys, stored_bytes = await get_stored_bytes(conn)
+    print_report(recorder.stats, duration, keys, stored_bytes)
+    await conn.flushdb()
+    await conn.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
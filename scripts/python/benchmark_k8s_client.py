@@ -0,0 +1,519 @@
+"""
+This script benchmarks the K8sClient with the DataSanitizer against a fake Kubernetes API server.
+
+The fake API server runs in-process behind an httpx mock transport. It serves
+generated Pods, Events, Deployments, nodes metrics and Functions (a CRD) with realistic
+noise like managedFields, last-applied-configuration annotations and sensitive
+environment variables. It supports API discovery, paging with limit/continue, the
+field selectors used by the K8sClient and pod logs, and adds a configurable latency
+to every response.
+
+For every number of objects, it runs the hottest tool paths of the K8s client:
+`list_not_running_pods`, `describe_resource`, `list_k8s_warning_events`,
+`fetch_pod_logs` and `execute_get_api_request`. It reports per operation the p50/p95
+latencies, the number of requests and bytes received from the API server, the size
+of the result passed on to the LLM and the peak memory allocated by the operation.
+
+Usage:
+    poetry run python scripts/python/benchmark_k8s_client.py
+    or
+    python scripts/python/benchmark_k8s_client.py --sizes 100,1000 --latency-ms 20
+
+The response cache of the K8s client and the cache of sanitized objects are disabled
+by default, so every repetition measures the full path. Use --response-cache and
+--sanitization-cache to measure repeated requests.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+import httpx  # noqa: E402
+
+from services.data_sanitizer import DataSanitizer  # noqa: E402
+from services.field_projector import FieldProjector  # noqa: E402
+from services.k8s import K8sClient  # noqa: E402
+from utils.settings import DATA_SANITIZER_CACHE_SIZE  # noqa: E402
+
+API_SERVER = "https://fake-api-server"
+NAMESPACES = 10
+NODES = 5
+PERCENTILES = (50, 95)
+
+API_RESOURCES = {
+    "v1": [
+        {"name": "pods", "kind": "Pod", "namespaced": True},
+        {"name": "pods/log", "kind": "Pod", "namespaced": True},
+        {"name": "events", "kind": "Event", "namespaced": True},
+    ],
+    "apps/v1": [{"name": "deployments", "kind": "Deployment", "namespaced": True}],
+    "serverless.kyma-project.io/v1alpha2": [
+        {"name": "functions", "kind": "Function", "namespaced": True}
+    ],
+    "metrics.k8s.io/v1beta1": [
+        {"name": "nodes", "kind": "NodeMetrics", "namespaced": False}
+    ],
+}
+
+
+def create_metadata(kind: str, name: str, namespace: str, spec: dict) -> dict:
+    """Create the metadata of an object with the noise of real clusters."""
+    return {
+        "name": name,
+        "namespace": namespace,
+        "uid": f"{abs(hash((kind, name))):032x}",
+        "resourceVersion": "1000",
+        "labels": {"app": name.rsplit("-", 1)[0], "team": "companion"},
+        "annotations": {
+            "kubectl.kubernetes.io/last-applied-configuration": json.dumps(
+                {"kind": kind, "metadata": {"name": name}, "spec": spec}
+            ),
+        },
+        "managedFields": [
+            {
+                "manager": manager,
+                "operation": "Update",
+                "fieldsType": "FieldsV1",
+                "fieldsV1": {"f:spec": {"f:containers": {'k:{"name":"app"}': {}}}},
+            }
+            for manager in ("kubectl", "kube-controller-manager", "kubelet")
+        ],
+    }
+
+
+def create_pod_spec(i: int) -> dict:
+    """Create the spec of a pod with sensitive environment variables."""
+    return {
+        "containers": [
+            {
+                "name": "app",
+                "image": f"europe-docker.pkg.dev/kyma/app:{i % 7}.0.0",
+                "env": [
+                    {"name": "LOG_LEVEL", "value": "info"},
+                    {"name": "DB_HOST", "value": f"db-{i % 3}.example.com"},
+                    {"name": "DB_PASSWORD", "value": f"secret-password-{i}"},
+                    {"name": "API_TOKEN", "value": f"token-{i:08d}"},
+                ],
+                "resources": {"limits": {"cpu": "500m", "memory": "256Mi"}},
+            }
+        ],
+    }
+
+
+def create_pod(i: int) -> dict:
+    """Create a pod, of which every tenth is not running."""
+    spec = create_pod_spec(i)
+    phase = "Running" if i % 10 else ("Pending" if i % 20 else "Failed")
+    return {
+        "kind": "Pod",
+        "apiVersion": "v1",
+        "metadata": create_metadata("Pod", f"app-{i}", f"ns-{i % NAMESPACES}", spec),
+        "spec": spec,
+        "status": {
+            "phase": phase,
+            "conditions": [
+                {"type": condition, "status": str(phase == "Running")}
+                for condition in (
+                    "Initialized",
+                    "Ready",
+                    "ContainersReady",
+                    "PodScheduled",
+                )
+            ],
+        },
+    }
+
+
+def create_deployment(i: int) -> dict:
+    """Create a deployment."""
+    spec = {"replicas": 2, "template": {"spec": create_pod_spec(i)}}
+    return {
+        "kind": "Deployment",
+        "apiVersion": "apps/v1",
+        "metadata": create_metadata(
+            "Deployment", f"deployment-{i}", f"ns-{i % NAMESPACES}", spec
+        ),
+        "spec": spec,
+        "status": {"replicas": 2, "readyReplicas": 2 if i % 10 else 1},
+    }
+
+
+def create_event(i: int, size: int) -> dict:
+    """Create an event, of which every fifth is a warning."""
+    warning = i % 5 == 0
+    # Every tenth event is about a deployment, the others about pods.
+    target = i % (size // 10 or 1)
+    involved_object = (
+        {"kind": "Deployment", "name": f"deployment-{target}"}
+        if i % 10 == 0
+        else {"kind": "Pod", "name": f"app-{i}"}
+    )
+    return {
+        "kind": "Event",
+        "apiVersion": "v1",
+        "metadata": create_metadata("Event", f"event-{i}", f"ns-{i % NAMESPACES}", {}),
+        "involvedObject": {
+            **involved_object,
+            "namespace": f"ns-{i % NAMESPACES}",
+        },
+        "type": "Warning" if warning else "Normal",
+        "reason": "BackOff" if warning else "Pulled",
+        "message": (
+            f"Back-off restarting failed container app in pod app-{i}"
+            if warning
+            else f"Successfully pulled image in {i % 1000}ms"
+        ),
+        "count": i % 17 + 1,
+    }
+
+
+def create_function(i: int) -> dict:
+    """Create a Function with inline source code."""
+    spec = {
+        "runtime": "nodejs20",
+        "source": {
+            "inline": {
+                "source": "module.exports = { main: function (event, context) "
+                + "{ return 'hello world'; } };\n" * 20
+            }
+        },
+    }
+    return {
+        "kind": "Function",
+        "apiVersion": "serverless.kyma-project.io/v1alpha2",
+        "metadata": create_metadata(
+            "Function", f"function-{i}", f"ns-{i % NAMESPACES}", spec
+        ),
+        "spec": spec,
+        "status": {"conditions": [{"type": "Running", "status": "True"}]},
+    }
+
+
+def create_node_metrics(i: int) -> dict:
+    """Create the metrics of a node."""
+    return {
+        "kind": "NodeMetrics",
+        "apiVersion": "metrics.k8s.io/v1beta1",
+        "metadata": {"name": f"node-{i}"},
+        "usage": {"cpu": f"{100 + i}m", "memory": f"{1024 + i}Mi"},
+    }
+
+
+def create_logs(lines: int) -> bytes:
+    """Create logs with repeated lines and stack traces."""
+    log_lines = []
+    for i in range(lines):
+        if i % 10 == 0:
+            log_lines += [
+                f"2024-10-01T12:{i // 60 % 60:02d}:{i % 60:02d}Z ERROR request {i} failed",
+                "    at Handler.handle(handler.js:42)",
+                "    at Server.serve(server.js:7)",
+            ]
+        else:
+            log_lines.append(
+                f"2024-10-01T12:{i // 60 % 60:02d}:{i % 60:02d}Z INFO handled request {i}"
+            )
+    return ("\n".join(log_lines) + "\n").encode()
+
+
+def get_field(obj: dict, path: str) -> str:
+    """Get the value of a field given as a dot-separated path."""
+    value: Any = obj
+    for name in path.split("."):
+        value = value.get(name, {}) if isinstance(value, dict) else {}
+    return str(value) if not isinstance(value, dict) else ""
+
+
+def matches_field_selector(obj: dict, field_selector: str) -> bool:
+    """Evaluate the field selector like the API server does."""
+    for requirement in filter(None, field_selector.split(",")):
+        if "!=" in requirement:
+            path, value = requirement.split("!=", 1)
+            if get_field(obj, path) == value:
+                return False
+        else:
+            path, value = requirement.split("=", 1)
+            if get_field(obj, path) != value:
+                return False
+    return True
+
+
+@dataclass
+class FakeK8sAPIServer:
+    """In-process stand-in for the Kubernetes API server."""
+
+    size: int
+    latency: float
+    requests: int = 0
+    bytes_sent: int = 0
+    objects: dict[str, list[dict]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.objects = {
+            "pods": [create_pod(i) for i in range(self.size)],
+            "events": [create_event(i, self.size) for i in range(self.size)],
+            "deployments": [create_deployment(i) for i in range(self.size)],
+            "functions": [create_function(i) for i in range(self.size)],
+            "nodes": [create_node_metrics(i) for i in range(NODES)],
+        }
+        self.logs = create_logs(self.size)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        """Handle a request to the API server."""
+        await asyncio.sleep(self.latency)
+        response = self._route(request)
+        self.requests += 1
+        self.bytes_sent += len(response.content)
+        return response
+
+    def _route(self, request: httpx.Request) -> httpx.Response:
+        parts = request.url.path.strip("/").split("/")
+        params = request.url.params
+        prefix_length = 2 if parts[0] == "api" else 3
+        group_version = "/".join(parts[1:prefix_length])
+        if group_version not in API_RESOURCES:
+            return httpx.Response(404, json={"kind": "Status", "code": 404})
+        rest = parts[prefix_length:]
+        if not rest:
+            return httpx.Response(
+                200,
+                json={
+                    "kind": "APIResourceList",
+                    "groupVersion": group_version,
+                    "resources": API_RESOURCES[group_version],
+                },
+            )
+
+        namespace = ""
+        if rest[0] == "namespaces" and len(rest) > 2:  # noqa: PLR2004
+            namespace, rest = rest[1], rest[2:]
+        resource, name, subresource = (rest + ["", ""])[:3]
+        objects = [
+            obj
+            for obj in self.objects.get(resource, [])
+            if not namespace or obj["metadata"].get("namespace") == namespace
+        ]
+
+        if subresource == "log":
+            return self._logs(params)
+        if name:
+            matching = [obj for obj in objects if obj["metadata"]["name"] == name]
+            if not matching:
+                return httpx.Response(404, json={"kind": "Status", "code": 404})
+            return httpx.Response(200, json=matching[0])
+        return self._list(objects, params)
+
+    def _list(self, objects: list[dict], params: httpx.QueryParams) -> httpx.Response:
+        field_selector = params.get("fieldSelector", "")
+        items = [obj for obj in objects if matches_field_selector(obj, field_selector)]
+        start = int(params.get("continue", "0"))
+        limit = int(params.get("limit", "0")) or len(items)
+        page = items[start : start + limit]
+        continue_token = str(start + limit) if start + limit < len(items) else ""
+        return httpx.Response(
+            200,
+            json={
+                "kind": "List",
+                "metadata": {"resourceVersion": "1000", "continue": continue_token},
+                "items": page,
+            },
+        )
+
+    def _logs(self, params: httpx.QueryParams) -> httpx.Response:
+        lines = self.logs.splitlines(keepends=True)
+        if "tailLines" in params:
+            lines = lines[-int(params["tailLines"]) :]
+        logs = b"".join(lines)
+        if "limitBytes" in params:
+            logs = logs[: int(params["limitBytes"])]
+        return httpx.Response(200, content=logs)
+
+
+class FakeK8sClient(K8sClient):
+    """K8sClient sending its requests to the fake API server."""
+
+    def __init__(self, server: FakeK8sAPIServer, **kwargs: Any):
+        self.server = server
+        super().__init__(
+            api_server=API_SERVER,
+            user_token="token",
+            certificate_authority_data="",
+            **kwargs,
+        )
+
+    def _create_http_client(self, connection_pool_size: int) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.server.handle))
+
+
+@dataclass
+class OperationStats:
+    """Measurements of all runs of an operation."""
+
+    latencies: list[float] = field(default_factory=list)
+    requests: int = 0
+    response_bytes: int = 0
+    result_bytes: int = 0
+    peak_memory: int = 0
+
+
+def get_operations(
+    client: K8sClient,
+) -> dict[str, Callable[[], Awaitable[Any]]]:
+    """Get the benchmarked operations of the client."""
+    return {
+        "list_not_running_pods": lambda: client.list_not_running_pods(""),
+        "describe_resource": lambda: client.describe_resource(
+            "apps/v1", "Deployment", "deployment-0", "ns-0"
+        ),
+        "list_k8s_warning_events": lambda: client.list_k8s_warning_events(""),
+        "fetch_pod_logs": lambda: client.fetch_pod_logs(
+            "app-0", "ns-0", "app", False, 1000, limit_bytes=32 * 1024
+        ),
+        "execute_get_api_request": lambda: client.execute_get_api_request(
+            "apis/serverless.kyma-project.io/v1alpha2/functions"
+        ),
+    }
+
+
+async def measure(
+    server: FakeK8sAPIServer,
+    operation: Callable[[], Awaitable[Any]],
+    repeat: int,
+) -> OperationStats:
+    """Measure the latencies of the operation, then its peak memory in a traced run."""
+    stats = OperationStats()
+    requests, bytes_sent = server.requests, server.bytes_sent
+    result: Any = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await operation()
+        stats.latencies.append(time.perf_counter() - start)
+    stats.requests = (server.requests - requests) // repeat
+    stats.response_bytes = (server.bytes_sent - bytes_sent) // repeat
+    stats.result_bytes = len(json.dumps(result))
+
+    tracemalloc.start()
+    await operation()
+    _, stats.peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return stats
+
+
+def print_report(size: int, stats: dict[str, OperationStats]) -> None:
+    """Print the benchmark results of a number of objects as a table."""
+    header = (
+        f"{'operation':<26}{'objects':>8}"
+        + "".join(f"{f'p{p} ms':>10}" for p in PERCENTILES)
+        + f"{'requests':>10}{'resp KiB':>10}{'result KiB':>12}{'peak MiB':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for operation, operation_stats in stats.items():
+        quantiles = (
+            statistics.quantiles(operation_stats.latencies, n=100, method="inclusive")
+            if len(operation_stats.latencies) > 1
+            else operation_stats.latencies * 99
+        )
+        print(
+            f"{operation:<26}{size:>8}"
+            + "".join(f"{quantiles[p - 1] * 1000:>10.2f}" for p in PERCENTILES)
+            + f"{operation_stats.requests:>10}"
+            + f"{operation_stats.response_bytes / 1024:>10.1f}"
+            + f"{operation_stats.result_bytes / 1024:>12.1f}"
+            + f"{operation_stats.peak_memory / 1024 / 1024:>10.2f}"
+        )
+    print()
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        default="100,1000,10000",
+        help="comma-separated numbers of objects per kind",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=5,
+        help="latency of every API server response",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="runs of every operation")
+    parser.add_argument(
+        "--operations",
+        default=None,
+        help="comma-separated operations to run, all by default",
+    )
+    parser.add_argument(
+        "--no-sanitizer", action="store_true", help="do not sanitize the results"
+    )
+    parser.add_argument(
+        "--no-field-projector",
+        action="store_true",
+        help="do not project the fields of the results",
+    )
+    parser.add_argument(
+        "--response-cache",
+        action="store_true",
+        help="answer repeated requests from the response cache",
+    )
+    parser.add_argument(
+        "--sanitization-cache",
+        action="store_true",
+        help="reuse sanitized objects which did not change",
+    )
+    return parser.parse_args()
+
+
+def create_data_sanitizer(args: argparse.Namespace) -> DataSanitizer | None:
+    """Create a new data sanitizer, with the cache of sanitized objects if requested."""
+    if args.no_sanitizer:
+        return None
+    # DataSanitizer is a singleton, so reset it to apply the cache size.
+    DataSanitizer._instances = {}
+    return DataSanitizer(
+        cache_size=DATA_SANITIZER_CACHE_SIZE if args.sanitization_cache else 0
+    )
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    args = parse_args()
+    # Do not log every request to the fake API server.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    for size in (int(size) for size in args.sizes.split(",")):
+        server = FakeK8sAPIServer(size=size, latency=args.latency_ms / 1000)
+        client = FakeK8sClient(
+            server,
+            data_sanitizer=create_data_sanitizer(args),
+            field_projector=None if args.no_field_projector else FieldProjector(),
+            response_cache_enabled=args.response_cache,
+        )
+
+        operations = get_operations(client)
+        names = args.operations.split(",") if args.operations else list(operations)
+        print(
+            f"Running {args.repeat} times against {size} objects per kind with "
+            f"{args.latency_ms} ms latency...\n"
+        )
+        stats = {
+            name: await measure(server, operations[name], args.repeat) for name in names
+        }
+        print_report(size, stats)
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
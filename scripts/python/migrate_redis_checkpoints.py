@@ -0,0 +1,90 @@
+"""
+This script migrates the conversations stored in Redis under the legacy key layout.
+
+Before the keys of a conversation shared a hash tag, checkpoints were stored as
+"checkpoint$thread_id$namespace$checkpoint_id" and their writes as
+"writes$thread_id$namespace$checkpoint_id$task_id$idx", without an index and without a TTL.
+The Companion does not find these conversations anymore and never deletes their keys.
+The script stores them in the current layout, with the TTL, compaction and compression
+configured for the Companion, and deletes the legacy keys.
+
+Usage:
+    poetry run python scripts/python/migrate_redis_checkpoints.py --dry-run
+    or
+    python scripts/python/migrate_redis_checkpoints.py --discard
+
+Run it once after deploying the current layout. Running it again is safe.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer  # noqa: E402
+
+from agents.memory.async_redis_checkpointer import AsyncRedisSaver  # noqa: E402
+from agents.memory.checkpoint_migration import migrate_legacy_checkpoints  # noqa: E402
+from agents.memory.compression import (  # noqa: E402
+    CompressedSerializer,
+    create_compression_codec,
+)
+from utils.settings import (  # noqa: E402
+    REDIS_CLUSTER_MODE,
+    REDIS_COMPRESSION_CODEC,
+    REDIS_COMPRESSION_THRESHOLD_BYTES,
+    REDIS_MAX_CHECKPOINTS,
+    REDIS_TTL_SECONDS,
+    REDIS_URL,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--redis-url", default=REDIS_URL, help="URL of the Redis server"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only count the legacy checkpoints and writes",
+    )
+    parser.add_argument(
+        "--discard",
+        action="store_true",
+        help="delete the legacy keys without migrating them",
+    )
+    return parser.parse_args()
+
+
+async def main() -> None:
+    """Run the migration."""
+    args = parse_args()
+    saver = AsyncRedisSaver.from_url(
+        args.redis_url,
+        cluster=REDIS_CLUSTER_MODE,
+        ttl=REDIS_TTL_SECONDS,
+        max_checkpoints=REDIS_MAX_CHECKPOINTS,
+        serde=CompressedSerializer(
+            JsonPlusSerializer(),
+            codec=create_compression_codec(REDIS_COMPRESSION_CODEC),
+            threshold=REDIS_COMPRESSION_THRESHOLD_BYTES,
+        ),
+    )
+    try:
+        result = await migrate_legacy_checkpoints(
+            saver, discard=args.discard, dry_run=args.dry_run
+        )
+    finally:
+        await saver.conn.aclose()
+    print(
+        f"Legacy checkpoints: {result.checkpoints}, legacy writes: {result.writes}, "
+        f"deleted keys: {result.deleted_keys}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
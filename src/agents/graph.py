@@ -34,6 +34,7 @@ from agents.common.data import Message
 from agents.common.state import CompanionState, Plan, SubTask, UserInput
 from agents.k8s.agent import K8S_AGENT, KubernetesAgent
 from agents.kyma.agent import KYMA_AGENT, KymaAgent
+from agents.memory.async_redis_checkpointer import FENCING_TOKEN_CONFIG_KEY
 from agents.prompts import COMMON_QUESTION_PROMPT
 from agents.summarization.summarization import Summarization
 from agents.supervisor.agent import SUPERVISOR, SupervisorAgent
@@ -75,7 +76,11 @@ class IGraph(Protocol):
     """Graph interface."""
 
     def astream(
-        self, conversation_id: str, message: Message, k8s_client: IK8sClient
+        self,
+        conversation_id: str,
+        message: Message,
+        k8s_client: IK8sClient,
+        fencing_token: int | None = None,
     ) -> AsyncIterator[str]:
         """Stream the output to the caller asynchronously."""
         ...
@@ -222,9 +227,17 @@ class CompanionGraph:
         return graph
 
     async def astream(
-        self, conversation_id: str, message: Message, k8s_client: IK8sClient
+        self,
+        conversation_id: str,
+        message: Message,
+        k8s_client: IK8sClient,
+        fencing_token: int | None = None,
     ) -> AsyncIterator[str]:
-        """Stream the output to the caller asynchronously."""
+        """Stream the output to the caller asynchronously.
+
+        If a fencing token is given, the checkpoints of the run are rejected
+        once a newer token was issued for the conversation.
+        """
         user_input = UserInput(**message.__dict__)
         messages = [
             SystemMessage(
@@ -243,6 +256,11 @@ class CompanionGraph:
             config={
                 "configurable": {
                     "thread_id": conversation_id,
+                    **(
+                        {FENCING_TOKEN_CONFIG_KEY: fencing_token}
+                        if fencing_token is not None
+                        else {}
+                    ),
                 },
                 "callbacks": [handler],
             },
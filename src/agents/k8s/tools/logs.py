@@ -6,7 +6,9 @@ from pydantic import BaseModel
 
 from services.k8s import IK8sClient
 
-POD_LOGS_TAIL_LINES_LIMIT: int = 10
+POD_LOGS_TAIL_LINES_LIMIT: int = 100
+# Only the newest lines up to this size are kept, before repeated lines are collapsed.
+POD_LOGS_LIMIT_BYTES: int = 32 * 1024
 
 
 class FetchPodLogsArgs(BaseModel):
@@ -16,6 +18,7 @@ class FetchPodLogsArgs(BaseModel):
     namespace: str
     container_name: str
     is_terminated: bool
+    since_seconds: int | None = None
     k8s_client: Annotated[IK8sClient, InjectedState("k8s_client")]
 
     class Config:
@@ -23,18 +26,27 @@ class FetchPodLogsArgs(BaseModel):
 
 
 @tool(infer_schema=False, args_schema=FetchPodLogsArgs)
-def fetch_pod_logs_tool(
+async def fetch_pod_logs_tool(
     name: str,
     namespace: str,
     container_name: str,
     is_terminated: bool,
     k8s_client: Annotated[IK8sClient, InjectedState("k8s_client")],
+    since_seconds: int | None = None,
 ) -> list[str]:
     """Fetch logs of Kubernetes Pod. Provide is_terminated as true if the pod is not running.
-    The logs of previous terminated pod will be fetched."""
+    The logs of previous terminated pod will be fetched. Provide since_seconds to fetch only
+    the logs of the last seconds. Repeated lines are prefixed with their number of occurrences.
+    """
     try:
-        return k8s_client.fetch_pod_logs(
-            name, namespace, container_name, is_terminated, POD_LOGS_TAIL_LINES_LIMIT
+        return await k8s_client.fetch_pod_logs(
+            name,
+            namespace,
+            container_name,
+            is_terminated,
+            POD_LOGS_TAIL_LINES_LIMIT,
+            limit_bytes=POD_LOGS_LIMIT_BYTES,
+            since_seconds=since_seconds,
         )
     except Exception as e:
         raise Exception(
@@ -18,7 +18,7 @@ class K8sQueryToolArgs(BaseModel):
 
 
 @tool(infer_schema=False, args_schema=K8sQueryToolArgs)
-def k8s_query_tool(
+async def k8s_query_tool(
     uri: str, k8s_client: Annotated[IK8sClient, InjectedState("k8s_client")]
 ) -> dict | list[dict]:
     """Query the state of objects in Kubernetes using the provided URI.
@@ -26,7 +26,7 @@ def k8s_query_tool(
     The returned data is sanitized to remove any sensitive information.
     For example, it will always remove the `data` field of a `Secret` object."""
     try:
-        result = k8s_client.execute_get_api_request(uri)
+        result = await k8s_client.execute_get_api_request(uri)
         if not isinstance(result, list) and not isinstance(result, dict):
             raise Exception(
                 f"failed executing k8s_query_tool with URI: {uri}."
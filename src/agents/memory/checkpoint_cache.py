@@ -0,0 +1,88 @@
+"""In-process cache for the latest checkpoint of each conversation thread."""
+
+from collections import OrderedDict
+
+from langgraph.checkpoint.base import Checkpoint, CheckpointTuple
+
+# Number of threads whose latest checkpoint is cached by default.
+DEFAULT_CHECKPOINT_CACHE_SIZE = 1024
+
+
+def _copy_checkpoint(checkpoint: Checkpoint) -> Checkpoint:
+    """Copy the dicts of a checkpoint. The channel values themselves are not copied."""
+    return Checkpoint(
+        **{
+            **checkpoint,
+            "channel_values": checkpoint["channel_values"].copy(),
+            "channel_versions": checkpoint["channel_versions"].copy(),
+            "versions_seen": {
+                key: value.copy() for key, value in checkpoint["versions_seen"].items()
+            },
+        }
+    )
+
+
+def _copy_checkpoint_tuple(checkpoint_tuple: CheckpointTuple) -> CheckpointTuple:
+    """Copy the mutable parts of a checkpoint tuple, so callers cannot alter the cached entry."""
+    return checkpoint_tuple._replace(
+        checkpoint=_copy_checkpoint(checkpoint_tuple.checkpoint),
+        pending_writes=(
+            list(checkpoint_tuple.pending_writes)
+            if checkpoint_tuple.pending_writes is not None
+            else None
+        ),
+    )
+
+
+class LatestCheckpointCache:
+    """Bounded LRU cache of the latest checkpoint tuple per thread and namespace.
+
+    The cache is only a hint: entries must be validated against the store before use,
+    as other workers may have written newer checkpoints in the meantime.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CHECKPOINT_CACHE_SIZE):
+        if max_size <= 0:
+            raise ValueError("Cache size must be positive.")
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[str, str], CheckpointTuple] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, thread_id: str, checkpoint_ns: str) -> CheckpointTuple | None:
+        """Get a copy of the cached checkpoint tuple and mark it as recently used."""
+        key = (thread_id, checkpoint_ns)
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return _copy_checkpoint_tuple(self._entries[key])
+
+    def put(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_tuple: CheckpointTuple
+    ) -> None:
+        """Cache the checkpoint tuple, evicting the least recently used entry if full."""
+        key = (thread_id, checkpoint_ns)
+        self._entries[key] = _copy_checkpoint_tuple(checkpoint_tuple)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str | None = None
+    ) -> None:
+        """Remove the cached entry. If `checkpoint_id` is given, only if it caches that checkpoint."""
+        key = (thread_id, checkpoint_ns)
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        if (
+            checkpoint_id is None
+            or entry.config["configurable"]["checkpoint_id"] == checkpoint_id
+        ):
+            del self._entries[key]
+
+    def invalidate_thread(self, thread_id: str) -> None:
+        """Remove the cached entries of all namespaces of the thread."""
+        for key in [key for key in self._entries if key[0] == thread_id]:
+            del self._entries[key]
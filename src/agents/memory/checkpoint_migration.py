@@ -0,0 +1,165 @@
+"""Migration of checkpoints stored by AsyncRedisSaver under the legacy key layout.
+
+Legacy checkpoints are stored as "checkpoint$thread_id$namespace$checkpoint_id" with their
+channel values inline, and their writes as "writes$thread_id$namespace$checkpoint_id$task_id$idx".
+They are not indexed and have no TTL. The current layout wraps the thread ID in a hash tag,
+indexes the checkpoints and writes of every thread and stores channel values as blobs,
+so legacy conversations are not found anymore and their keys are never deleted.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+
+from agents.memory.async_redis_checkpointer import (
+    REDIS_KEY_SEPARATOR,
+    AsyncRedisSaver,
+    _make_redis_checkpoint_index_key,
+    _make_redis_checkpoint_writes_index_key,
+    _make_redis_checkpoint_writes_key,
+    _safe_decode,
+)
+
+LEGACY_CHECKPOINT_KEY_PATTERN = f"checkpoint{REDIS_KEY_SEPARATOR}*"
+LEGACY_WRITES_KEY_PATTERN = f"writes{REDIS_KEY_SEPARATOR}*"
+
+# Number of parts of legacy checkpoint and writes keys.
+LEGACY_CHECKPOINT_KEY_PARTS = 4
+LEGACY_WRITES_KEY_PARTS = 6
+
+# Number of keys returned per SCAN call.
+SCAN_COUNT = 1000
+
+
+@dataclass
+class MigrationResult:
+    """Numbers of legacy checkpoints and writes migrated, and of legacy keys deleted."""
+
+    checkpoints: int = 0
+    writes: int = 0
+    deleted_keys: int = 0
+
+
+def _parse_legacy_key(key: str, expected_parts: int) -> list[str] | None:
+    """Split a legacy key into its parts, or return None if the key uses the current layout."""
+    parts = key.split(REDIS_KEY_SEPARATOR)
+    if len(parts) != expected_parts or parts[1].startswith("{"):
+        return None
+    return parts
+
+
+async def _scan_legacy_keys(
+    saver: AsyncRedisSaver, pattern: str, expected_parts: int
+) -> dict[tuple[str, str], list[list[str]]]:
+    """Scan the legacy keys matching the pattern, grouped by thread ID and namespace."""
+    keys: dict[tuple[str, str], list[list[str]]] = defaultdict(list)
+    async for raw_key in saver.conn.scan_iter(match=pattern, count=SCAN_COUNT):
+        parts = _parse_legacy_key(_safe_decode(raw_key), expected_parts)
+        if parts is not None:
+            keys[(parts[1], parts[2])].append(parts)
+    return keys
+
+
+async def migrate_legacy_checkpoints(
+    saver: AsyncRedisSaver, discard: bool = False, dry_run: bool = False
+) -> MigrationResult:
+    """Store the legacy checkpoints and writes in the current layout and delete the legacy keys.
+
+    The checkpoints of a thread are stored in the order of their IDs with `aput`, so the
+    TTL, compaction and serializer of the saver apply. Writes keep their task ID and index,
+    writes without a checkpoint are dropped.
+    Running the migration again is safe, e.g. after it was interrupted.
+
+    Args:
+        saver: The saver storing the checkpoints in the current layout.
+        discard: Delete the legacy keys without migrating them.
+        dry_run: Only count the legacy checkpoints and writes.
+    """
+    result = MigrationResult()
+    checkpoint_keys = await _scan_legacy_keys(
+        saver, LEGACY_CHECKPOINT_KEY_PATTERN, LEGACY_CHECKPOINT_KEY_PARTS
+    )
+    writes_keys = await _scan_legacy_keys(
+        saver, LEGACY_WRITES_KEY_PATTERN, LEGACY_WRITES_KEY_PARTS
+    )
+
+    for thread in checkpoint_keys.keys() | writes_keys.keys():
+        thread_id, checkpoint_ns = thread
+        checkpoints = sorted(checkpoint_keys.get(thread, []), key=lambda p: p[3])
+        writes = writes_keys.get(thread, [])
+        result.checkpoints += len(checkpoints)
+        result.writes += len(writes)
+        if dry_run:
+            continue
+
+        if not discard:
+            for _, _, _, checkpoint_id in checkpoints:
+                await _migrate_checkpoint(
+                    saver, thread_id, checkpoint_ns, checkpoint_id
+                )
+            # Writes of checkpoints deleted by the compaction of the saver are dropped.
+            kept_checkpoint_ids = {
+                _safe_decode(checkpoint_id)
+                for checkpoint_id in await saver.conn.zrange(
+                    _make_redis_checkpoint_index_key(thread_id, checkpoint_ns), 0, -1
+                )
+            }
+            for parts in writes:
+                if parts[3] in kept_checkpoint_ids:
+                    await _migrate_writes(saver, parts)
+
+        legacy_keys = [
+            REDIS_KEY_SEPARATOR.join(parts) for parts in [*checkpoints, *writes]
+        ]
+        result.deleted_keys += await saver.conn.delete(*legacy_keys)
+    return result
+
+
+async def _migrate_checkpoint(
+    saver: AsyncRedisSaver, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+) -> None:
+    """Store a legacy checkpoint with its inline channel values in the current layout."""
+    data = await saver._redis_call(
+        saver.conn.hgetall(
+            REDIS_KEY_SEPARATOR.join(
+                ["checkpoint", thread_id, checkpoint_ns, checkpoint_id]
+            )
+        )
+    )
+    if not data or b"checkpoint" not in data or b"metadata" not in data:
+        return
+    checkpoint = saver.serde.loads_typed((data[b"type"].decode(), data[b"checkpoint"]))
+    parent_checkpoint_id = data.get(b"parent_checkpoint_id", b"").decode()
+    await saver.aput(
+        {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": parent_checkpoint_id or None,
+            }
+        },
+        checkpoint,
+        saver.serde.loads(data[b"metadata"]),
+        # All channel values are stored as blobs.
+        checkpoint["channel_versions"],
+    )
+
+
+async def _migrate_writes(saver: AsyncRedisSaver, parts: list[str]) -> None:
+    """Store a legacy write in the current layout, keeping its task ID and index."""
+    _, thread_id, checkpoint_ns, checkpoint_id, task_id, idx = parts
+    data = await saver._redis_call(saver.conn.hgetall(REDIS_KEY_SEPARATOR.join(parts)))
+    if not data:
+        return
+    key = _make_redis_checkpoint_writes_key(
+        thread_id, checkpoint_ns, checkpoint_id, task_id, int(idx)
+    )
+    index_key = _make_redis_checkpoint_writes_index_key(
+        thread_id, checkpoint_ns, checkpoint_id
+    )
+    async with saver.conn.pipeline(transaction=False) as pipe:
+        pipe.hset(key, mapping=data)
+        pipe.sadd(index_key, key)
+        if saver.ttl:
+            pipe.expire(key, saver.ttl)
+            pipe.expire(index_key, saver.ttl)
+        await pipe.execute()
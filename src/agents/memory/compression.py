@@ -0,0 +1,145 @@
+"""Compression layer for the payloads stored by the checkpointer."""
+
+import zlib
+from typing import Any, Protocol
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+
+# Separator between the serialization type and the compression codec name,
+# e.g. "msgpack+zlib". Payloads stored without a codec keep their plain type,
+# so entries written before compression was enabled are still readable.
+COMPRESSION_TYPE_SEPARATOR = "+"
+
+# Payloads smaller than this are stored uncompressed.
+DEFAULT_COMPRESSION_THRESHOLD_BYTES = 1024
+
+NO_COMPRESSION = "none"
+
+
+class ICompressionCodec(Protocol):
+    """Interface for a compression codec."""
+
+    name: str
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress the data."""
+        ...
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress the data."""
+        ...
+
+
+class ZlibCodec:
+    """Compression codec based on zlib from the standard library."""
+
+    name = "zlib"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress the data."""
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress the data."""
+        return zlib.decompress(data)
+
+
+class ZstdCodec:
+    """Compression codec based on Zstandard. Requires the `zstandard` package."""
+
+    name = "zstd"
+
+    def __init__(self, level: int = 3):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ValueError(
+                "The zstd compression codec requires the 'zstandard' package."
+            ) from e
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress the data."""
+        return bytes(self._compressor.compress(data))
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress the data."""
+        return bytes(self._decompressor.decompress(data))
+
+
+COMPRESSION_CODECS: dict[str, type[ICompressionCodec]] = {
+    ZlibCodec.name: ZlibCodec,
+    ZstdCodec.name: ZstdCodec,
+}
+
+
+def create_compression_codec(name: str) -> ICompressionCodec | None:
+    """Create the compression codec with the given name. Returns None for "none"."""
+    if name == NO_COMPRESSION:
+        return None
+    if name not in COMPRESSION_CODECS:
+        raise ValueError(
+            f"Unknown compression codec: {name}. "
+            f"Supported codecs: {[NO_COMPRESSION, *COMPRESSION_CODECS]}"
+        )
+    return COMPRESSION_CODECS[name]()
+
+
+class CompressedSerializer(SerializerProtocol):
+    """Serializer that compresses the typed payloads of another serializer.
+
+    Payloads at or above the threshold are compressed with the given codec and their type
+    is suffixed with the codec name. On load, the codec is chosen by that suffix, so
+    payloads written with another codec, or without compression, are read transparently.
+    """
+
+    def __init__(
+        self,
+        serde: SerializerProtocol,
+        codec: ICompressionCodec | None,
+        threshold: int = DEFAULT_COMPRESSION_THRESHOLD_BYTES,
+    ):
+        self.serde = serde
+        self.codec = codec
+        self.threshold = threshold
+        self._codecs: dict[str, ICompressionCodec] = (
+            {codec.name: codec} if codec else {}
+        )
+
+    def dumps(self, obj: Any) -> bytes:
+        """Serialize the object without compression."""
+        return self.serde.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        """Deserialize the object."""
+        return self.serde.loads(data)
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        """Serialize the object and compress it if it is large enough."""
+        type_, data = self.serde.dumps_typed(obj)
+        if self.codec is None or len(data) < self.threshold:
+            return type_, data
+        return (
+            f"{type_}{COMPRESSION_TYPE_SEPARATOR}{self.codec.name}",
+            self.codec.compress(data),
+        )
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        """Decompress the payload if needed and deserialize it."""
+        type_, payload = data
+        type_, _, codec_name = type_.partition(COMPRESSION_TYPE_SEPARATOR)
+        if codec_name:
+            payload = self._get_codec(codec_name).decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+    def _get_codec(self, name: str) -> ICompressionCodec:
+        if name not in self._codecs:
+            codec = create_compression_codec(name)
+            if codec is None:
+                raise ValueError(f"Invalid compression codec: {name}")
+            self._codecs[name] = codec
+        return self._codecs[name]
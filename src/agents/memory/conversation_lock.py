@@ -0,0 +1,290 @@
+"""Redis-based lock that serializes the requests of a conversation."""
+
+import asyncio
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, suppress
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Protocol
+
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio import RedisCluster as AsyncRedisCluster
+from redis.exceptions import WatchError
+
+from agents.memory.async_redis_checkpointer import (
+    REDIS_KEY_SEPARATOR,
+    _hash_tag,
+    _make_redis_fencing_token_key,
+)
+
+# Policy setting that disables the lock.
+NO_CONVERSATION_LOCK = "none"
+
+# Stream entry field of a chunk, and of the marker of the end of a stream.
+STREAM_CHUNK_FIELD = b"chunk"
+STREAM_END_FIELD = b"end"
+
+
+class ConversationLockPolicy(str, Enum):
+    """What to do with a request for a conversation that is processing another request."""
+
+    # Wait until the other request is completed.
+    QUEUE = "queue"
+    # Reject the request.
+    REJECT = "reject"
+    # Stream the response of the other request.
+    ATTACH = "attach"
+
+
+class ConversationBusyError(Exception):
+    """Raised if a conversation is processing another request."""
+
+    def __init__(self, conversation_id: str):
+        super().__init__(
+            f"Conversation {conversation_id} is processing another request."
+        )
+        self.conversation_id = conversation_id
+
+
+def _make_redis_lock_key(conversation_id: str) -> str:
+    """Create a Redis key for the lock of a conversation.
+
+    Returns a Redis key string in the format "conversation_lock${conversation_id}".
+    """
+    return REDIS_KEY_SEPARATOR.join(["conversation_lock", _hash_tag(conversation_id)])
+
+
+def _make_redis_stream_key(conversation_id: str, fencing_token: int) -> str:
+    """Create a Redis key for the stream of the response of a request.
+
+    Returns a Redis key string in the format "conversation_stream${conversation_id}$token".
+    """
+    return REDIS_KEY_SEPARATOR.join(
+        ["conversation_stream", _hash_tag(conversation_id), str(fencing_token)]
+    )
+
+
+@dataclass(frozen=True)
+class ConversationLease:
+    """Lease of the lock of a conversation."""
+
+    conversation_id: str
+    owner: str
+    fencing_token: int
+
+    @property
+    def value(self) -> str:
+        """Value of the lock key while the lease is held."""
+        return f"{self.owner}:{self.fencing_token}"
+
+
+class IConversationLock(Protocol):
+    """Interface of the lock of conversations."""
+
+    policy: ConversationLockPolicy
+
+    async def acquire(self, conversation_id: str) -> ConversationLease:
+        """Acquire the lock of the conversation according to the policy."""
+        ...
+
+    def hold(self, lease: ConversationLease) -> AbstractAsyncContextManager[None]:
+        """Keep the lease alive within the context and release it afterwards."""
+        ...
+
+    async def publish(self, lease: ConversationLease, chunk: bytes) -> None:
+        """Publish a chunk of the response to attached requests."""
+        ...
+
+    def attach(self, conversation_id: str) -> AsyncIterator[bytes]:
+        """Stream the response of the request holding the lock."""
+        ...
+
+
+class ConversationLock:
+    """Redis-based lease of a conversation with fencing tokens.
+
+    A lease expires after `lease_ttl` seconds unless it is renewed, so a crashed worker
+    cannot block a conversation. Every lease gets a fencing token that is higher than the
+    tokens of all previous leases. The AsyncRedisSaver rejects checkpoint writes of graph
+    runs with the token of a lease that was superseded by a newer one.
+    With the ATTACH policy, the holder publishes its response to a Redis stream that
+    other requests for the conversation read instead of processing the request again.
+    """
+
+    def __init__(
+        self,
+        conn: AsyncRedis | AsyncRedisCluster,
+        policy: ConversationLockPolicy = ConversationLockPolicy.QUEUE,
+        lease_ttl: float = 30,
+        wait_timeout: float = 60,
+        poll_interval: float = 0.1,
+        token_ttl: int | None = None,
+    ):
+        self.conn = conn
+        self.policy = policy
+        self.lease_ttl = lease_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        # The fencing tokens must outlive the checkpoints, as they protect them.
+        self.token_ttl = token_ttl or None
+
+    async def try_acquire(self, conversation_id: str) -> ConversationLease | None:
+        """Acquire the lock of the conversation if it is free."""
+        owner = str(uuid.uuid4())
+        lock_key = _make_redis_lock_key(conversation_id)
+        lease_ttl_ms = int(self.lease_ttl * 1000)
+        if not await self.conn.set(lock_key, owner, nx=True, px=lease_ttl_ms):
+            return None
+
+        # Only lock holders increment the token, so it is the fencing token of the lease.
+        token_key = _make_redis_fencing_token_key(conversation_id)
+        async with self.conn.pipeline(transaction=False) as pipe:
+            pipe.incr(token_key)
+            if self.token_ttl:
+                pipe.expire(token_key, self.token_ttl)
+            fencing_token = (await pipe.execute())[0]
+        lease = ConversationLease(conversation_id, owner, fencing_token)
+        # Attached requests find the stream of the response by the token in the lock.
+        await self.conn.set(lock_key, lease.value, xx=True, px=lease_ttl_ms)
+        return lease
+
+    async def acquire(self, conversation_id: str) -> ConversationLease:
+        """Acquire the lock of the conversation according to the policy.
+
+        With the QUEUE policy, waits up to `wait_timeout` seconds for the lock.
+
+        Raises:
+            ConversationBusyError: If the lock is held by another request.
+        """
+        deadline = time.monotonic() + (
+            self.wait_timeout if self.policy == ConversationLockPolicy.QUEUE else 0
+        )
+        while (lease := await self.try_acquire(conversation_id)) is None:
+            if time.monotonic() >= deadline:
+                raise ConversationBusyError(conversation_id)
+            await asyncio.sleep(self.poll_interval)
+        return lease
+
+    async def renew(self, lease: ConversationLease) -> bool:
+        """Extend the lease. Returns False if the lease was lost."""
+        lease_ttl_ms = int(self.lease_ttl * 1000)
+        return await self._if_held(
+            lease, lambda pipe, lock_key: pipe.pexpire(lock_key, lease_ttl_ms)
+        )
+
+    async def release(self, lease: ConversationLease) -> None:
+        """Release the lease if it is still held."""
+        await self._if_held(lease, lambda pipe, lock_key: pipe.delete(lock_key))
+
+    async def _if_held(
+        self, lease: ConversationLease, command: Callable[[Any, str], Any]
+    ) -> bool:
+        """Queue the command on the lock key in a transaction if the lease is still held."""
+        lock_key = _make_redis_lock_key(lease.conversation_id)
+        if isinstance(self.conn, AsyncRedisCluster):
+            # Cluster pipelines do not support WATCH, so the check is not atomic.
+            if _decode(await self.conn.get(lock_key)) != lease.value:
+                return False
+            async with self.conn.pipeline() as cluster_pipe:
+                command(cluster_pipe, lock_key)
+                await cluster_pipe.execute()
+            return True
+
+        async with self.conn.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(lock_key)
+                if _decode(await pipe.get(lock_key)) != lease.value:
+                    return False
+                pipe.multi()
+                command(pipe, lock_key)
+                await pipe.execute()
+            except WatchError:
+                return False
+        return True
+
+    @asynccontextmanager
+    async def hold(self, lease: ConversationLease) -> AsyncIterator[None]:
+        """Keep the lease alive within the context and release it afterwards.
+
+        With the ATTACH policy, the end of the response is published on exit.
+        """
+        renewal = asyncio.create_task(self._renew_periodically(lease))
+        try:
+            yield
+        finally:
+            renewal.cancel()
+            with suppress(asyncio.CancelledError):
+                await renewal
+            if self.policy == ConversationLockPolicy.ATTACH:
+                await self._add_to_stream(lease, {STREAM_END_FIELD: b"1"})
+            await self.release(lease)
+
+    async def _renew_periodically(self, lease: ConversationLease) -> None:
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            if not await self.renew(lease):
+                # Writes with the fencing token are rejected if another request
+                # acquired the lock in the meantime.
+                return
+
+    async def publish(self, lease: ConversationLease, chunk: bytes) -> None:
+        """Publish a chunk of the response to attached requests.
+
+        Only has an effect with the ATTACH policy.
+        """
+        if self.policy == ConversationLockPolicy.ATTACH:
+            await self._add_to_stream(lease, {STREAM_CHUNK_FIELD: chunk})
+
+    async def _add_to_stream(
+        self, lease: ConversationLease, fields: dict[bytes, bytes]
+    ) -> None:
+        stream_key = _make_redis_stream_key(lease.conversation_id, lease.fencing_token)
+        async with self.conn.pipeline(transaction=False) as pipe:
+            pipe.xadd(stream_key, fields)  # type: ignore[arg-type]
+            # Keep the stream a while after the end for requests attaching late.
+            pipe.pexpire(stream_key, int(self.lease_ttl * 1000))
+            await pipe.execute()
+
+    async def attach(self, conversation_id: str) -> AsyncIterator[bytes]:
+        """Stream the response of the request holding the lock of the conversation.
+
+        The stream ends with the response, or when the lock is released
+        without completing the response.
+        """
+        lock_key = _make_redis_lock_key(conversation_id)
+        lease_value = await self._await_lease_value(lock_key)
+        if lease_value is None:
+            return
+        stream_key = _make_redis_stream_key(
+            conversation_id, int(lease_value.rpartition(":")[2])
+        )
+        last_id = "0"
+        block_ms = int(self.poll_interval * 1000) or 1
+        while True:
+            entries = await self.conn.xread({stream_key: last_id}, block=block_ms)
+            if not entries:
+                if _decode(await self.conn.get(lock_key)) != lease_value:
+                    # The holder released or lost the lock without completing the response.
+                    return
+                continue
+            for entry_id, fields in entries[0][1]:
+                last_id = entry_id
+                if STREAM_END_FIELD in fields:
+                    return
+                yield fields[STREAM_CHUNK_FIELD]
+
+    async def _await_lease_value(self, lock_key: str) -> str | None:
+        """Get the value of a held lock, waiting until its fencing token is set."""
+        deadline = time.monotonic() + self.lease_ttl
+        while time.monotonic() < deadline:
+            value = _decode(await self.conn.get(lock_key))
+            if value is None or ":" in value:
+                return value
+            await asyncio.sleep(self.poll_interval)
+        return None
+
+
+def _decode(value: bytes | str | None) -> str | None:
+    return value.decode() if isinstance(value, bytes) else value
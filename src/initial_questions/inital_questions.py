@@ -1,4 +1,6 @@
+import asyncio
 import typing
+from collections.abc import AsyncIterator, Awaitable
 from typing import Protocol
 
 import tiktoken
@@ -8,9 +10,14 @@ from langchain_core.prompts import PromptTemplate
 from agents.common.data import Message
 from initial_questions.output_parser import QuestionOutputParser
 from initial_questions.prompts import INITIAL_QUESTIONS_PROMPT
-from services.k8s import IK8sClient
+from services.k8s import (
+    NOT_RUNNING_PODS_FIELD_SELECTOR,
+    WARNING_EVENTS_FIELD_SELECTOR,
+    IK8sClient,
+)
 from utils.logging import get_logger
 from utils.models.factory import IModel
+from utils.settings import INITIAL_QUESTIONS_FETCH_TIMEOUT_SECONDS
 from utils.utils import is_empty_str, is_non_empty_str
 
 logger = get_logger(__name__)
@@ -23,8 +30,8 @@ class IInitialQuestionsHandler(Protocol):
         """Generates initial questions given a context with cluster data."""
         ...
 
-    def fetch_relevant_data_from_k8s_cluster(
-        self, message: Message, k8s_client: IK8sClient
+    async def fetch_relevant_data_from_k8s_cluster(
+        self, message: Message, k8s_client: IK8sClient, token_limit: int | None = None
     ) -> str:
         """Fetch the relevant data from Kubernetes cluster based on specified K8s resource in message."""
         ...
@@ -54,12 +61,14 @@ class InitialQuestionsHandler:
     _model: IModel
     _template: str
     _tokenizer: IEncoding
+    _fetch_timeout: float
 
     def __init__(
         self,
         model: IModel,
         template: str | None = None,
         tokenizer: IEncoding | None = None,
+        fetch_timeout: float = INITIAL_QUESTIONS_FETCH_TIMEOUT_SECONDS,
     ) -> None:
         self._model = model
         self._template = template or INITIAL_QUESTIONS_PROMPT
@@ -70,6 +79,7 @@ class InitialQuestionsHandler:
         output_parser = QuestionOutputParser()
         self._chain = prompt | model.llm | output_parser
         self._tokenizer = tokenizer or tiktoken.encoding_for_model(self._model.name)
+        self._fetch_timeout = fetch_timeout
 
     def apply_token_limit(self, text: str, token_limit: int) -> str:
         """Reduces the amount of tokens of a string by truncating exeeding tokens.
@@ -94,10 +104,59 @@ class InitialQuestionsHandler:
         # Format prompt and send to llm.
         return self._chain.invoke({"context": context})  # type: ignore
 
-    def fetch_relevant_data_from_k8s_cluster(
-        self, message: Message, k8s_client: IK8sClient
+    async def _dump_all_within_token_limit(
+        self, resources: AsyncIterator[dict], token_limit: int | None
     ) -> str:
-        """Fetch the relevant data from Kubernetes cluster based on specified K8s resource in message."""
+        """Dump the resources as YAML documents, stopping once the token limit is reached."""
+        documents = []
+        token_count = 0
+        async for resource in resources:
+            document = yaml.dump(resource)
+            documents.append(document)
+            if token_limit is not None:
+                token_count += len(self._tokenizer.encode(text=document))
+                if token_count >= token_limit:
+                    break
+        return "---\n".join(documents)
+
+    async def _gather_within_timeout(self, fetches: list[Awaitable[str]]) -> list[str]:
+        """Run the fetches concurrently. Fetches which fail or do not complete
+        within the fetch timeout result in empty strings, so a partial context is
+        returned. Raises the first error if no fetch succeeds."""
+        tasks = [asyncio.ensure_future(fetch) for fetch in fetches]
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=self._fetch_timeout)
+        finally:
+            for task in tasks:
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = []
+        errors: list[BaseException] = []
+        for task in tasks:
+            error: BaseException | None
+            if task in pending:
+                error = TimeoutError(
+                    f"Fetching data from the cluster took longer than {self._fetch_timeout} seconds."
+                )
+            else:
+                error = task.exception()
+            if error is None:
+                results.append(task.result())
+                continue
+            logger.warning(f"Skipping cluster data which failed to fetch: {error}")
+            errors.append(error)
+            results.append("")
+        if len(errors) == len(tasks):
+            raise errors[0]
+        return results
+
+    async def fetch_relevant_data_from_k8s_cluster(
+        self, message: Message, k8s_client: IK8sClient, token_limit: int | None = None
+    ) -> str:
+        """Fetch the relevant data from Kubernetes cluster based on specified K8s resource in message.
+        Listing resources stops once a list exceeds the token limit, as the context is
+        truncated to it anyway. Independent data is fetched concurrently."""
 
         logger.info("Fetching relevant data from k8s cluster")
 
@@ -116,10 +175,32 @@ class InitialQuestionsHandler:
             logger.info(
                 "Fetching all not running Pods, Node metrics, and K8s Events with warning type"
             )
-            pods = yaml.dump_all(k8s_client.list_not_running_pods(namespace=namespace))
-            metrics = yaml.dump_all(k8s_client.list_nodes_metrics())
-            events = yaml.dump_all(
-                k8s_client.list_k8s_warning_events(namespace=namespace)
+
+            async def fetch_metrics() -> str:
+                return str(yaml.dump_all(await k8s_client.list_nodes_metrics()))
+
+            pods, metrics, events = await self._gather_within_timeout(
+                [
+                    self._dump_all_within_token_limit(
+                        k8s_client.iter_resources(
+                            api_version="v1",
+                            kind="Pod",
+                            namespace=namespace,
+                            field_selector=NOT_RUNNING_PODS_FIELD_SELECTOR,
+                        ),
+                        token_limit,
+                    ),
+                    fetch_metrics(),
+                    self._dump_all_within_token_limit(
+                        k8s_client.iter_resources(
+                            api_version="v1",
+                            kind="Event",
+                            namespace=namespace,
+                            field_selector=WARNING_EVENTS_FIELD_SELECTOR,
+                        ),
+                        token_limit,
+                    ),
+                ]
             )
 
             context = f"{pods}\n{metrics}\n{events}"
@@ -128,8 +209,14 @@ class InitialQuestionsHandler:
             # Get an overview of the namespace
             # by fetching all K8s events with warning type.
             logger.info("Fetching all K8s Events with warning type")
-            context = yaml.dump_all(
-                k8s_client.list_k8s_warning_events(namespace=namespace)
+            context = await self._dump_all_within_token_limit(
+                k8s_client.iter_resources(
+                    api_version="v1",
+                    kind="Event",
+                    namespace=namespace,
+                    field_selector=WARNING_EVENTS_FIELD_SELECTOR,
+                ),
+                token_limit,
             )
 
         elif is_non_empty_str(kind) and is_non_empty_str(api_version):
@@ -138,20 +225,34 @@ class InitialQuestionsHandler:
             logger.info(
                 f"Fetching all entities of Kind {kind} with API version {api_version}"
             )
-            resources = yaml.dump(
-                k8s_client.describe_resource(
-                    api_version=api_version,
-                    kind=kind,
-                    name=name,
-                    namespace=namespace,
+
+            async def fetch_resource() -> str:
+                return str(
+                    yaml.dump(
+                        await k8s_client.describe_resource(
+                            api_version=api_version,
+                            kind=kind,
+                            name=name,
+                            namespace=namespace,
+                        )
+                    )
                 )
-            )
-            events = yaml.dump_all(
-                k8s_client.list_k8s_events_for_resource(
-                    kind=kind,
-                    name=name,
-                    namespace=namespace,
+
+            async def fetch_events() -> str:
+                return str(
+                    yaml.dump_all(
+                        await k8s_client.list_k8s_events_for_resource(
+                            kind=kind,
+                            name=name,
+                            namespace=namespace,
+                        )
+                    )
                 )
+
+            # The events are requested once, as the K8s client coalesces the
+            # identical events request of describe_resource.
+            resources, events = await self._gather_within_timeout(
+                [fetch_resource(), fetch_events()]
             )
 
             context = f"{resources}\n{events}"
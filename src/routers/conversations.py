@@ -1,3 +1,4 @@
+from collections.abc import AsyncIterator
 from functools import lru_cache
 from typing import Annotated
 
@@ -6,6 +7,7 @@ from fastapi.encoders import jsonable_encoder
 from starlette.responses import JSONResponse, StreamingResponse
 
 from agents.common.data import Message
+from agents.memory.conversation_lock import ConversationBusyError
 from routers.common import (
     API_PREFIX,
     SESSION_ID_HEADER,
@@ -15,7 +17,8 @@ from routers.common import (
 )
 from services.conversation import ConversationService, IService
 from services.data_sanitizer import DataSanitizer, IDataSanitizer
-from services.k8s import IK8sClient, K8sClient
+from services.field_projector import FieldProjector
+from services.k8s import K8sClient, K8sClientRegistry
 from utils.config import Config, get_config
 from utils.logging import get_logger
 from utils.response import prepare_chunk_response
@@ -44,6 +47,16 @@ def init_conversation_service(
     return ConversationService(config=config)
 
 
+@lru_cache(maxsize=1)
+def init_k8s_client_registry() -> K8sClientRegistry:
+    """Initialize the registry of K8s clients once, so the clients are reused across requests."""
+    config = init_config()
+    return K8sClientRegistry(
+        data_sanitizer=init_data_sanitizer(config),
+        field_projector=FieldProjector(config.field_projection_config),
+    )
+
+
 router = APIRouter(
     prefix=f"{API_PREFIX}/conversations",
     tags=["conversations"],
@@ -57,7 +70,9 @@ async def init_conversation(
     x_k8s_authorization: Annotated[str, Header()],
     x_cluster_certificate_authority_data: Annotated[str, Header()],
     conversation_service: Annotated[IService, Depends(init_conversation_service)],
-    data_sanitizer: Annotated[IDataSanitizer, Depends(init_data_sanitizer)],
+    k8s_client_registry: Annotated[
+        K8sClientRegistry, Depends(init_k8s_client_registry)
+    ],
     session_id: Annotated[str, Header()] = "",
 ) -> JSONResponse:
     """Endpoint to initialize a conversation with Kyma Companion and generates initial questions."""
@@ -69,11 +84,10 @@ async def init_conversation(
 
     # Initialize k8s client for the request.
     try:
-        k8s_client: IK8sClient = K8sClient(
+        k8s_client = k8s_client_registry.get_client(
             api_server=x_cluster_url,
             user_token=x_k8s_authorization,
             certificate_authority_data=x_cluster_certificate_authority_data,
-            data_sanitizer=data_sanitizer,
         )
     except Exception as e:
         logger.error(e)
@@ -83,7 +97,7 @@ async def init_conversation(
 
     try:
         # Create initial questions.
-        questions = conversation_service.new_conversation(
+        questions = await conversation_service.new_conversation(
             k8s_client=k8s_client,
             message=Message(
                 query="",
@@ -105,6 +119,8 @@ async def init_conversation(
     except Exception as e:
         logger.error(e)
         raise HTTPException(status_code=500, detail=str(e)) from e
+    finally:
+        k8s_client_registry.release_client(k8s_client)
 
 
 @router.get("/{conversation_id}/questions", response_model=FollowUpQuestionsResponse)
@@ -142,17 +158,18 @@ async def messages(
     x_k8s_authorization: Annotated[str, Header()],
     x_cluster_certificate_authority_data: Annotated[str, Header()],
     conversation_service: Annotated[IService, Depends(init_conversation_service)],
-    data_sanitizer: Annotated[IDataSanitizer, Depends(init_data_sanitizer)],
+    k8s_client_registry: Annotated[
+        K8sClientRegistry, Depends(init_k8s_client_registry)
+    ],
 ) -> StreamingResponse:
     """Endpoint to send a message to the Kyma companion"""
 
     # Initialize k8s client for the request.
     try:
-        k8s_client: IK8sClient = K8sClient(
+        k8s_client = k8s_client_registry.get_client(
             api_server=x_cluster_url,
             user_token=x_k8s_authorization,
             certificate_authority_data=x_cluster_certificate_authority_data,
-            data_sanitizer=data_sanitizer,
         )
     except Exception as e:
         logger.error(e)
@@ -160,12 +177,48 @@ async def messages(
             status_code=400, detail=f"failed to connect to the cluster: {str(e)}"
         ) from e
 
+    # Wait for the first chunk, so that a busy conversation is rejected before streaming.
+    chunks = conversation_service.handle_request(conversation_id, message, k8s_client)
+    try:
+        first_chunk = await anext(aiter(chunks), None)
+    except ConversationBusyError as e:
+        k8s_client_registry.release_client(k8s_client)
+        logger.warning(e)
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    except Exception:
+        k8s_client_registry.release_client(k8s_client)
+        raise
+
     return StreamingResponse(
         (
             prepare_chunk_response(chunk) + b"\n"
-            async for chunk in conversation_service.handle_request(
-                conversation_id, message, k8s_client
+            async for chunk in _release_client_after(
+                _prepend_chunk(first_chunk, chunks), k8s_client_registry, k8s_client
             )
         ),
         media_type="text/event-stream",
     )
+
+
+async def _prepend_chunk(
+    first_chunk: bytes | None, chunks: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    """Stream the already received first chunk followed by the remaining chunks."""
+    if first_chunk is None:
+        return
+    yield first_chunk
+    async for chunk in chunks:
+        yield chunk
+
+
+async def _release_client_after(
+    chunks: AsyncIterator[bytes],
+    k8s_client_registry: K8sClientRegistry,
+    k8s_client: K8sClient,
+) -> AsyncIterator[bytes]:
+    """Stream the chunks and release the K8s client once streaming ends or is aborted."""
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        k8s_client_registry.release_client(k8s_client)
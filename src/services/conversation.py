@@ -1,9 +1,19 @@
 from collections.abc import AsyncGenerator
 from typing import Protocol, cast
 
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
 from agents.common.data import Message
 from agents.graph import CompanionGraph, IGraph
 from agents.memory.async_redis_checkpointer import AsyncRedisSaver
+from agents.memory.compression import CompressedSerializer, create_compression_codec
+from agents.memory.conversation_lock import (
+    NO_CONVERSATION_LOCK,
+    ConversationBusyError,
+    ConversationLock,
+    ConversationLockPolicy,
+    IConversationLock,
+)
 from followup_questions.followup_questions import (
     FollowUpQuestionsHandler,
     IFollowUpQuestionsHandler,
@@ -16,7 +26,23 @@ from services.k8s import IK8sClient
 from utils.config import Config
 from utils.logging import get_logger
 from utils.models.factory import IModel, IModelFactory, ModelFactory, ModelType
-from utils.settings import REDIS_DB_NUMBER, REDIS_HOST, REDIS_PORT
+from utils.settings import (
+    CONVERSATION_LOCK_LEASE_SECONDS,
+    CONVERSATION_LOCK_POLICY,
+    CONVERSATION_LOCK_WAIT_TIMEOUT_SECONDS,
+    REDIS_CHECKPOINT_CACHE_SIZE,
+    REDIS_CLUSTER_MODE,
+    REDIS_COMPRESSION_CODEC,
+    REDIS_COMPRESSION_THRESHOLD_BYTES,
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+    REDIS_MAX_CHECKPOINTS,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_POOL_TIMEOUT_SECONDS,
+    REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+    REDIS_SOCKET_TIMEOUT_SECONDS,
+    REDIS_TTL_SECONDS,
+    REDIS_URL,
+)
 from utils.singleton_meta import SingletonMeta
 
 logger = get_logger(__name__)
@@ -27,7 +53,9 @@ TOKEN_LIMIT = 16_000
 class IService(Protocol):
     """Service interface"""
 
-    def new_conversation(self, k8s_client: IK8sClient, message: Message) -> list[str]:
+    async def new_conversation(
+        self, k8s_client: IK8sClient, message: Message
+    ) -> list[str]:
         """Initialize a new conversation."""
         ...
 
@@ -58,6 +86,7 @@ class ConversationService(metaclass=SingletonMeta):
         initial_questions_handler: IInitialQuestionsHandler | None = None,
         model_factory: IModelFactory | None = None,
         followup_questions_handler: IFollowUpQuestionsHandler | None = None,
+        conversation_lock: IConversationLock | None = None,
     ) -> None:
         try:
             self._model_factory = model_factory or ModelFactory(config=config)
@@ -78,15 +107,45 @@ class ConversationService(metaclass=SingletonMeta):
         )
 
         # Set up the Kyma Graph which allows access to stored conversation histories.
-        checkpointer = AsyncRedisSaver.from_conn_info(
-            host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB_NUMBER
+        checkpointer = AsyncRedisSaver.from_url(
+            REDIS_URL,
+            cluster=REDIS_CLUSTER_MODE,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            pool_timeout=REDIS_POOL_TIMEOUT_SECONDS,
+            socket_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+            health_check_interval=REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+            ttl=REDIS_TTL_SECONDS,
+            max_checkpoints=REDIS_MAX_CHECKPOINTS,
+            serde=CompressedSerializer(
+                JsonPlusSerializer(),
+                codec=create_compression_codec(REDIS_COMPRESSION_CODEC),
+                threshold=REDIS_COMPRESSION_THRESHOLD_BYTES,
+            ),
+            cache_size=REDIS_CHECKPOINT_CACHE_SIZE,
         )
         self._companion_graph = CompanionGraph(
             models,
             memory=checkpointer,
         )
 
-    def new_conversation(self, k8s_client: IK8sClient, message: Message) -> list[str]:
+        # Set up the lock which prevents concurrent requests for the same conversation.
+        self._conversation_lock = conversation_lock
+        if (
+            self._conversation_lock is None
+            and CONVERSATION_LOCK_POLICY != NO_CONVERSATION_LOCK
+        ):
+            self._conversation_lock = ConversationLock(
+                checkpointer.conn,
+                policy=ConversationLockPolicy(CONVERSATION_LOCK_POLICY),
+                lease_ttl=CONVERSATION_LOCK_LEASE_SECONDS,
+                wait_timeout=CONVERSATION_LOCK_WAIT_TIMEOUT_SECONDS,
+                token_ttl=REDIS_TTL_SECONDS,
+            )
+
+    async def new_conversation(
+        self, k8s_client: IK8sClient, message: Message
+    ) -> list[str]:
         """Initialize a new conversation."""
 
         logger.info(
@@ -95,8 +154,10 @@ class ConversationService(metaclass=SingletonMeta):
         )
 
         # Fetch the context for our questions from the Kubernetes cluster.
-        k8s_context = self._init_questions_handler.fetch_relevant_data_from_k8s_cluster(
-            message=message, k8s_client=k8s_client
+        k8s_context = (
+            await self._init_questions_handler.fetch_relevant_data_from_k8s_cluster(
+                message=message, k8s_client=k8s_client, token_limit=TOKEN_LIMIT
+            )
         )
 
         # Reduce the amount of tokens according to the limits.
@@ -124,12 +185,49 @@ class ConversationService(metaclass=SingletonMeta):
     async def handle_request(
         self, conversation_id: str, message: Message, k8s_client: IK8sClient
     ) -> AsyncGenerator[bytes, None]:
-        """Handle a request"""
+        """Handle a request.
+
+        Only one request per conversation is processed at a time. Other requests are
+        handled according to the policy of the conversation lock.
+
+        Raises:
+            ConversationBusyError: If the conversation is processing another request
+                and the request cannot wait for it.
+        """
 
         logger.info("Processing request...")
 
-        async for chunk in self._companion_graph.astream(
-            conversation_id, message, k8s_client
-        ):
-            logger.debug(f"Sending chunk: {chunk}")
-            yield chunk.encode()
+        if self._conversation_lock is None:
+            async for chunk in self._companion_graph.astream(
+                conversation_id, message, k8s_client
+            ):
+                logger.debug(f"Sending chunk: {chunk}")
+                yield chunk.encode()
+            return
+
+        while True:
+            try:
+                lease = await self._conversation_lock.acquire(conversation_id)
+                break
+            except ConversationBusyError:
+                if self._conversation_lock.policy != ConversationLockPolicy.ATTACH:
+                    raise
+            logger.info(
+                f"Attaching to the running request of conversation: ({conversation_id})"
+            )
+            attached = False
+            async for encoded_chunk in self._conversation_lock.attach(conversation_id):
+                attached = True
+                yield encoded_chunk
+            if attached:
+                return
+            # The running request was completed before attaching, so try again.
+
+        async with self._conversation_lock.hold(lease):
+            async for chunk in self._companion_graph.astream(
+                conversation_id, message, k8s_client, fencing_token=lease.fencing_token
+            ):
+                logger.debug(f"Sending chunk: {chunk}")
+                encoded_chunk = chunk.encode()
+                await self._conversation_lock.publish(lease, encoded_chunk)
+                yield encoded_chunk
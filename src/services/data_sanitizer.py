@@ -1,9 +1,23 @@
-import json
-from typing import Protocol
-
-import scrubadub
+import multiprocessing
+import re
+import threading
+from collections import deque
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from itertools import batched, chain, islice
+from typing import Any, Protocol
 
+from services.pii_scrubber import DEFAULT_PII_SAFE_FIELD_NAMES, create_pii_scrubber
+from services.sanitization_cache import SanitizationCache, get_object_cache_key
 from utils.config import DataSanitizationConfig
+from utils.settings import (
+    DATA_SANITIZER_CACHE_SIZE,
+    DATA_SANITIZER_CHUNK_SIZE,
+    DATA_SANITIZER_MAX_IN_FLIGHT_CHUNKS,
+    DATA_SANITIZER_PARALLEL_MIN_ITEMS,
+    DATA_SANITIZER_PROCESSES,
+)
 from utils.singleton_meta import SingletonMeta
 
 DEFAULT_SENSITIVE_RESOURCES = [
@@ -63,6 +77,30 @@ DEFAULT_SENSITIVE_FIELD_TO_EXCLUDE = [
 
 REDACTED_VALUE = "[REDACTED]"
 
+# Number of strings whose cleaned value is kept for reuse.
+CLEANED_STRINGS_CACHE_SIZE = 65536
+# Only strings up to this length are kept for reuse, which bounds the memory of the cache.
+# Longer strings, e.g. ConfigMap data or last-applied-configuration annotations, are rarely
+# repeated and are cleaned directly.
+CLEANED_STRINGS_CACHE_MAX_LENGTH = 256
+# Number of keys and env var names whose decision is kept for reuse.
+KEY_DECISIONS_CACHE_SIZE = 8192
+
+
+def compile_keyword_matcher(keywords: list[str] | None) -> Callable[[str], bool]:
+    """Compile the keywords into a function which checks case-insensitively if a text
+    contains any of them. The decisions are memoized, as K8s objects repeat their keys.
+    """
+    if not keywords:
+        return lambda _: False
+    pattern = re.compile("|".join(re.escape(keyword.lower()) for keyword in keywords))
+
+    @lru_cache(maxsize=KEY_DECISIONS_CACHE_SIZE)
+    def matches(text: str) -> bool:
+        return pattern.search(text.lower()) is not None
+
+    return matches
+
 
 class IDataSanitizer(Protocol):
     """A protocol for a data sanitizer."""
@@ -71,49 +109,193 @@ class IDataSanitizer(Protocol):
         """Sanitize the data by removing sensitive information."""
         ...
 
+    def sanitize_iter(self, items: Iterable[dict]) -> Iterator[dict]:
+        """Sanitize the objects lazily, yielding them in order."""
+        ...
+
+
+def _sanitize_chunk(config: DataSanitizationConfig, chunk: list[dict]) -> list[dict]:
+    """Sanitize a chunk of objects in a worker process."""
+    sanitizer = DataSanitizer(config, processes=0, cache_size=0)
+    return [sanitizer._sanitize_object(obj) for obj in chunk]
+
 
 class DataSanitizer(metaclass=SingletonMeta):
-    """Implementation of the data sanitizer that processes input dictionaries."""
+    """Implementation of the data sanitizer that processes input dictionaries.
+
+    Lists with at least `parallel_min_items` objects are sanitized in chunks of
+    `chunk_size` objects by a pool of `processes` worker processes, if enabled.
+    Sanitized K8s objects are cached by their resourceVersion, so unchanged objects
+    which are fetched again are not sanitized again. Lists returned by the API server,
+    e.g. a PodList, are not cached. A cache size of 0 disables the cache.
+    """
 
-    def __init__(self, config: DataSanitizationConfig | None = None):
+    def __init__(
+        self,
+        config: DataSanitizationConfig | None = None,
+        processes: int = DATA_SANITIZER_PROCESSES,
+        parallel_min_items: int = DATA_SANITIZER_PARALLEL_MIN_ITEMS,
+        chunk_size: int = DATA_SANITIZER_CHUNK_SIZE,
+        max_in_flight_chunks: int = DATA_SANITIZER_MAX_IN_FLIGHT_CHUNKS,
+        cache_size: int = DATA_SANITIZER_CACHE_SIZE,
+    ):
         self.config = config or DataSanitizationConfig(
             resources_to_sanitize=DEFAULT_SENSITIVE_RESOURCES,
             sensitive_env_vars=DEFAULT_SENSITIVE_ENV_VARS,
             sensitive_field_names=DEFAULT_SENSITIVE_FIELD_NAMES,
             sensitive_field_to_exclude=DEFAULT_SENSITIVE_FIELD_TO_EXCLUDE,
         )
-        self.scrubber = scrubadub.Scrubber()
+        self.scrubber = create_pii_scrubber(self.config.pii_detector_profile)
+        self._pii_safe_field_names = frozenset(
+            DEFAULT_PII_SAFE_FIELD_NAMES
+            if self.config.pii_safe_field_names is None
+            else self.config.pii_safe_field_names
+        )
+        self._is_sensitive_field_name = compile_keyword_matcher(
+            self.config.sensitive_field_names
+        )
+        self._is_sensitive_env_var = compile_keyword_matcher(
+            self.config.sensitive_env_vars
+        )
+        self._excluded_field_names = frozenset(
+            self.config.sensitive_field_to_exclude or []
+        )
+        # K8s objects repeat many strings, e.g. label values and condition types.
+        self._clean_short_string = lru_cache(maxsize=CLEANED_STRINGS_CACHE_SIZE)(
+            self._clean_personal_information
+        )
+        self.processes = processes
+        self.parallel_min_items = parallel_min_items
+        self.chunk_size = chunk_size
+        self.max_in_flight_chunks = max_in_flight_chunks
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._process_pool_lock = threading.Lock()
+        self.cache = SanitizationCache(cache_size) if cache_size > 0 else None
+        self._config_hash = hash(self.config.model_dump_json())
 
     def sanitize(self, data: dict | list[dict]) -> dict | list[dict]:
         """Sanitize the data by removing sensitive information."""
         if isinstance(data, list):
-            return [self._sanitize_object(obj) for obj in data]
+            return list(self.sanitize_iter(data))
         elif isinstance(data, dict):
-            return self._sanitize_object(data)
+            return self._sanitize_cached(data)
         raise ValueError("Data must be a list or a dictionary.")
 
+    def sanitize_iter(self, items: Iterable[dict]) -> Iterator[dict]:
+        """Sanitize the objects lazily, yielding them in order.
+
+        If worker processes are enabled and there are at least `parallel_min_items`
+        objects, they are sanitized by the process pool. At most `max_in_flight_chunks`
+        chunks are sanitized ahead of the consumer, which bounds the memory held for
+        a slow consumer.
+        """
+        iterator = iter(items)
+        if self.processes <= 0:
+            yield from map(self._sanitize_cached, iterator)
+            return
+        head = list(islice(iterator, self.parallel_min_items))
+        if len(head) < self.parallel_min_items:
+            yield from map(self._sanitize_cached, head)
+            return
+        yield from self._sanitize_in_process_pool(chain(head, iterator))
+
+    def _sanitize_in_process_pool(self, items: Iterator[dict]) -> Iterator[dict]:
+        """Sanitize the objects in chunks by the process pool, keeping their order.
+        Only the objects which are not cached are sent to the worker processes."""
+        pool = self._get_process_pool()
+        in_flight: deque[tuple[list, list, Future[list[dict]] | None]] = deque()
+        try:
+            for chunk in batched(items, self.chunk_size):
+                if len(in_flight) >= self.max_in_flight_chunks:
+                    yield from self._merge_chunk(*in_flight.popleft())
+                keys = [self._get_cache_key(obj) for obj in chunk]
+                results = [self._get_cached(key) for key in keys]
+                misses = [
+                    obj
+                    for obj, result in zip(chunk, results, strict=True)
+                    if result is None
+                ]
+                future = (
+                    pool.submit(_sanitize_chunk, self.config, misses)
+                    if misses
+                    else None
+                )
+                in_flight.append((keys, results, future))
+            while in_flight:
+                yield from self._merge_chunk(*in_flight.popleft())
+        finally:
+            # The consumer stopped early or a chunk failed.
+            for _, _, future in in_flight:
+                if future is not None:
+                    future.cancel()
+
+    def _merge_chunk(
+        self, keys: list, results: list, future: Future[list[dict]] | None
+    ) -> Iterator[dict]:
+        """Yield the cached and sanitized objects of a chunk, caching the sanitized ones."""
+        sanitized = iter(future.result() if future is not None else [])
+        for key, result in zip(keys, results, strict=True):
+            if result is None:
+                result = next(sanitized)
+                if key is not None and self.cache is not None:
+                    self.cache.put(key, result)
+            yield result
+
+    def _get_cache_key(self, obj: Any) -> Hashable | None:
+        """Get the cache key of an object, or None if it is not cached."""
+        if self.cache is None or not isinstance(obj, dict):
+            return None
+        key = get_object_cache_key(obj)
+        return None if key is None else (self._config_hash, key)
+
+    def _get_cached(self, key: Hashable | None) -> dict | None:
+        """Get the cached sanitized object of the key, if any."""
+        if key is None or self.cache is None:
+            return None
+        return self.cache.get(key)
+
+    def _sanitize_cached(self, obj: dict) -> dict:
+        """Sanitize a single object, reusing the result of an identical object."""
+        key = self._get_cache_key(obj)
+        result = self._get_cached(key)
+        if result is None:
+            result = self._sanitize_object(obj)
+            if key is not None and self.cache is not None:
+                self.cache.put(key, result)
+        return result
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Get the process pool, which is created on first use."""
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                # Spawned workers do not inherit the state of the server process.
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._process_pool
+
     def _sanitize_object(self, obj: dict) -> dict:
-        """Sanitize a single object."""
+        """Sanitize a single object.
+
+        The object is traversed once. Personal information is removed from string
+        values and sensitive keys are redacted in the same pass. Only the dictionaries
+        and lists which change are copied, so the original is not modified.
+        """
         if not isinstance(obj, dict):
             return obj
 
-        cleaned_obj = self._clean_personal_information(obj)
-
-        # Create a copy to avoid modifying the original
-        obj = cleaned_obj.copy()
-
         # Handle specific Kubernetes resource types
-        if "kind" in obj:
-            if obj["kind"] == "Secret" or obj["kind"] == "SecretList":
-                return self._sanitize_secret(obj)
-            elif obj["kind"] in (self.config.resources_to_sanitize or []):
-                if "items" in obj:
-                    obj["items"] = [
-                        self._sanitize_workload(item) for item in obj["items"]
-                    ]
-                    return obj
-                else:
-                    return self._sanitize_workload(obj)
+        kind = obj.get("kind")
+        if kind == "Secret" or kind == "SecretList":
+            return self._sanitize_secret(self._sanitize_mapping(obj, redact_keys=False))
+        elif kind in (self.config.resources_to_sanitize or []):
+            obj = self._sanitize_mapping(obj, redact_keys=False)
+            if "items" in obj:
+                obj = obj.copy()
+                obj["items"] = [self._sanitize_workload(item) for item in obj["items"]]
+                return obj
+            return self._sanitize_workload(obj)
 
         # Recursively sanitize all dictionary fields
         return self._sanitize_dict(obj)
@@ -133,33 +315,47 @@ class DataSanitizer(metaclass=SingletonMeta):
     def _sanitize_workload(self, obj: dict) -> dict:
         """Sanitize a workload object (Deployment, Pod, StatefulSet, DaemonSet)."""
         try:
+            spec = obj.get("spec", {})
             # Handle template-based resources (Deployment, StatefulSet, DaemonSet)
-            if "spec" in obj and "template" in obj["spec"]:
-                containers = obj["spec"]["template"]["spec"]["containers"]
+            if "template" in spec:
+                template = spec["template"]
+                pod_spec = template["spec"]
+                containers = self._filter_containers(pod_spec["containers"])
+                return {
+                    **obj,
+                    "spec": {
+                        **spec,
+                        "template": {
+                            **template,
+                            "spec": {**pod_spec, "containers": containers},
+                        },
+                    },
+                }
             # Handle Pods
-            elif "spec" in obj and "containers" in obj["spec"]:
-                containers = obj["spec"]["containers"]
-            else:
-                return obj
-
-            # Process each container
-            for container in containers:
-                if "env" in container:
-                    container["env"] = self._filter_env_vars(container["env"])
-
+            elif "containers" in spec:
+                containers = self._filter_containers(spec["containers"])
+                return {**obj, "spec": {**spec, "containers": containers}}
             return obj
         except KeyError:
             return obj
 
+    def _filter_containers(self, containers: list[dict]) -> list[dict]:
+        """Filter out sensitive environment variables of the containers."""
+        return [
+            (
+                {**container, "env": self._filter_env_vars(container["env"])}
+                if "env" in container
+                else container
+            )
+            for container in containers
+        ]
+
     def _filter_env_vars(self, env_vars: list[dict]) -> list[dict]:
         """Filter out sensitive environment variables."""
         filtered_vars = []
         for env_var in env_vars:
             # Skip if the variable name contains any sensitive keywords
-            if any(
-                sensitive_key.lower() in env_var.get("name", "").lower()
-                for sensitive_key in self.config.sensitive_env_vars
-            ):
+            if self._is_sensitive_env_var(env_var.get("name", "")):
                 # Replace the value with a placeholder
                 env_var = env_var.copy()
                 if "value" in env_var:
@@ -170,37 +366,68 @@ class DataSanitizer(metaclass=SingletonMeta):
 
     def _sanitize_dict(self, data: dict) -> dict:
         """Recursively sanitize a dictionary by looking for sensitive data patterns."""
-        result = data.copy()
-
-        for key, value in data.items():
-            # Check if the key should be excluded from sanitization
-            if (
-                self.config.sensitive_field_to_exclude
-                and key in self.config.sensitive_field_to_exclude
-            ):
-                result[key] = value
-            # Check if the key indicates sensitive data
-            elif any(
-                sensitive in key.lower()
-                for sensitive in self.config.sensitive_field_names
-            ):
-                result[key] = REDACTED_VALUE
-            elif isinstance(value, dict):
-                result[key] = self._sanitize_dict(value)
-            elif isinstance(value, list):
-                result[key] = [
-                    (self._sanitize_dict(item) if isinstance(item, dict) else item)
-                    for item in value
-                ]
-            else:
-                result[key] = value
+        return self._sanitize_mapping(data, redact_keys=True)
 
-        return result
+    def _is_sensitive_key(self, key: str) -> bool:
+        """Check if the key indicates sensitive data and is not excluded from sanitization."""
+        if key in self._excluded_field_names:
+            return False
+        return self._is_sensitive_field_name(key)
 
-    def _clean_personal_information(self, data: dict) -> dict:
-        """Cleans personal information from a string."""
-        data_str = json.dumps(data)
+    def _sanitize_value(self, value: Any, redact_keys: bool, scrub: bool = True) -> Any:
+        """Remove personal information from the strings of the value if scrub is enabled and
+        redact the values of sensitive keys if redact_keys is enabled.
+        Returns the value itself if nothing changes.
+        """
+        if isinstance(value, str):
+            return self._clean_string(value) if scrub else value
+        if isinstance(value, dict):
+            return self._sanitize_mapping(value, redact_keys, scrub)
+        if isinstance(value, list):
+            return self._sanitize_sequence(value, redact_keys, scrub)
+        return value
+
+    def _sanitize_mapping(
+        self, data: dict, redact_keys: bool, scrub: bool = True
+    ) -> dict:
+        """Sanitize the values of a dictionary, copying it only if a value changes.
+        Values of PII safe fields are not scrubbed."""
+        if not redact_keys and not scrub:
+            return data
+        result = None
+        for key, item in data.items():
+            if redact_keys and isinstance(key, str) and self._is_sensitive_key(key):
+                new_item = REDACTED_VALUE
+            else:
+                new_item = self._sanitize_value(
+                    item, redact_keys, scrub and key not in self._pii_safe_field_names
+                )
+            if new_item is not item:
+                if result is None:
+                    result = data.copy()
+                result[key] = new_item
+        return data if result is None else result
 
-        sanitized_data_str = self.scrubber.clean(data_str)
+    def _sanitize_sequence(
+        self, items: list, redact_keys: bool, scrub: bool = True
+    ) -> list:
+        """Sanitize the items of a list, copying it only if an item changes."""
+        result = None
+        for index, item in enumerate(items):
+            new_item = self._sanitize_value(item, redact_keys, scrub)
+            if new_item is not item:
+                if result is None:
+                    result = list(items)
+                result[index] = new_item
+        return items if result is None else result
 
-        return dict(json.loads(sanitized_data_str))
+    def _clean_string(self, text: str) -> str:
+        """Clean personal information from a string, reusing the result for short strings."""
+        if len(text) <= CLEANED_STRINGS_CACHE_MAX_LENGTH:
+            return self._clean_short_string(text)
+        return self._clean_personal_information(text)
+
+    def _clean_personal_information(self, text: str) -> str:
+        """Cleans personal information from a string."""
+        cleaned_text = self.scrubber.clean(text)
+        return text if cleaned_text == text else cleaned_text
@@ -0,0 +1,155 @@
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from utils.config import FieldProjectionConfig, FieldProjectionProfile
+
+# Fields which are noise for the LLM in objects of all kinds.
+DEFAULT_FIELD_PROJECTION_PROFILE = FieldProjectionProfile(
+    exclude_fields=[
+        "/metadata/managedFields",
+        "/metadata/annotations/kubectl.kubernetes.io~1last-applied-configuration",
+    ],
+    max_list_lengths={
+        "/status/conditions": 10,
+    },
+)
+
+TRUNCATED_SUFFIX = "...[TRUNCATED]"
+
+LIST_KIND_SUFFIX = "List"
+
+
+class IFieldProjector(Protocol):
+    """A protocol for a field projector."""
+
+    def project(
+        self, data: dict | list[dict], kind: str | None = None
+    ) -> dict | list[dict]:
+        """Remove or condense the configured fields of K8s objects."""
+        ...
+
+
+@dataclass
+class _Rule:
+    """Projection rules of a field and its children, compiled from the JSON pointers."""
+
+    exclude: bool = False
+    max_items: int | None = None
+    children: dict[str, "_Rule"] = field(default_factory=dict)
+
+
+def _parse_pointer(pointer: str) -> list[str]:
+    """Split a JSON pointer into the unescaped field names."""
+    if not pointer.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer: {pointer}")
+    return [
+        name.replace("~1", "/").replace("~0", "~") for name in pointer[1:].split("/")
+    ]
+
+
+def _compile_rules(profiles: list[FieldProjectionProfile]) -> _Rule:
+    """Compile the fields of the profiles into a tree of rules."""
+    root = _Rule()
+    for profile in profiles:
+        for pointer in profile.exclude_fields:
+            node = root
+            for name in _parse_pointer(pointer):
+                node = node.children.setdefault(name, _Rule())
+            node.exclude = True
+        for pointer, max_items in profile.max_list_lengths.items():
+            node = root
+            for name in _parse_pointer(pointer):
+                node = node.children.setdefault(name, _Rule())
+            node.max_items = max_items
+    return root
+
+
+class FieldProjector:
+    """Implementation of the field projector.
+
+    All rules of an object are applied in one pass over the object. Fields without
+    rules are not copied, unless all strings are condensed.
+    """
+
+    def __init__(self, config: FieldProjectionConfig | None = None):
+        self.config = config or FieldProjectionConfig(
+            default_profile=DEFAULT_FIELD_PROJECTION_PROFILE
+        )
+        # Compiled rules and maximum string length by kind.
+        self._rules: dict[str, tuple[_Rule, int | None]] = {}
+
+    def project(
+        self, data: dict | list[dict], kind: str | None = None
+    ) -> dict | list[dict]:
+        """Remove or condense the configured fields of K8s objects.
+        The kind is used for objects without a kind, e.g. the items of a list response.
+        """
+        if isinstance(data, list):
+            return [self._project_object(obj, kind) for obj in data]
+        elif isinstance(data, dict):
+            return self._project_object(data, kind)
+        raise ValueError("Data must be a list or a dictionary.")
+
+    def _project_object(self, obj: dict, kind: str | None) -> dict:
+        """Project a single object."""
+        if not isinstance(obj, dict):
+            return obj
+
+        kind = obj.get("kind") or kind or ""
+        if kind.endswith(LIST_KIND_SUFFIX) and isinstance(obj.get("items"), list):
+            result = obj.copy()
+            item_kind = kind.removesuffix(LIST_KIND_SUFFIX)
+            result["items"] = [
+                self._project_object(item, item_kind) for item in obj["items"]
+            ]
+            return result
+
+        rule, max_string_length = self._get_rules(kind)
+        return dict(self._apply(obj, rule, max_string_length))
+
+    def _get_rules(self, kind: str) -> tuple[_Rule, int | None]:
+        """Get the compiled rules of the default profile and the profile of the kind."""
+        if kind not in self._rules:
+            profiles = [
+                profile
+                for profile in (
+                    self.config.default_profile,
+                    self.config.kind_profiles.get(kind),
+                )
+                if profile is not None
+            ]
+            max_string_length = None
+            for profile in profiles:
+                if profile.max_string_length is not None:
+                    max_string_length = profile.max_string_length
+            self._rules[kind] = (_compile_rules(profiles), max_string_length)
+        return self._rules[kind]
+
+    def _apply(
+        self, value: Any, rule: _Rule | None, max_string_length: int | None
+    ) -> Any:
+        """Apply the rule to the value and its children."""
+        if isinstance(value, dict):
+            if rule is None and max_string_length is None:
+                return value
+            result = {}
+            for key, item in value.items():
+                child = rule.children.get(key) if rule is not None else None
+                if child is not None and child.exclude:
+                    continue
+                result[key] = self._apply(item, child, max_string_length)
+            return result
+        if isinstance(value, list):
+            if rule is not None and rule.max_items is not None:
+                value = value[-rule.max_items :] if rule.max_items > 0 else []
+            if (rule is None or not rule.children) and max_string_length is None:
+                return value
+            # Lists are transparent, so the items get the rule of the list.
+            return [self._apply(item, rule, max_string_length) for item in value]
+        if (
+            isinstance(value, str)
+            and max_string_length is not None
+            and len(value) > max_string_length
+        ):
+            return value[:max_string_length] + TRUNCATED_SUFFIX
+        return value
@@ -1,18 +1,41 @@
+import asyncio
 import base64
 import copy
-import os
-import tempfile
+import hashlib
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable
 from http import HTTPStatus
-from typing import Protocol, cast, runtime_checkable
+from typing import Any, Protocol, TypeVar, cast, runtime_checkable
 
-import requests
-from kubernetes import client, dynamic
+import httpx
 
 from services.data_sanitizer import IDataSanitizer
+from services.field_projector import IFieldProjector
+from services.k8s_cache import K8sResponseCache, get_resource_version
+from services.k8s_discovery import K8sDiscoveryCache
+from services.pod_logs import PodLogCompactor, PodLogTail
 from utils import logging
+from utils.settings import (
+    K8S_CLIENT_CACHE_SIZE,
+    K8S_CLIENT_CACHE_TTL_SECONDS,
+    K8S_CONNECTION_POOL_SIZE,
+    K8S_LIST_MAX_BYTES,
+    K8S_LIST_MAX_ITEMS,
+    K8S_LIST_PAGE_SIZE,
+    K8S_RESPONSE_CACHE_ENABLED,
+)
 
 logger = logging.get_logger(__name__)
 
+T = TypeVar("T")
+
+# Field selectors evaluated by the API server.
+NOT_RUNNING_PODS_FIELD_SELECTOR = "status.phase!=Running"
+WARNING_EVENTS_FIELD_SELECTOR = "type=Warning"
+
 
 @runtime_checkable
 class IK8sClient(Protocol):
@@ -22,15 +45,23 @@ class IK8sClient(Protocol):
         """Dump the model without any confidential data."""
         ...
 
-    def execute_get_api_request(self, uri: str) -> dict | list[dict]:
+    async def execute_get_api_request(self, uri: str) -> dict | list[dict]:
         """Execute a GET request to the Kubernetes API."""
         ...
 
-    def list_resources(self, api_version: str, kind: str, namespace: str) -> list:
-        """List resources of a specific kind in a namespace."""
+    async def list_resources(
+        self, api_version: str, kind: str, namespace: str, field_selector: str = ""
+    ) -> list:
+        """List resources of a specific kind in a namespace, filtered by an optional field selector."""
+        ...
+
+    def iter_resources(
+        self, api_version: str, kind: str, namespace: str, field_selector: str = ""
+    ) -> AsyncIterator[dict]:
+        """Iterate over resources of a specific kind in a namespace, fetched page by page."""
         ...
 
-    def get_resource(
+    async def get_resource(
         self,
         api_version: str,
         kind: str,
@@ -40,7 +71,7 @@ class IK8sClient(Protocol):
         """Get a specific resource by name in a namespace."""
         ...
 
-    def describe_resource(
+    async def describe_resource(
         self,
         api_version: str,
         kind: str,
@@ -50,35 +81,39 @@ class IK8sClient(Protocol):
         """Describe a specific resource by name in a namespace. This includes the resource and its events."""
         ...
 
-    def list_not_running_pods(self, namespace: str) -> list[dict]:
+    async def list_not_running_pods(self, namespace: str) -> list[dict]:
         """List all pods that are not in the Running phase"""
         ...
 
-    def list_nodes_metrics(self) -> list[dict]:
+    async def list_nodes_metrics(self) -> list[dict]:
         """List all nodes metrics."""
         ...
 
-    def list_k8s_events(self, namespace: str) -> list[dict]:
-        """List all Kubernetes events."""
+    async def list_k8s_events(
+        self, namespace: str, field_selector: str = ""
+    ) -> list[dict]:
+        """List all Kubernetes events, filtered by an optional field selector."""
         ...
 
-    def list_k8s_warning_events(self, namespace: str) -> list[dict]:
+    async def list_k8s_warning_events(self, namespace: str) -> list[dict]:
         """List all Kubernetes warning events."""
         ...
 
-    def list_k8s_events_for_resource(
+    async def list_k8s_events_for_resource(
         self, kind: str, name: str, namespace: str
     ) -> list[dict]:
         """List all Kubernetes events for a specific resource."""
         ...
 
-    def fetch_pod_logs(
+    async def fetch_pod_logs(
         self,
         name: str,
         namespace: str,
         container_name: str,
         is_terminated: bool,
         tail_limit: int,
+        limit_bytes: int | None = None,
+        since_seconds: int | None = None,
     ) -> list[str]:
         """Fetch logs of Kubernetes Pod."""
         ...
@@ -90,9 +125,11 @@ class K8sClient:
     api_server: str
     user_token: str
     certificate_authority_data: str
-    ca_temp_filename: str = ""
-    dynamic_client: dynamic.DynamicClient
+    discovery_cache: K8sDiscoveryCache
+    http_client: httpx.AsyncClient
     data_sanitizer: IDataSanitizer | None
+    field_projector: IFieldProjector | None = None
+    response_cache: K8sResponseCache | None = None
 
     def __init__(
         self,
@@ -100,29 +137,42 @@ class K8sClient:
         user_token: str,
         certificate_authority_data: str,
         data_sanitizer: IDataSanitizer | None = None,
+        connection_pool_size: int = K8S_CONNECTION_POOL_SIZE,
+        discovery_cache: K8sDiscoveryCache | None = None,
+        field_projector: IFieldProjector | None = None,
+        response_cache: K8sResponseCache | None = None,
+        response_cache_enabled: bool = K8S_RESPONSE_CACHE_ENABLED,
     ):
-        """Initialize the K8sClient object."""
+        """Initialize the K8sClient object.
+
+        The client keeps its HTTP connections to the API server alive,
+        so it should be reused for multiple requests, see K8sClientRegistry.
+        All requests are sent asynchronously, so they do not block the event loop.
+        The API paths of resource kinds are looked up in the discovery cache,
+        which should be shared by all clients. The field projector removes noise like
+        managedFields from the returned objects before they are sanitized.
+        Identical requests are answered from a short-lived response cache of the client,
+        unless `response_cache_enabled` is False.
+        """
         self.api_server = api_server
         self.user_token = user_token
         self.certificate_authority_data = certificate_authority_data
+        # An empty cache is falsy, so compare with None.
+        self.discovery_cache = (
+            K8sDiscoveryCache() if discovery_cache is None else discovery_cache
+        )
 
-        # Write the certificate authority data to a temporary file.
-        ca_file = tempfile.NamedTemporaryFile(delete=False)
-        ca_file.write(self._get_decoded_ca_data())
-        ca_file.close()
-        self.ca_temp_filename = ca_file.name
-
-        self.dynamic_client = self._create_dynamic_client()
+        self.http_client = self._create_http_client(connection_pool_size)
 
         self.data_sanitizer = data_sanitizer
-
-    def __del__(self):
-        """Destructor to remove the temporary file containing certificate authority data."""
-        if self.ca_temp_filename != "":
-            try:
-                os.remove(self.ca_temp_filename)
-            except FileNotFoundError:
-                return
+        self.field_projector = field_projector
+        if not response_cache_enabled:
+            self.response_cache = None
+        else:
+            # An empty cache is falsy, so compare with None.
+            self.response_cache = (
+                K8sResponseCache() if response_cache is None else response_cache
+            )
 
     def model_dump(self) -> None:
         """Dump the model. It should not return any critical information because it is called by checkpointer
@@ -133,17 +183,22 @@ class K8sClient:
         """Decode the certificate authority data."""
         return base64.b64decode(self.certificate_authority_data)
 
-    def _create_dynamic_client(self) -> dynamic.DynamicClient:
-        """Create a dynamic client for the K8s API."""
-        # Create configuration object for client.
-        conf = client.Configuration()
-        conf.host = self.api_server
-        conf.api_key["authorization"] = self.user_token
-        conf.api_key_prefix["authorization"] = "Bearer"
-        conf.verify_ssl = True
-        conf.ssl_ca_cert = self.ca_temp_filename
+    def _create_http_client(self, connection_pool_size: int) -> httpx.AsyncClient:
+        """Create an async HTTP client which keeps the connections to the API server alive."""
+        ssl_context = ssl.create_default_context(
+            cadata=self._get_decoded_ca_data().decode()
+        )
+        return httpx.AsyncClient(
+            verify=ssl_context,
+            limits=httpx.Limits(
+                max_connections=connection_pool_size,
+                max_keepalive_connections=connection_pool_size,
+            ),
+        )
 
-        return dynamic.DynamicClient(client.api_client.ApiClient(configuration=conf))
+    async def aclose(self) -> None:
+        """Close the connections to the API server."""
+        await self.http_client.aclose()
 
     def _get_auth_headers(self) -> dict:
         """Get the authentication headers for the Kubernetes API request."""
@@ -153,37 +208,183 @@ class K8sClient:
             "Content-Type": "application/json",
         }
 
-    def execute_get_api_request(self, uri: str) -> dict | list[dict]:
-        """Execute a GET request to the Kubernetes API."""
-        response = requests.get(
+    async def _get(
+        self, uri: str, params: dict[str, str] | None = None
+    ) -> httpx.Response:
+        """Send a GET request to the Kubernetes API."""
+        return await self.http_client.get(
             url=f"{self.api_server}/{uri.lstrip('/')}",
             headers=self._get_auth_headers(),
-            verify=self.ca_temp_filename,
+            params=params,
         )
 
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> dict | list[dict]:
+        """Parse the JSON response of a GET request to the Kubernetes API."""
         if response.status_code != HTTPStatus.OK:
             raise ValueError(
                 f"Failed to execute GET request to the Kubernetes API. Error: {response.text}"
             )
+        return response.json()  # type: ignore
+
+    async def _get_json(self, uri: str) -> dict | list[dict]:
+        """Execute a GET request to the Kubernetes API without sanitizing the response."""
+        return self._parse_response(await self._get(uri))
+
+    async def _get_resource_response(
+        self,
+        api_version: str,
+        kind: str,
+        name: str = "",
+        namespace: str = "",
+        params: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        """Send a GET request for the resources of a kind, or for a resource if a name is given."""
+        resource = await self.discovery_cache.get_resource(
+            self.api_server, api_version, kind, self._get_json
+        )
+        response = await self._get(
+            resource.path(name=name, namespace=namespace), params=params
+        )
+        if response.status_code == HTTPStatus.NOT_FOUND:
+            # The resource kind may have been removed or moved to another API path.
+            self.discovery_cache.invalidate(self.api_server, api_version)
+        return response
 
+    async def _get_resource_json(
+        self,
+        api_version: str,
+        kind: str,
+        name: str = "",
+        namespace: str = "",
+        params: dict[str, str] | None = None,
+    ) -> dict | list[dict]:
+        """Get the resources of a kind, or a resource if a name is given, without sanitizing them."""
+        return self._parse_response(
+            await self._get_resource_response(
+                api_version, kind, name, namespace, params
+            )
+        )
+
+    def _project_and_sanitize(
+        self, data: dict | list[dict], kind: str | None = None
+    ) -> dict | list[dict]:
+        """Project the fields of the data, then sanitize it.
+        Projecting first leaves less data to sanitize."""
+        if self.field_projector:
+            data = self.field_projector.project(data, kind)
         if self.data_sanitizer:
-            return self.data_sanitizer.sanitize(response.json())
-        return response.json()  # type: ignore
+            data = self.data_sanitizer.sanitize(data)
+        return data
+
+    async def _cached(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        process: Callable[[Any], T],
+        resource_version: Callable[[Any], str | None] = get_resource_version,
+    ) -> T:
+        """Get the processed response from the response cache, if the client has one.
+        The response is processed in a worker thread, so sanitizing large lists does not
+        block the event loop."""
+        if self.response_cache is None:
+            return await asyncio.to_thread(process, await fetch())
+        return await self.response_cache.get(key, fetch, process, resource_version)
+
+    async def execute_get_api_request(self, uri: str) -> dict | list[dict]:
+        """Execute a GET request to the Kubernetes API."""
+        return await self._cached(
+            ("get", uri),
+            lambda: self._get_json(uri),
+            self._project_and_sanitize,
+        )
 
-    def list_resources(self, api_version: str, kind: str, namespace: str) -> list[dict]:
+    async def list_resources(
+        self, api_version: str, kind: str, namespace: str, field_selector: str = ""
+    ) -> list[dict]:
         """List resources of a specific kind in a namespace.
-        Provide empty string for namespace to list resources in all namespaces."""
-        result = self.dynamic_client.resources.get(
-            api_version=api_version, kind=kind
-        ).get(namespace=namespace)
+        Provide empty string for namespace to list resources in all namespaces.
+        The field selector, e.g. "status.phase!=Running", is evaluated by the API server.
+        The list is truncated to the item and byte limits of iter_resources."""
+        return [
+            item
+            async for item in self.iter_resources(
+                api_version, kind, namespace, field_selector
+            )
+        ]
 
-        # convert objects to dictionaries.
-        items = [item.to_dict() for item in result.items]
-        if self.data_sanitizer:
-            return self.data_sanitizer.sanitize(items)  # type: ignore
-        return items
+    async def iter_resources(
+        self,
+        api_version: str,
+        kind: str,
+        namespace: str,
+        field_selector: str = "",
+        page_size: int = K8S_LIST_PAGE_SIZE,
+        max_items: int = K8S_LIST_MAX_ITEMS,
+        max_bytes: int = K8S_LIST_MAX_BYTES,
+    ) -> AsyncIterator[dict]:
+        """Iterate over resources of a specific kind in a namespace.
+        Provide empty string for namespace to iterate over resources in all namespaces.
+
+        The resources are fetched in pages of `page_size` items, and each page is
+        projected and sanitized on its own, so only one page is held in memory and callers can stop
+        early. The iteration stops after `max_items` items or `max_bytes` bytes of
+        responses."""
+        params = {"limit": str(page_size)}
+        if field_selector:
+            params["fieldSelector"] = field_selector
+        item_count = 0
+        byte_count = 0
+        while True:
+            page_items, continue_token, page_bytes = await self._get_page(
+                api_version, kind, namespace, dict(params)
+            )
+            byte_count += page_bytes
+
+            for item in page_items:
+                if item_count >= max_items:
+                    logger.warning(
+                        f"Listing {kind} resources was truncated after {max_items} items."
+                    )
+                    return
+                item_count += 1
+                yield item
+
+            if not continue_token:
+                return
+            if byte_count >= max_bytes:
+                logger.warning(
+                    f"Listing {kind} resources was truncated after {byte_count} bytes."
+                )
+                return
+            params["continue"] = continue_token
+
+    async def _get_page(
+        self, api_version: str, kind: str, namespace: str, params: dict[str, str]
+    ) -> tuple[list[dict], str, int]:
+        """Get a page of resources with the continue token and byte size of the response."""
+
+        async def fetch() -> tuple[dict, int]:
+            response = await self._get_resource_response(
+                api_version, kind, namespace=namespace, params=params
+            )
+            return cast(dict, self._parse_response(response)), len(response.content)
 
-    def get_resource(
+        def process(page: tuple[dict, int]) -> tuple[list[dict], str, int]:
+            result, size = page
+            items = list[dict](
+                self._project_and_sanitize(list[dict](result["items"]), kind)
+            )
+            return items, result.get("metadata", {}).get("continue", ""), size
+
+        return await self._cached(
+            ("list", api_version, kind, namespace, tuple(sorted(params.items()))),
+            fetch,
+            process,
+            resource_version=lambda page: get_resource_version(page[0]),
+        )
+
+    async def get_resource(
         self,
         api_version: str,
         kind: str,
@@ -191,16 +392,13 @@ class K8sClient:
         namespace: str,
     ) -> dict:
         """Get a specific resource by name in a namespace."""
-        resource = (
-            self.dynamic_client.resources.get(api_version=api_version, kind=kind)
-            .get(name=name, namespace=namespace)
-            .to_dict()
+        return await self._cached(
+            ("resource", api_version, kind, name, namespace),
+            lambda: self._get_resource_json(api_version, kind, name, namespace),
+            lambda resource: cast(dict, self._project_and_sanitize(resource, kind)),
         )
-        if self.data_sanitizer:
-            return cast(dict, self.data_sanitizer.sanitize(resource))
-        return resource  # type: ignore
 
-    def describe_resource(
+    async def describe_resource(
         self,
         api_version: str,
         kind: str,
@@ -208,110 +406,225 @@ class K8sClient:
         namespace: str,
     ) -> dict:
         """Describe a specific resource by name in a namespace. This includes the resource and its events."""
-        resource = self.get_resource(api_version, kind, name, namespace)
+        # get the resource and its events concurrently.
+        resource, events = await asyncio.gather(
+            self.get_resource(api_version, kind, name, namespace),
+            self.list_k8s_events_for_resource(kind, name, namespace),
+        )
 
         # clone the object because we cannot modify the original object.
-        result = copy.deepcopy(resource)
+        result: dict = copy.deepcopy(resource)
 
-        # get events for the resource.
-        result["events"] = self.list_k8s_events_for_resource(kind, name, namespace)
-        for event in result["events"]:
-            del event["involvedObject"]
+        # remove the involved object, without modifying the cached events.
+        result["events"] = [
+            {key: value for key, value in event.items() if key != "involvedObject"}
+            for event in events
+        ]
 
         if self.data_sanitizer:
-            return self.data_sanitizer.sanitize(result)  # type: ignore
+            # sanitize in a worker thread, as described resources with events can be large.
+            return cast(
+                dict, await asyncio.to_thread(self.data_sanitizer.sanitize, result)
+            )
         return result
 
-    def list_not_running_pods(self, namespace: str) -> list[dict]:
+    async def list_not_running_pods(self, namespace: str) -> list[dict]:
         """List all pods that are not in the Running phase.
         Provide empty string for namespace to list all pods."""
-        all_pods = self.list_resources(
+        return await self.list_resources(
             api_version="v1",
             kind="Pod",
             namespace=namespace,
+            field_selector=NOT_RUNNING_PODS_FIELD_SELECTOR,
         )
-        # filter pods by status and convert object to dictionary.
-        items = []
-        for pod in all_pods:
-            if (
-                "status" not in pod
-                or "phase" not in pod["status"]
-                or pod["status"]["phase"] != "Running"
-            ):
-                items.append(pod)
-        return items
-
-    def list_nodes_metrics(self) -> list[dict]:
+
+    async def list_nodes_metrics(self) -> list[dict]:
         """List all nodes metrics."""
-        result = self.execute_get_api_request("apis/metrics.k8s.io/v1beta1/nodes")
+        result = await self.execute_get_api_request("apis/metrics.k8s.io/v1beta1/nodes")
         return list[dict](result["items"])  # type: ignore
 
-    def list_k8s_events(self, namespace: str) -> list[dict]:
+    async def list_k8s_events(
+        self, namespace: str, field_selector: str = ""
+    ) -> list[dict]:
         """List all Kubernetes events. Provide empty string for namespace to list all events."""
-
-        result = self.dynamic_client.resources.get(api_version="v1", kind="Event").get(
-            namespace=namespace
+        return await self.list_resources(
+            api_version="v1",
+            kind="Event",
+            namespace=namespace,
+            field_selector=field_selector,
         )
 
-        # convert objects to dictionaries and return.
-        events = [event.to_dict() for event in result.items]
-        if self.data_sanitizer:
-            return list[dict](self.data_sanitizer.sanitize(events))
-        return events
-
-    def list_k8s_warning_events(self, namespace: str) -> list[dict]:
+    async def list_k8s_warning_events(self, namespace: str) -> list[dict]:
         """List all Kubernetes warning events. Provide empty string for namespace to list all warning events."""
-        return [
-            event
-            for event in self.list_k8s_events(namespace)
-            if event["type"] == "Warning"
-        ]
+        return await self.list_k8s_events(
+            namespace, field_selector=WARNING_EVENTS_FIELD_SELECTOR
+        )
 
-    def list_k8s_events_for_resource(
+    async def list_k8s_events_for_resource(
         self, kind: str, name: str, namespace: str
     ) -> list[dict]:
         """List all Kubernetes events for a specific resource. Provide empty string for namespace to list all events."""
-        events = self.list_k8s_events(namespace)
-        result = []
-        for event in events:
-            if (
-                event["involvedObject"]["kind"] == kind
-                and event["involvedObject"]["name"] == name
-            ):
-                result.append(event)
-
-        return result
+        return await self.list_k8s_events(
+            namespace,
+            field_selector=f"involvedObject.kind={kind},involvedObject.name={name}",
+        )
 
-    def fetch_pod_logs(
+    async def fetch_pod_logs(
         self,
         name: str,
         namespace: str,
         container_name: str,
         is_terminated: bool,
         tail_limit: int,
+        limit_bytes: int | None = None,
+        since_seconds: int | None = None,
     ) -> list[str]:
-        """Fetch logs of Kubernetes Pod. Provide is_terminated as true if the pod is not running."""
-        uri = (
-            f"api/v1/namespaces/{namespace}/pods/{name}/log"
-            f"?container={container_name}"
-            f"&tailLines={tail_limit}"
-        )
-
+        """Fetch logs of Kubernetes Pod. Provide is_terminated as true if the pod is not running.
+        The logs are limited by the API server to the last `tail_limit` lines and to the last
+        `since_seconds` seconds. They are streamed, and only the newest lines up to `limit_bytes`
+        bytes are kept. Repeated lines and stack traces are collapsed with a count."""
+        params = {"container": container_name, "tailLines": str(tail_limit)}
         if is_terminated:
-            uri += "&previous=true"
-
-        response = requests.get(
-            url=f"{self.api_server}/{uri.lstrip('/')}",
+            params["previous"] = "true"
+        if since_seconds is not None:
+            params["sinceSeconds"] = str(since_seconds)
+
+        tail = PodLogTail(limit_bytes)
+        async with self.http_client.stream(
+            "GET",
+            url=f"{self.api_server}/api/v1/namespaces/{namespace}/pods/{name}/log",
             headers=self._get_auth_headers(),
-            verify=self.ca_temp_filename,
-        )
-        if response.status_code != HTTPStatus.OK:
-            raise ValueError(
-                f"Failed to fetch logs for pod {name} in namespace {namespace} "
-                f"with container {container_name}. Error: {response.text}"
-            )
+            params=params,
+        ) as response:
+            if response.status_code != HTTPStatus.OK:
+                await response.aread()
+                raise ValueError(
+                    f"Failed to fetch logs for pod {name} in namespace {namespace} "
+                    f"with container {container_name}. Error: {response.text}"
+                )
+            async for line in response.aiter_lines():
+                tail.add(line)
+
+        compactor = PodLogCompactor()
+        for line in tail.lines():
+            compactor.add(line)
+        return compactor.lines()
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+class K8sClientRegistry:
+    """Registry of K8sClients reused across requests for the same cluster and credentials.
+
+    Reusing a client keeps its connections to the API server alive, so follow-up requests
+    do not pay for new TCP and TLS handshakes. Clients are keyed by the API server and
+    hashes of the user token and certificate authority data, so no credentials are kept
+    as keys. The registry holds at most `max_size` clients and evicts the least recently
+    used one first. Clients are replaced after `ttl` seconds.
 
-        logs = []
-        for line in response.iter_lines():
-            logs.append(str(line))
-        return logs
+    Every client got from the registry must be released with `release_client` once the
+    request is done. Evicted and replaced clients are closed as soon as no request uses
+    them anymore, so their connections are not leaked.
+    """
+
+    def __init__(
+        self,
+        data_sanitizer: IDataSanitizer | None = None,
+        max_size: int = K8S_CLIENT_CACHE_SIZE,
+        ttl: float = K8S_CLIENT_CACHE_TTL_SECONDS,
+        discovery_cache: K8sDiscoveryCache | None = None,
+        field_projector: IFieldProjector | None = None,
+    ):
+        self.data_sanitizer = data_sanitizer
+        self.field_projector = field_projector
+        # Shared by all clients, so a cluster is not discovered again for other users.
+        self.discovery_cache = (
+            K8sDiscoveryCache() if discovery_cache is None else discovery_cache
+        )
+        self.max_size = max_size
+        self.ttl = ttl
+        # Maps the client key to the creation time and the client.
+        self._clients: OrderedDict[tuple[str, str, str], tuple[float, K8sClient]] = (
+            OrderedDict()
+        )
+        # Number of requests using a client, and clients to close once no request uses them.
+        self._usages: dict[K8sClient, int] = {}
+        self._retired_clients: set[K8sClient] = set()
+        self._closing_tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def get_client(
+        self, api_server: str, user_token: str, certificate_authority_data: str
+    ) -> K8sClient:
+        """Get the client for the cluster and credentials, creating it if needed.
+        Release the client with `release_client` once the request does not use it anymore.
+        """
+        key = (api_server, _hash(user_token), _hash(certificate_authority_data))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._clients.move_to_end(key)
+                return self._use(entry[1])
+
+        # Create the client outside the lock, as it loads the certificate authority data.
+        k8s_client = K8sClient(
+            api_server=api_server,
+            user_token=user_token,
+            certificate_authority_data=certificate_authority_data,
+            data_sanitizer=self.data_sanitizer,
+            discovery_cache=self.discovery_cache,
+            field_projector=self.field_projector,
+        )
+        with self._lock:
+            # Replace an expired client or a client created concurrently for the same key.
+            replaced_entry = self._clients.pop(key, None)
+            retired_clients = [] if replaced_entry is None else [replaced_entry[1]]
+            self._clients[key] = (now, k8s_client)
+            while len(self._clients) > self.max_size:
+                retired_clients.append(self._clients.popitem(last=False)[1][1])
+            idle_clients = [
+                client for client in retired_clients if not self._retire(client)
+            ]
+            self._use(k8s_client)
+        self._close_clients(idle_clients)
+        return k8s_client
+
+    def release_client(self, k8s_client: K8sClient) -> None:
+        """Release a client got from `get_client`, closing it if it was evicted or replaced
+        and no other request uses it."""
+        with self._lock:
+            usages = self._usages.pop(k8s_client, 0) - 1
+            if usages > 0:
+                self._usages[k8s_client] = usages
+                return
+            if k8s_client not in self._retired_clients:
+                return
+            self._retired_clients.remove(k8s_client)
+        self._close_clients([k8s_client])
+
+    def _use(self, k8s_client: K8sClient) -> K8sClient:
+        """Count a request using the client."""
+        self._usages[k8s_client] = self._usages.get(k8s_client, 0) + 1
+        return k8s_client
+
+    def _retire(self, k8s_client: K8sClient) -> bool:
+        """Keep a client removed from the registry until no request uses it anymore.
+        Returns False if it is not used, so it can be closed right away."""
+        if k8s_client not in self._usages:
+            return False
+        self._retired_clients.add(k8s_client)
+        return True
+
+    def _close_clients(self, k8s_clients: list[K8sClient]) -> None:
+        """Close the clients in the background, so closing does not delay the request."""
+        for k8s_client in k8s_clients:
+            task = asyncio.get_running_loop().create_task(k8s_client.aclose())
+            # Keep a reference, so the task is not garbage collected before it is done.
+            self._closing_tasks.add(task)
+            task.add_done_callback(self._closing_tasks.discard)
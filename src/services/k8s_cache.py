@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from utils.settings import K8S_RESPONSE_CACHE_SIZE, K8S_RESPONSE_CACHE_TTL_SECONDS
+
+T = TypeVar("T")
+
+
+def get_resource_version(data: Any) -> str | None:
+    """Get the resourceVersion of a K8s object or list response, if any."""
+    if isinstance(data, dict):
+        metadata = data.get("metadata")
+        if isinstance(metadata, dict):
+            return metadata.get("resourceVersion") or None
+    return None
+
+
+@dataclass
+class _Entry:
+    expires_at: float
+    resource_version: str | None
+    value: Any
+
+
+class K8sResponseCache:
+    """Short-lived cache of the processed responses of K8s API GET requests.
+
+    Identical requests within `ttl` seconds are answered from the cache, and identical
+    concurrent requests are coalesced into one request to the API server. Expired
+    entries are kept for revalidation: if the response of the next request has the
+    same resourceVersion, the cached value is reused instead of processing the response
+    again. Responses are processed in a worker thread, so processing large responses does
+    not block the event loop. The cached values are shared, so callers must not modify them.
+    """
+
+    def __init__(
+        self,
+        ttl: float = K8S_RESPONSE_CACHE_TTL_SECONDS,
+        max_size: int = K8S_RESPONSE_CACHE_SIZE,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        process: Callable[[Any], T],
+        resource_version: Callable[[Any], str | None] = get_resource_version,
+    ) -> T:
+        """Get the cached value of the key, or fetch and process the response.
+
+        Args:
+            key: Identifies the request and the processing of its response.
+            fetch: Sends the request and returns its response.
+            process: Converts the response to the cached value, called in a worker thread.
+            resource_version: Gets the resourceVersion of a response.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry.expires_at:
+            self._entries.move_to_end(key)
+            return entry.value  # type: ignore
+
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._load(key, fetch, process, resource_version)
+            )
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._complete(key, done))
+        # The request keeps running for the other callers if a caller is cancelled.
+        return await asyncio.shield(future)
+
+    def _complete(self, key: Hashable, future: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        if not future.cancelled():
+            # Mark the exception as retrieved, in case all callers were cancelled.
+            future.exception()
+
+    async def _load(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        process: Callable[[Any], T],
+        resource_version: Callable[[Any], str | None],
+    ) -> T:
+        response = await fetch()
+        version = resource_version(response)
+        stale_entry = self._entries.get(key)
+        if (
+            version is not None
+            and stale_entry is not None
+            and stale_entry.resource_version == version
+        ):
+            value = stale_entry.value
+        else:
+            value = await asyncio.to_thread(process, response)
+
+        self._entries[key] = _Entry(time.monotonic() + self.ttl, version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return value
@@ -0,0 +1,108 @@
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from utils.settings import K8S_DISCOVERY_CACHE_TTL_SECONDS
+
+
+@dataclass(frozen=True)
+class APIResource:
+    """Kind of resources served by the Kubernetes API."""
+
+    group_version: str
+    kind: str
+    # Plural name of the resource kind used in the API paths, e.g. "pods".
+    name: str
+    namespaced: bool
+
+    def path(self, name: str = "", namespace: str = "") -> str:
+        """Get the API path of the resources, or of a resource if a name is given.
+        Provide empty string for namespace to get the path of the resources in all namespaces.
+        """
+        prefix = "api" if "/" not in self.group_version else "apis"
+        path = f"/{prefix}/{self.group_version}"
+        if self.namespaced and namespace:
+            path += f"/namespaces/{namespace}"
+        path += f"/{self.name}"
+        if name:
+            path += f"/{name}"
+        return path
+
+
+# Fetches the JSON response of a GET request to the given URI of the Kubernetes API.
+FetchJSON = Callable[[str], Awaitable[dict | list[dict]]]
+
+
+class K8sDiscoveryCache:
+    """Cache of the resource kinds served by Kubernetes API servers.
+
+    Unlike the discovery of the kubernetes DynamicClient, only the API group version
+    of a requested kind is discovered, with a single request. The cache is shared by
+    all K8sClients, so the resource kinds of a cluster are discovered once per `ttl`
+    seconds instead of once per client. An API group version is discovered again if it
+    does not contain a requested kind, or if it is invalidated after a 404 response.
+    """
+
+    def __init__(self, ttl: float = K8S_DISCOVERY_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        # Maps the API server and group version to the discovery time and the
+        # resource kinds by kind name.
+        self._entries: dict[tuple[str, str], tuple[float, dict[str, APIResource]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_resource(
+        self, api_server: str, api_version: str, kind: str, fetch: FetchJSON
+    ) -> APIResource:
+        """Get the resource kind, discovering its API group version if needed.
+
+        Raises:
+            ValueError: If the API server does not serve the resource kind.
+        """
+        resources = await self._get_resources(api_server, api_version, fetch)
+        if kind not in resources:
+            # The kind may have been added after the discovery, e.g. by a new CRD.
+            self.invalidate(api_server, api_version)
+            resources = await self._get_resources(api_server, api_version, fetch)
+        if kind not in resources:
+            raise ValueError(
+                f"Resource kind {kind} is not served in API version {api_version}."
+            )
+        return resources[kind]
+
+    def invalidate(self, api_server: str, api_version: str) -> None:
+        """Remove the discovered resource kinds of the API group version."""
+        self._entries.pop((api_server, api_version), None)
+
+    async def _get_resources(
+        self, api_server: str, api_version: str, fetch: FetchJSON
+    ) -> dict[str, APIResource]:
+        key = (api_server, api_version)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self.ttl:
+            return entry[1]
+
+        prefix = "api" if "/" not in api_version else "apis"
+        result = await fetch(f"/{prefix}/{api_version}")
+        resources = {
+            resource["kind"]: APIResource(
+                group_version=api_version,
+                kind=resource["kind"],
+                name=resource["name"],
+                namespaced=resource["namespaced"],
+            )
+            for resource in result["resources"]  # type: ignore
+            # Skip subresources like "pods/log", which have the kind of their parent.
+            if "/" not in resource["name"]
+        }
+
+        # Drop expired entries of all clusters, so clusters not used anymore are removed.
+        self._entries = {
+            cached_key: cached_entry
+            for cached_key, cached_entry in self._entries.items()
+            if now - cached_entry[0] < self.ttl
+        }
+        self._entries[key] = (now, resources)
+        return resources
@@ -0,0 +1,120 @@
+import re
+from dataclasses import dataclass
+from typing import Protocol
+
+import scrubadub
+
+# Profiles of the PII detectors, chosen by `pii_detector_profile` of the sanitization config.
+# Scrubadub's default detectors, designed for prose.
+DEFAULT_PII_DETECTOR_PROFILE = "default"
+# Precompiled regular expressions for the PII found in K8s objects.
+K8S_FAST_PII_DETECTOR_PROFILE = "k8s-fast"
+
+# Fields whose values cannot contain personal information, so they are not scrubbed.
+DEFAULT_PII_SAFE_FIELD_NAMES = [
+    "uid",
+    "resourceVersion",
+    "generation",
+    "observedGeneration",
+    "creationTimestamp",
+    "deletionTimestamp",
+    "lastTransitionTime",
+    "lastProbeTime",
+    "lastUpdateTime",
+    "startedAt",
+    "finishedAt",
+    "imageID",
+    "containerID",
+    "managedFields",
+]
+
+DIGITS_PATTERN = re.compile(r"\d")
+
+
+@dataclass(frozen=True)
+class PIIPattern:
+    """Pattern of personal information, replaced with the placeholder {{name}}."""
+
+    name: str
+    pattern: str
+    # The pattern is only searched in texts containing any of the triggers.
+    triggers: tuple[str, ...]
+    # The pattern is only searched in texts containing digits.
+    needs_digits: bool = False
+
+
+# Patterns of the k8s-fast profile.
+K8S_FAST_PII_PATTERNS = [
+    PIIPattern(
+        "PRIVATE_KEY",
+        r"-----BEGIN [A-Z ]*PRIVATE KEY-----[\s\S]*?-----END [A-Z ]*PRIVATE KEY-----",
+        ("PRIVATE KEY",),
+    ),
+    PIIPattern("TOKEN", r"\beyJ[\w-]+\.eyJ[\w-]+\.[\w-]+", ("eyJ",)),  # JWT
+    PIIPattern("TOKEN", r"\bgh[pousr]_[A-Za-z0-9]{36,}", ("gh",)),  # GitHub
+    PIIPattern("TOKEN", r"\bxox[abprs]-[\w-]{10,}", ("xox",)),  # Slack
+    PIIPattern("TOKEN", r"\bAKIA[0-9A-Z]{16}\b", ("AKIA",)),  # AWS access key ID
+    PIIPattern("TOKEN", r"\bAIza[\w-]{35}", ("AIza",)),  # Google API key
+    PIIPattern("TOKEN", r"\b[Bb]earer\s+[\w.~+/-]{16,}=*", ("earer",)),  # Bearer token
+    # Only the user information of URLs with credentials is replaced.
+    PIIPattern("CREDENTIAL", r"(?<=://)[^\s/:@]+:[^\s/@]+(?=@)", ("://",)),
+    PIIPattern(
+        "EMAIL", r"(?<![\w.%+-])[\w.%+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{2,}\b", ("@",)
+    ),
+    PIIPattern("SOCIAL_SECURITY_NUMBER", r"\b\d{3}-\d{2}-\d{4}\b", ("-",), True),
+    PIIPattern(
+        "PHONE",
+        r"(?<![\w+])\+\d{1,3}[ .-]?(?:\(\d{1,4}\)[ .-]?)?\d{2,4}(?:[ .-]?\d{2,4}){1,4}(?!\w)",
+        ("+",),
+        True,
+    ),
+    PIIPattern(
+        "PHONE",
+        r"(?<![\w.-])\(?\d{3}\)?[ .-]\d{3}[ .-]\d{4}(?![\w.-])",
+        (" ", ".", "-"),
+        True,
+    ),
+]
+
+
+class IPIIScrubber(Protocol):
+    """A protocol for a scrubber of personal information."""
+
+    def clean(self, text: str) -> str:
+        """Replace the personal information in the text with placeholders."""
+        ...
+
+
+class FastPIIScrubber:
+    """Scrubber of personal information with precompiled regular expressions.
+
+    It detects private keys, common token formats, credentials in URLs, emails,
+    social security numbers and phone numbers. A pattern is only searched in texts
+    containing one of its triggers, so most values of K8s objects are checked with
+    a few substring tests.
+    """
+
+    def __init__(self, patterns: list[PIIPattern] | None = None):
+        self.patterns = [
+            (re.compile(pii.pattern), f"{{{{{pii.name}}}}}", pii)
+            for pii in (patterns or K8S_FAST_PII_PATTERNS)
+        ]
+
+    def clean(self, text: str) -> str:
+        """Replace the personal information in the text with placeholders."""
+        has_digits = DIGITS_PATTERN.search(text) is not None
+        for pattern, placeholder, pii in self.patterns:
+            if pii.needs_digits and not has_digits:
+                continue
+            if any(trigger in text for trigger in pii.triggers):
+                text = pattern.sub(placeholder, text)
+        return text
+
+
+def create_pii_scrubber(profile: str | None = None) -> IPIIScrubber:
+    """Create the scrubber of the PII detector profile."""
+    if profile is None or profile == DEFAULT_PII_DETECTOR_PROFILE:
+        return scrubadub.Scrubber()  # type: ignore
+    if profile == K8S_FAST_PII_DETECTOR_PROFILE:
+        return FastPIIScrubber()
+    raise ValueError(f"Unknown PII detector profile: {profile}")
@@ -0,0 +1,106 @@
+import re
+from collections import deque
+from dataclasses import dataclass
+
+# Variable parts of log lines, which are ignored when comparing log entries.
+VARIABLE_LOG_PARTS_PATTERN = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|0x[0-9a-fA-F]+"
+    r"|\b[0-9a-fA-F]*\d[0-9a-fA-F]*\b"
+    r"|\d+"
+)
+VARIABLE_LOG_PART_PLACEHOLDER = "<*>"
+
+# Lines which continue the previous log entry, e.g. the frames of stack traces.
+CONTINUATION_LINE_PATTERN = re.compile(r"^(\s|Caused by:|\.\.\. \d+ more)")
+
+
+@dataclass
+class _LogEntry:
+    lines: list[str]
+    count: int = 1
+
+
+def get_log_template(text: str) -> str:
+    """Get the template of a log entry by replacing its variable parts,
+    e.g. timestamps, numbers and IDs."""
+    return VARIABLE_LOG_PARTS_PATTERN.sub(VARIABLE_LOG_PART_PLACEHOLDER, text)
+
+
+class PodLogTail:
+    """Keeps the last lines of pod logs, which are added line by line, up to a size.
+
+    The API server applies `limitBytes` to the beginning of the logs selected by
+    `tailLines`, which drops the newest lines. The tail keeps the newest lines instead,
+    and the end of a line exceeding the size on its own.
+    """
+
+    def __init__(self, limit_bytes: int | None = None) -> None:
+        self.limit_bytes = limit_bytes
+        self._lines: deque[bytes] = deque()
+        self._size = 0
+
+    def add(self, line: str) -> None:
+        """Add the next line of the logs, dropping the oldest lines beyond the size."""
+        encoded = line.encode()
+        self._lines.append(encoded)
+        self._size += len(encoded)
+        if self.limit_bytes is None:
+            return
+        while self._size > self.limit_bytes and len(self._lines) > 1:
+            self._size -= len(self._lines.popleft())
+        if self._size > self.limit_bytes:
+            self._lines[0] = encoded[len(encoded) - self.limit_bytes :]
+            self._size = self.limit_bytes
+
+    def lines(self) -> list[str]:
+        """Get the kept lines in their original order."""
+        return [line.decode(errors="ignore") for line in self._lines]
+
+
+class PodLogCompactor:
+    """Collapses repeated entries of pod logs, which are added line by line.
+
+    Lines continuing the previous line, like the frames of a stack trace, form one
+    entry with it. Entries with the same template are collapsed into their last
+    occurrence with a count, so logs can be consumed as a stream without keeping
+    repeated lines in memory, and the order of the latest entries is kept.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[str, _LogEntry] = {}
+        self._current: list[str] = []
+
+    def add(self, line: str) -> None:
+        """Add the next line of the logs."""
+        if not line:
+            return
+        if self._current and CONTINUATION_LINE_PATTERN.match(line):
+            self._current.append(line)
+            return
+        self._flush()
+        self._current = [line]
+
+    def _flush(self) -> None:
+        if not self._current:
+            return
+        template = get_log_template("\n".join(self._current))
+        # Entries are reinserted to move them to the position of their last occurrence.
+        entry = self._entries.pop(template, None)
+        count = 1 if entry is None else entry.count + 1
+        self._entries[template] = _LogEntry(self._current, count)
+        self._current = []
+
+    def lines(self) -> list[str]:
+        """Get the lines of the collapsed log entries in the order of their last occurrence.
+        The first line of a repeated entry is prefixed with the number of occurrences.
+        """
+        self._flush()
+        lines = []
+        for entry in self._entries.values():
+            first_line, *other_lines = entry.lines
+            if entry.count > 1:
+                first_line = f"[repeated {entry.count} times] {first_line}"
+            lines.append(first_line)
+            lines.extend(other_lines)
+        return lines
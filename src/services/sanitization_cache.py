@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from utils.settings import DATA_SANITIZER_CACHE_MAX_BYTES, DATA_SANITIZER_CACHE_SIZE
+
+# Approximate memory of a Python object without the characters of strings.
+OBJECT_OVERHEAD_BYTES = 64
+
+# Top-level fields of K8s objects, which change only together with the resourceVersion.
+K8S_OBJECT_FIELDS = frozenset(
+    [
+        "apiVersion",
+        "kind",
+        "metadata",
+        "spec",
+        "status",
+        # ConfigMaps and Secrets
+        "data",
+        "binaryData",
+        "stringData",
+        "type",
+        "immutable",
+        # Events
+        "involvedObject",
+        "reason",
+        "message",
+        "source",
+        "firstTimestamp",
+        "lastTimestamp",
+        "count",
+        "eventTime",
+        "series",
+        "action",
+        "related",
+        "reportingComponent",
+        "reportingInstance",
+        # RBAC and ServiceAccounts
+        "rules",
+        "aggregationRule",
+        "roleRef",
+        "subjects",
+        "secrets",
+        "imagePullSecrets",
+        "automountServiceAccountToken",
+    ]
+)
+
+
+def get_object_cache_key(obj: dict) -> Hashable | None:
+    """Get the key identifying the content of a K8s object by its apiVersion, kind, uid
+    and resourceVersion, so the object does not need to be serialized.
+
+    Returns None for objects without uid or resourceVersion and for objects with other
+    top-level fields, e.g. a resource with its events added, as their content is not
+    identified by the resourceVersion. Lists, e.g. a PodList returned for a GET request
+    of a collection, have no uid and are not cached; repeated list requests are served
+    by the response cache of the K8s client.
+    """
+    metadata = obj.get("metadata")
+    if not isinstance(metadata, dict):
+        return None
+    uid = metadata.get("uid")
+    resource_version = metadata.get("resourceVersion")
+    if not uid or not resource_version or not K8S_OBJECT_FIELDS.issuperset(obj):
+        return None
+    return obj.get("apiVersion"), obj.get("kind"), uid, resource_version
+
+
+def estimate_size(value: Any) -> int:
+    """Estimate the memory of an object in bytes from the lengths of its strings
+    and the number of its values, without serializing it."""
+    if isinstance(value, dict):
+        return OBJECT_OVERHEAD_BYTES + sum(
+            estimate_size(key) + estimate_size(item) for key, item in value.items()
+        )
+    if isinstance(value, list | tuple):
+        return OBJECT_OVERHEAD_BYTES + sum(map(estimate_size, value))
+    if isinstance(value, str | bytes):
+        return OBJECT_OVERHEAD_BYTES + len(value)
+    return OBJECT_OVERHEAD_BYTES
+
+
+class SanitizationCache:
+    """Bounded LRU cache of sanitized objects.
+
+    The cache holds at most `max_entries` objects whose estimated total size is at
+    most `max_bytes`. The least recently used objects are evicted first, and objects
+    larger than `max_bytes` are not cached. It is safe to use from multiple threads.
+    The cached objects are shared, so callers must not modify them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DATA_SANITIZER_CACHE_SIZE,
+        max_bytes: int = DATA_SANITIZER_CACHE_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: OrderedDict[Hashable, tuple[dict, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> dict | None:
+        """Get the cached object of the key, if any."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: dict) -> None:
+        """Cache the object, evicting the least recently used objects beyond the limits."""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.size_bytes += size
+            while (
+                len(self._entries) > self.max_entries
+                or self.size_bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
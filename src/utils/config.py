@@ -24,6 +24,33 @@ class DataSanitizationConfig(BaseModel):
     sensitive_field_names: list[str] | None = None
     sensitive_env_vars: list[str] | None = None
     sensitive_field_to_exclude: list[str] | None = None
+    # PII detector profile, "default" (scrubadub) or "k8s-fast".
+    pii_detector_profile: str | None = None
+    # Fields whose values are not scrubbed for personal information.
+    pii_safe_field_names: list[str] | None = None
+
+
+class FieldProjectionProfile(BaseModel):
+    """Fields of K8s objects to remove or condense before they are passed to the LLM.
+
+    Fields are given as JSON pointers, e.g. "/metadata/managedFields". Lists are
+    transparent, so "/spec/containers/env" addresses the env of every container.
+    """
+
+    exclude_fields: list[str] = []
+    # Maximum number of items of lists, keeping the last items.
+    max_list_lengths: dict[str, int] = {}
+    # Maximum length of all string values.
+    max_string_length: int | None = None
+
+
+class FieldProjectionConfig(BaseModel):
+    """Field projection configuration."""
+
+    # Profile applied to objects of all kinds.
+    default_profile: FieldProjectionProfile | None = None
+    # Profiles applied in addition to the default profile, by kind.
+    kind_profiles: dict[str, FieldProjectionProfile] = {}
 
 
 class Config(BaseModel):
@@ -31,6 +58,7 @@ class Config(BaseModel):
 
     models: list[ModelConfig]
     sanitization_config: DataSanitizationConfig | None = None
+    field_projection_config: FieldProjectionConfig | None = None
 
 
 def find_config_file(start_path: Path, target: str) -> Path:
@@ -77,7 +105,12 @@ def get_config() -> Config:
         # Extract only the "models" part of the configuration
         models_data = data.get("models", [])
         sanitization_config = data.get("sanitization_config", None)
-        config = Config(models=models_data, sanitization_config=sanitization_config)
+        field_projection_config = data.get("field_projection_config", None)
+        config = Config(
+            models=models_data,
+            sanitization_config=sanitization_config,
+            field_projection_config=field_projection_config,
+        )
         return config
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON format in config file {config_file}: {e}")
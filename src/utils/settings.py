@@ -3,6 +3,7 @@ import logging
 import os
 import sys
 from pathlib import Path
+from urllib.parse import quote
 
 from decouple import Config, RepositoryEnv, config
 from dotenv import find_dotenv
@@ -72,9 +73,111 @@ REDIS_PORT = config("REDIS_PORT", default=6379, cast=int)
 REDIS_USER = config("REDIS_USER", default="")  # optional
 REDIS_PASSWORD = config("REDIS_PASSWORD", default="")  # optional
 REDIS_DB_NUMBER = config("REDIS_DB_NUMBER", default=0, cast=int)  # optional
-user_part = f"{REDIS_USER}" if REDIS_USER else ""
-auth_part = f"{user_part}:{REDIS_PASSWORD}@" if REDIS_USER or REDIS_PASSWORD else ""
-REDIS_URL = f"redis://{auth_part}{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB_NUMBER}"
+user_part = quote(REDIS_USER, safe="") if REDIS_USER else ""
+auth_part = (
+    f"{user_part}:{quote(REDIS_PASSWORD, safe='')}@"
+    if REDIS_USER or REDIS_PASSWORD
+    else ""
+)
+# REDIS_URL takes precedence over the individual connection settings.
+REDIS_URL = config(
+    "REDIS_URL",
+    default=f"redis://{auth_part}{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB_NUMBER}",
+)
+# Connect to a Redis Cluster; REDIS_URL can point to any node of the cluster.
+REDIS_CLUSTER_MODE = config("REDIS_CLUSTER_MODE", default=False, cast=bool)
+# Maximum number of connections per Redis node. 0 means unlimited.
+REDIS_MAX_CONNECTIONS = config("REDIS_MAX_CONNECTIONS", default=0, cast=int)
+# Requests wait this long for a free connection once REDIS_MAX_CONNECTIONS are in use.
+REDIS_POOL_TIMEOUT_SECONDS = config(
+    "REDIS_POOL_TIMEOUT_SECONDS", default=5.0, cast=float
+)
+REDIS_SOCKET_TIMEOUT_SECONDS = config(
+    "REDIS_SOCKET_TIMEOUT_SECONDS", default=5.0, cast=float
+)
+REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS = config(
+    "REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS", default=5.0, cast=float
+)
+# Idle connections are checked before use after this many seconds. 0 disables the checks.
+REDIS_HEALTH_CHECK_INTERVAL_SECONDS = config(
+    "REDIS_HEALTH_CHECK_INTERVAL_SECONDS", default=30.0, cast=float
+)
+# What to do with a request for a conversation that is processing another request:
+# "queue" waits for it, "reject" fails with 409, "attach" streams its response, "none" does nothing.
+CONVERSATION_LOCK_POLICY = config("CONVERSATION_LOCK_POLICY", default="queue")
+# A crashed worker blocks its conversations for at most this long.
+CONVERSATION_LOCK_LEASE_SECONDS = config(
+    "CONVERSATION_LOCK_LEASE_SECONDS", default=30.0, cast=float
+)
+# Maximum time a queued request waits for the conversation before it is rejected.
+CONVERSATION_LOCK_WAIT_TIMEOUT_SECONDS = config(
+    "CONVERSATION_LOCK_WAIT_TIMEOUT_SECONDS", default=120.0, cast=float
+)
+# Conversations expire after this many seconds without activity. 0 disables the expiry.
+REDIS_TTL_SECONDS = config("REDIS_TTL_SECONDS", default=0, cast=int)
+# Number of latest checkpoints kept per conversation. 0 keeps all checkpoints.
+REDIS_MAX_CHECKPOINTS = config("REDIS_MAX_CHECKPOINTS", default=0, cast=int)
+# Compression codec for stored checkpoints and writes: "zlib", "zstd" or "none".
+REDIS_COMPRESSION_CODEC = config("REDIS_COMPRESSION_CODEC", default="zlib")
+# Checkpoints and writes smaller than this are stored uncompressed.
+REDIS_COMPRESSION_THRESHOLD_BYTES = config(
+    "REDIS_COMPRESSION_THRESHOLD_BYTES", default=1024, cast=int
+)
+# Number of conversations whose latest checkpoint is cached in memory. 0 disables the cache.
+REDIS_CHECKPOINT_CACHE_SIZE = config(
+    "REDIS_CHECKPOINT_CACHE_SIZE", default=1024, cast=int
+)
+# Kubernetes
+# Number of clusters and credentials whose K8s clients are reused across requests.
+K8S_CLIENT_CACHE_SIZE = config("K8S_CLIENT_CACHE_SIZE", default=100, cast=int)
+# K8s clients are recreated after this many seconds.
+K8S_CLIENT_CACHE_TTL_SECONDS = config(
+    "K8S_CLIENT_CACHE_TTL_SECONDS", default=300.0, cast=float
+)
+# Maximum number of kept-alive connections per K8s client.
+K8S_CONNECTION_POOL_SIZE = config("K8S_CONNECTION_POOL_SIZE", default=10, cast=int)
+# Number of resources fetched per request when listing resources.
+K8S_LIST_PAGE_SIZE = config("K8S_LIST_PAGE_SIZE", default=500, cast=int)
+# Listing resources stops after this many resources or bytes of responses.
+K8S_LIST_MAX_ITEMS = config("K8S_LIST_MAX_ITEMS", default=5000, cast=int)
+K8S_LIST_MAX_BYTES = config("K8S_LIST_MAX_BYTES", default=16 * 1024 * 1024, cast=int)
+# The resource kinds of an API group version are discovered again after this many seconds.
+K8S_DISCOVERY_CACHE_TTL_SECONDS = config(
+    "K8S_DISCOVERY_CACHE_TTL_SECONDS", default=600.0, cast=float
+)
+# Whether K8s clients reuse the responses of identical K8s API GET requests.
+K8S_RESPONSE_CACHE_ENABLED = config(
+    "K8S_RESPONSE_CACHE_ENABLED", default=True, cast=bool
+)
+# Responses of identical K8s API GET requests are reused for this many seconds.
+K8S_RESPONSE_CACHE_TTL_SECONDS = config(
+    "K8S_RESPONSE_CACHE_TTL_SECONDS", default=10.0, cast=float
+)
+# Number of responses cached per K8s client.
+K8S_RESPONSE_CACHE_SIZE = config("K8S_RESPONSE_CACHE_SIZE", default=256, cast=int)
+# Cluster data of initial questions which takes longer to fetch is left out.
+INITIAL_QUESTIONS_FETCH_TIMEOUT_SECONDS = config(
+    "INITIAL_QUESTIONS_FETCH_TIMEOUT_SECONDS", default=20.0, cast=float
+)
+# Data sanitization
+# Number of worker processes sanitizing large lists. 0 sanitizes on the calling thread.
+DATA_SANITIZER_PROCESSES = config("DATA_SANITIZER_PROCESSES", default=0, cast=int)
+# Lists with at least this many objects are sanitized by the worker processes.
+DATA_SANITIZER_PARALLEL_MIN_ITEMS = config(
+    "DATA_SANITIZER_PARALLEL_MIN_ITEMS", default=200, cast=int
+)
+# Number of objects sent to a worker process at once.
+DATA_SANITIZER_CHUNK_SIZE = config("DATA_SANITIZER_CHUNK_SIZE", default=50, cast=int)
+# Maximum number of chunks being sanitized ahead of the consumer of the objects.
+DATA_SANITIZER_MAX_IN_FLIGHT_CHUNKS = config(
+    "DATA_SANITIZER_MAX_IN_FLIGHT_CHUNKS", default=8, cast=int
+)
+# Number of sanitized objects kept for reuse. 0 disables the cache.
+DATA_SANITIZER_CACHE_SIZE = config("DATA_SANITIZER_CACHE_SIZE", default=4096, cast=int)
+# Maximum estimated total size in bytes of the sanitized objects kept for reuse.
+DATA_SANITIZER_CACHE_MAX_BYTES = config(
+    "DATA_SANITIZER_CACHE_MAX_BYTES", default=64 * 1024 * 1024, cast=int
+)
 # Langfuse
 LANGFUSE_SECRET_KEY = config("LANGFUSE_SECRET_KEY", default="dummy")
 LANGFUSE_PUBLIC_KEY = config("LANGFUSE_PUBLIC_KEY", default="dummy")
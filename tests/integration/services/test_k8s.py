@@ -38,9 +38,10 @@ class TestK8sClient:
             "apis/metrics.k8s.io/v1beta1/nodes",
         ],
     )
-    def test_execute_get_api_request(self, k8s_client, uri):
+    @pytest.mark.asyncio
+    async def test_execute_get_api_request(self, k8s_client, uri):
         # when
-        result = k8s_client.execute_get_api_request(uri)
+        result = await k8s_client.execute_get_api_request(uri)
 
         # then
         # the return type should be a list.
@@ -95,11 +96,12 @@ class TestK8sClient:
             ),
         ],
     )
-    def test_list_resource(
+    @pytest.mark.asyncio
+    async def test_list_resource(
         self, k8s_client, given_api_version, given_kind, given_namespace
     ):
         # when
-        result = k8s_client.list_resources(
+        result = await k8s_client.list_resources(
             api_version=given_api_version, kind=given_kind, namespace=given_namespace
         )
 
@@ -157,11 +159,12 @@ class TestK8sClient:
             ),
         ],
     )
-    def test_get_resource(
+    @pytest.mark.asyncio
+    async def test_get_resource(
         self, k8s_client, given_api_version, given_kind, given_namespace, given_name
     ):
         # when
-        result = k8s_client.get_resource(
+        result = await k8s_client.get_resource(
             api_version=given_api_version,
             kind=given_kind,
             namespace=given_namespace,
@@ -219,11 +222,12 @@ class TestK8sClient:
             ),
         ],
     )
-    def test_describe_resource(
+    @pytest.mark.asyncio
+    async def test_describe_resource(
         self, k8s_client, given_api_version, given_kind, given_namespace, given_name
     ):
         # when
-        result = k8s_client.describe_resource(
+        result = await k8s_client.describe_resource(
             api_version=given_api_version,
             kind=given_kind,
             namespace=given_namespace,
@@ -255,9 +259,10 @@ class TestK8sClient:
             "",
         ],
     )
-    def test_list_not_running_pods(self, k8s_client, given_namespace):
+    @pytest.mark.asyncio
+    async def test_list_not_running_pods(self, k8s_client, given_namespace):
         # when
-        result = k8s_client.list_not_running_pods(
+        result = await k8s_client.list_not_running_pods(
             namespace=given_namespace,
         )
 
@@ -272,12 +277,13 @@ class TestK8sClient:
             if given_namespace != "":
                 assert item["metadata"]["namespace"] == given_namespace
 
-    def test_list_nodes_metrics(
+    @pytest.mark.asyncio
+    async def test_list_nodes_metrics(
         self,
         k8s_client,
     ):
         # when
-        result = k8s_client.list_nodes_metrics()
+        result = await k8s_client.list_nodes_metrics()
 
         # then
         # the return type should be a list.
@@ -300,9 +306,10 @@ class TestK8sClient:
             "whoami-too-many-replicas",
         ],
     )
-    def test_list_k8s_events(self, k8s_client, given_namespace):
+    @pytest.mark.asyncio
+    async def test_list_k8s_events(self, k8s_client, given_namespace):
         # when
-        result = k8s_client.list_k8s_events(namespace=given_namespace)
+        result = await k8s_client.list_k8s_events(namespace=given_namespace)
 
         # then
         # the return type should be a list.
@@ -320,9 +327,10 @@ class TestK8sClient:
             "whoami-too-many-replicas",
         ],
     )
-    def test_list_k8s_warning_events(self, k8s_client, given_namespace):
+    @pytest.mark.asyncio
+    async def test_list_k8s_warning_events(self, k8s_client, given_namespace):
         # when
-        result = k8s_client.list_k8s_warning_events(namespace=given_namespace)
+        result = await k8s_client.list_k8s_warning_events(namespace=given_namespace)
 
         # then
         # the return type should be a list.
@@ -339,11 +347,12 @@ class TestK8sClient:
             ("ReplicaSet", "whoami-too-many-replicas", "whoami-6c78674dc7"),
         ],
     )
-    def test_list_k8s_events_for_resource(
+    @pytest.mark.asyncio
+    async def test_list_k8s_events_for_resource(
         self, k8s_client, given_kind, given_namespace, given_name
     ):
         # when
-        result = k8s_client.list_k8s_events_for_resource(
+        result = await k8s_client.list_k8s_events_for_resource(
             kind=given_kind, namespace=given_namespace, name=given_name
         )
 
@@ -369,12 +378,13 @@ class TestK8sClient:
             ),
         ],
     )
-    def test_fetch_pod_logs(
+    @pytest.mark.asyncio
+    async def test_fetch_pod_logs(
         self, k8s_client, name, namespace, container_name, is_terminated, tail_limit
     ):
         # given
         # find complete pod name as pod names are dynamic.
-        pods = k8s_client.list_resources(
+        pods = await k8s_client.list_resources(
             api_version="v1", kind="Pod", namespace=namespace
         )
         # find the first pod with name starting with given name.
@@ -389,7 +399,7 @@ class TestK8sClient:
         assert pod_name is not None
 
         # when
-        result = k8s_client.fetch_pod_logs(
+        result = await k8s_client.fetch_pod_logs(
             pod_name, namespace, container_name, is_terminated, tail_limit
         )
 
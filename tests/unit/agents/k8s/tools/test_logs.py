@@ -5,7 +5,11 @@ import pytest
 from langchain_core.messages import AIMessage
 from langgraph.prebuilt import ToolNode
 
-from agents.k8s.tools.logs import POD_LOGS_TAIL_LINES_LIMIT, fetch_pod_logs_tool
+from agents.k8s.tools.logs import (
+    POD_LOGS_LIMIT_BYTES,
+    POD_LOGS_TAIL_LINES_LIMIT,
+    fetch_pod_logs_tool,
+)
 from services.k8s import IK8sClient
 
 
@@ -38,7 +42,8 @@ from services.k8s import IK8sClient
         ),
     ],
 )
-def test_fetch_pod_logs_tool(
+@pytest.mark.asyncio
+async def test_fetch_pod_logs_tool(
     given_name,
     given_namespace,
     given_container_name,
@@ -56,7 +61,7 @@ def test_fetch_pod_logs_tool(
         k8s_client.fetch_pod_logs.return_value = expected_logs
 
     # When: invoke the tool.
-    result = tool_node.invoke(
+    result = await tool_node.ainvoke(
         {
             "k8s_client": k8s_client,
             "messages": [
@@ -88,6 +93,8 @@ def test_fetch_pod_logs_tool(
         given_container_name,
         given_is_terminated,
         POD_LOGS_TAIL_LINES_LIMIT,
+        limit_bytes=POD_LOGS_LIMIT_BYTES,
+        since_seconds=None,
     )
     # check the response.
     if expected_error:
@@ -69,7 +69,8 @@ def sample_k8s_sanitized_secret():
         ),
     ],
 )
-def test_k8s_query_tool(
+@pytest.mark.asyncio
+async def test_k8s_query_tool(
     given_uri, given_object, given_exception, expected_object, expected_error
 ):
     # Given
@@ -81,7 +82,7 @@ def test_k8s_query_tool(
         k8s_client.execute_get_api_request.return_value = given_object
 
     # When: invoke the tool.
-    result = tool_node.invoke(
+    result = await tool_node.ainvoke(
         {
             "k8s_client": k8s_client,
             "messages": [
@@ -0,0 +1,94 @@
+from collections import defaultdict
+
+import pytest
+from langgraph.checkpoint.base import Checkpoint, CheckpointTuple
+
+from agents.memory.checkpoint_cache import LatestCheckpointCache
+
+
+def create_checkpoint_tuple(thread_id: str, checkpoint_id: str) -> CheckpointTuple:
+    return CheckpointTuple(
+        config={
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": "",
+                "checkpoint_id": checkpoint_id,
+            }
+        },
+        checkpoint=Checkpoint(
+            v=1,
+            id=checkpoint_id,
+            ts="2024-01-01T00:00:00+00:00",
+            channel_values={"messages": ["message"]},
+            channel_versions={"messages": 1},
+            versions_seen=defaultdict(dict),
+            pending_sends=[],
+        ),
+        metadata={"step": 1},
+        pending_writes=[],
+    )
+
+
+class TestLatestCheckpointCache:
+    def test_put_and_get(self):
+        cache = LatestCheckpointCache(max_size=2)
+        checkpoint_tuple = create_checkpoint_tuple("thread-1", "chk-1")
+
+        cache.put("thread-1", "", checkpoint_tuple)
+
+        assert cache.get("thread-1", "") == checkpoint_tuple
+        assert cache.get("thread-1", "other-ns") is None
+        assert cache.get("thread-2", "") is None
+
+    def test_get_returns_copy(self):
+        cache = LatestCheckpointCache(max_size=2)
+        cache.put("thread-1", "", create_checkpoint_tuple("thread-1", "chk-1"))
+
+        cached = cache.get("thread-1", "")
+        cached.checkpoint["channel_values"]["messages"] = []
+        cached.pending_writes.append(("task1", "channel1", "value1"))
+
+        assert cache.get("thread-1", "") == create_checkpoint_tuple("thread-1", "chk-1")
+
+    def test_evicts_least_recently_used(self):
+        cache = LatestCheckpointCache(max_size=2)
+        cache.put("thread-1", "", create_checkpoint_tuple("thread-1", "chk-1"))
+        cache.put("thread-2", "", create_checkpoint_tuple("thread-2", "chk-1"))
+        cache.get("thread-1", "")
+
+        cache.put("thread-3", "", create_checkpoint_tuple("thread-3", "chk-1"))
+
+        assert cache.get("thread-1", "") is not None
+        assert cache.get("thread-2", "") is None
+        assert cache.get("thread-3", "") is not None
+
+    @pytest.mark.parametrize(
+        "checkpoint_id, expected_invalidated",
+        [
+            (None, True),
+            ("chk-1", True),
+            ("chk-0", False),
+        ],
+    )
+    def test_invalidate(self, checkpoint_id, expected_invalidated):
+        cache = LatestCheckpointCache(max_size=2)
+        cache.put("thread-1", "", create_checkpoint_tuple("thread-1", "chk-1"))
+
+        cache.invalidate("thread-1", "", checkpoint_id)
+
+        assert (cache.get("thread-1", "") is None) == expected_invalidated
+
+    def test_invalidate_thread(self):
+        cache = LatestCheckpointCache(max_size=3)
+        cache.put("thread-1", "", create_checkpoint_tuple("thread-1", "chk-1"))
+        cache.put("thread-1", "ns1", create_checkpoint_tuple("thread-1", "chk-1"))
+        cache.put("thread-2", "", create_checkpoint_tuple("thread-2", "chk-1"))
+
+        cache.invalidate_thread("thread-1")
+
+        assert len(cache) == 1
+        assert cache.get("thread-2", "") is not None
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            LatestCheckpointCache(max_size=0)
@@ -0,0 +1,142 @@
+from collections import defaultdict
+from datetime import UTC, datetime
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from langgraph.checkpoint.base import Checkpoint
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from agents.memory.async_redis_checkpointer import AsyncRedisSaver
+from agents.memory.checkpoint_migration import (
+    MigrationResult,
+    migrate_legacy_checkpoints,
+)
+
+serde = JsonPlusSerializer()
+
+
+def create_checkpoint(checkpoint_id: str, messages: list[str]) -> Checkpoint:
+    return Checkpoint(
+        v=1,
+        id=checkpoint_id,
+        ts=datetime.now(UTC).isoformat(),
+        channel_values={"messages": messages},
+        channel_versions={"messages": len(messages)},
+        versions_seen=defaultdict(dict),
+        pending_sends=[],
+    )
+
+
+async def store_legacy_checkpoint(
+    conn, thread_id: str, checkpoint_id: str, parent_id: str, messages: list[str]
+) -> None:
+    """Store a checkpoint with inline channel values under the legacy key layout."""
+    type_, serialized_checkpoint = serde.dumps_typed(
+        create_checkpoint(checkpoint_id, messages)
+    )
+    await conn.hset(
+        f"checkpoint${thread_id}$${checkpoint_id}",
+        mapping={
+            "checkpoint": serialized_checkpoint,
+            "type": type_,
+            "checkpoint_id": checkpoint_id,
+            "metadata": serde.dumps({"step": len(messages)}),
+            "parent_checkpoint_id": parent_id,
+        },
+    )
+
+
+async def store_legacy_write(
+    conn, thread_id: str, checkpoint_id: str, task_id: str, idx: int, value: str
+) -> None:
+    """Store a write under the legacy key layout."""
+    type_, serialized_value = serde.dumps_typed(value)
+    await conn.hset(
+        f"writes${thread_id}$${checkpoint_id}${task_id}${idx}",
+        mapping={"channel": "messages", "type": type_, "value": serialized_value},
+    )
+
+
+@pytest.mark.asyncio
+class TestMigrateLegacyCheckpoints:
+    @pytest_asyncio.fixture
+    async def fake_async_redis(self):
+        async with fakeredis.FakeAsyncRedis() as client:
+            await store_legacy_checkpoint(client, "thread-1", "chk-1", "", ["hi"])
+            await store_legacy_checkpoint(
+                client, "thread-1", "chk-2", "chk-1", ["hi", "hello"]
+            )
+            await store_legacy_write(client, "thread-1", "chk-2", "task1", 0, "a")
+            await store_legacy_write(client, "thread-1", "chk-2", "task1", 1, "b")
+            yield client
+
+    async def test_migrates_checkpoints_and_writes(self, fake_async_redis):
+        saver = AsyncRedisSaver(conn=fake_async_redis, ttl=3600)
+        config = {"configurable": {"thread_id": "thread-1", "checkpoint_ns": ""}}
+
+        result = await migrate_legacy_checkpoints(saver)
+
+        assert result == MigrationResult(checkpoints=2, writes=2, deleted_keys=4)
+        latest = await saver.aget_tuple(config)
+        assert latest.config["configurable"]["checkpoint_id"] == "chk-2"
+        assert latest.parent_config["configurable"]["checkpoint_id"] == "chk-1"
+        assert latest.checkpoint["channel_values"] == {"messages": ["hi", "hello"]}
+        assert latest.metadata == {"step": 2}
+        assert latest.pending_writes == [
+            ("task1", "messages", "a"),
+            ("task1", "messages", "b"),
+        ]
+        assert [t.config async for t in saver.alist(config)][1]["configurable"][
+            "checkpoint_id"
+        ] == "chk-1"
+        # legacy keys are deleted and the migrated keys expire.
+        for key in await fake_async_redis.keys("*"):
+            assert b"{thread-1}" in key
+            assert await fake_async_redis.ttl(key) > 0
+
+    async def test_migration_is_idempotent(self, fake_async_redis):
+        saver = AsyncRedisSaver(conn=fake_async_redis)
+        await migrate_legacy_checkpoints(saver)
+        keys = sorted(await fake_async_redis.keys("*"))
+
+        result = await migrate_legacy_checkpoints(saver)
+
+        assert result == MigrationResult()
+        assert sorted(await fake_async_redis.keys("*")) == keys
+
+    async def test_drops_writes_of_compacted_checkpoints(self, fake_async_redis):
+        await store_legacy_write(fake_async_redis, "thread-1", "chk-1", "task1", 0, "x")
+        saver = AsyncRedisSaver(conn=fake_async_redis, max_checkpoints=1)
+
+        await migrate_legacy_checkpoints(saver)
+
+        assert not await fake_async_redis.keys("*chk-1*")
+        assert len(await fake_async_redis.keys("writes$*")) == 2  # noqa: PLR2004
+
+    @pytest.mark.parametrize(
+        "test_description, discard, dry_run, expected_deleted_keys, expected_keys",
+        [
+            ("should only count legacy keys in a dry run", False, True, 0, 4),
+            ("should delete legacy keys without migrating them", True, False, 4, 0),
+        ],
+    )
+    async def test_discard_and_dry_run(
+        self,
+        fake_async_redis,
+        test_description,
+        discard,
+        dry_run,
+        expected_deleted_keys,
+        expected_keys,
+    ):
+        saver = AsyncRedisSaver(conn=fake_async_redis)
+
+        result = await migrate_legacy_checkpoints(
+            saver, discard=discard, dry_run=dry_run
+        )
+
+        assert result == MigrationResult(
+            checkpoints=2, writes=2, deleted_keys=expected_deleted_keys
+        )
+        assert len(await fake_async_redis.keys("*")) == expected_keys
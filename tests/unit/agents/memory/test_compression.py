@@ -0,0 +1,120 @@
+import fakeredis
+import pytest
+import pytest_asyncio
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from agents.memory.async_redis_checkpointer import AsyncRedisSaver
+from agents.memory.compression import (
+    CompressedSerializer,
+    ZlibCodec,
+    ZstdCodec,
+    create_compression_codec,
+)
+
+THRESHOLD = 100
+SMALL_VALUE = {"kind": "Pod"}
+LARGE_VALUE = {"items": [{"kind": "Pod", "metadata": {"name": "my-pod"}}] * 100}
+
+
+@pytest.mark.parametrize(
+    "name, expected_type",
+    [
+        ("none", None),
+        ("zlib", ZlibCodec),
+        ("zstd", ZstdCodec),
+    ],
+)
+def test_create_compression_codec(name, expected_type):
+    if name == "zstd":
+        pytest.importorskip("zstandard")
+
+    codec = create_compression_codec(name)
+
+    if expected_type is None:
+        assert codec is None
+    else:
+        assert isinstance(codec, expected_type)
+
+
+def test_create_compression_codec_unknown():
+    with pytest.raises(ValueError):
+        create_compression_codec("unknown")
+
+
+class TestCompressedSerializer:
+    serde = JsonPlusSerializer()
+
+    @pytest.mark.parametrize(
+        "value, expected_type",
+        [
+            # Small payloads are stored as is
+            (SMALL_VALUE, "msgpack"),
+            # Large payloads are compressed
+            (LARGE_VALUE, "msgpack+zlib"),
+        ],
+    )
+    def test_round_trip(self, value, expected_type):
+        serializer = CompressedSerializer(self.serde, ZlibCodec(), THRESHOLD)
+
+        type_, data = serializer.dumps_typed(value)
+
+        assert type_ == expected_type
+        if expected_type == "msgpack+zlib":
+            assert len(data) < len(self.serde.dumps_typed(value)[1])
+        assert serializer.loads_typed((type_, data)) == value
+
+    def test_reads_uncompressed_entries(self):
+        serializer = CompressedSerializer(self.serde, ZlibCodec(), THRESHOLD)
+
+        assert (
+            serializer.loads_typed(self.serde.dumps_typed(LARGE_VALUE)) == LARGE_VALUE
+        )
+
+    def test_reads_entries_of_other_codec(self):
+        zlib_serializer = CompressedSerializer(self.serde, ZlibCodec(), THRESHOLD)
+        serializer = CompressedSerializer(self.serde, None, THRESHOLD)
+
+        type_, data = serializer.dumps_typed(LARGE_VALUE)
+        assert type_ == "msgpack"
+        assert serializer.loads_typed(zlib_serializer.dumps_typed(LARGE_VALUE)) == (
+            LARGE_VALUE
+        )
+
+
+@pytest.mark.asyncio
+class TestAsyncRedisSaverCompression:
+    @pytest_asyncio.fixture
+    async def fake_async_redis(self):
+        async with fakeredis.FakeAsyncRedis() as client:
+            yield client
+
+    async def test_compressed_writes(self, fake_async_redis):
+        saver = AsyncRedisSaver(
+            conn=fake_async_redis,
+            serde=CompressedSerializer(JsonPlusSerializer(), ZlibCodec(), THRESHOLD),
+        )
+        config = {
+            "configurable": {
+                "thread_id": "thread-1",
+                "checkpoint_ns": "",
+                "checkpoint_id": "chk-1",
+            }
+        }
+
+        await saver.aput(
+            {"configurable": {"thread_id": "thread-1", "checkpoint_ns": ""}},
+            {**empty_checkpoint(), "id": "chk-1"},
+            {},
+            {},
+        )
+        await saver.aput_writes(config, [("channel1", LARGE_VALUE)], "task1")
+
+        stored_types = [
+            (await fake_async_redis.hget(key, "type"))
+            for key in await fake_async_redis.keys("writes$*")
+        ]
+        assert stored_types == [b"msgpack+zlib"]
+        assert (await saver.aget_tuple(config)).pending_writes == [
+            ("task1", "channel1", LARGE_VALUE)
+        ]
@@ -0,0 +1,138 @@
+import asyncio
+
+import fakeredis
+import pytest
+import pytest_asyncio
+
+from agents.memory.conversation_lock import (
+    ConversationBusyError,
+    ConversationLock,
+    ConversationLockPolicy,
+    _make_redis_lock_key,
+)
+
+CONVERSATION_ID = "conversation-1"
+LEASE_TTL = 0.3
+POLL_INTERVAL = 0.01
+
+
+@pytest.mark.asyncio
+class TestConversationLock:
+    @pytest_asyncio.fixture
+    async def fake_async_redis(self):
+        async with fakeredis.FakeAsyncRedis() as client:
+            yield client
+
+    def create_lock(self, conn, policy, wait_timeout=1.0) -> ConversationLock:
+        return ConversationLock(
+            conn,
+            policy=policy,
+            lease_ttl=LEASE_TTL,
+            wait_timeout=wait_timeout,
+            poll_interval=POLL_INTERVAL,
+        )
+
+    async def test_fencing_tokens_increase(self, fake_async_redis):
+        lock = self.create_lock(fake_async_redis, ConversationLockPolicy.REJECT)
+
+        first_lease = await lock.acquire(CONVERSATION_ID)
+        await lock.release(first_lease)
+        second_lease = await lock.acquire(CONVERSATION_ID)
+
+        assert second_lease.fencing_token > first_lease.fencing_token
+        assert (await fake_async_redis.get(_make_redis_lock_key(CONVERSATION_ID))) == (
+            second_lease.value.encode()
+        )
+
+    async def test_reject_policy(self, fake_async_redis):
+        lock = self.create_lock(fake_async_redis, ConversationLockPolicy.REJECT)
+        await lock.acquire(CONVERSATION_ID)
+
+        with pytest.raises(ConversationBusyError):
+            await lock.acquire(CONVERSATION_ID)
+        # Other conversations are not affected.
+        assert await lock.acquire("conversation-2")
+
+    async def test_queue_policy_waits_for_release(self, fake_async_redis):
+        lock = self.create_lock(fake_async_redis, ConversationLockPolicy.QUEUE)
+        first_lease = await lock.acquire(CONVERSATION_ID)
+
+        waiting = asyncio.create_task(lock.acquire(CONVERSATION_ID))
+        await asyncio.sleep(POLL_INTERVAL * 3)
+        assert not waiting.done()
+        await lock.release(first_lease)
+
+        second_lease = await asyncio.wait_for(waiting, timeout=1)
+        assert second_lease.fencing_token > first_lease.fencing_token
+
+    async def test_queue_policy_timeout(self, fake_async_redis):
+        lock = self.create_lock(
+            fake_async_redis, ConversationLockPolicy.QUEUE, wait_timeout=0.05
+        )
+        await lock.acquire(CONVERSATION_ID)
+
+        with pytest.raises(ConversationBusyError):
+            await lock.acquire(CONVERSATION_ID)
+
+    async def test_expired_lease_cannot_be_renewed_or_released(self, fake_async_redis):
+        lock = self.create_lock(fake_async_redis, ConversationLockPolicy.REJECT)
+        expired_lease = await lock.acquire(CONVERSATION_ID)
+        await fake_async_redis.delete(_make_redis_lock_key(CONVERSATION_ID))
+        new_lease = await lock.acquire(CONVERSATION_ID)
+
+        assert not await lock.renew(expired_lease)
+        await lock.release(expired_lease)
+
+        assert await lock.renew(new_lease)
+        with pytest.raises(ConversationBusyError):
+            await lock.acquire(CONVERSATION_ID)
+
+    async def test_hold_renews_and_releases_lease(self, fake_async_redis):
+        lock = self.create_lock(fake_async_redis, ConversationLockPolicy.REJECT)
+        lease = await lock.acquire(CONVERSATION_ID)
+
+        async with lock.hold(lease):
+            await asyncio.sleep(LEASE_TTL * 2)
+            with pytest.raises(ConversationBusyError):
+                await lock.acquire(CONVERSATION_ID)
+
+        assert await lock.acquire(CONVERSATION_ID)
+
+    async def test_attach(self, fake_async_redis):
+        lock = self.create_lock(fake_async_redis, ConversationLockPolicy.ATTACH)
+        lease = await lock.acquire(CONVERSATION_ID)
+        chunks = [b"chunk1", b"chunk2", b"chunk3"]
+
+        async def run_request():
+            async with lock.hold(lease):
+                for chunk in chunks:
+                    await lock.publish(lease, chunk)
+                    await asyncio.sleep(POLL_INTERVAL)
+
+        with pytest.raises(ConversationBusyError):
+            await lock.acquire(CONVERSATION_ID)
+        request = asyncio.create_task(run_request())
+        attached_chunks = [chunk async for chunk in lock.attach(CONVERSATION_ID)]
+        await request
+
+        assert attached_chunks == chunks
+
+    async def test_attach_without_running_request(self, fake_async_redis):
+        lock = self.create_lock(fake_async_redis, ConversationLockPolicy.ATTACH)
+
+        assert [chunk async for chunk in lock.attach(CONVERSATION_ID)] == []
+
+    async def test_attach_ends_when_lease_is_lost(self, fake_async_redis):
+        lock = self.create_lock(fake_async_redis, ConversationLockPolicy.ATTACH)
+        lease = await lock.acquire(CONVERSATION_ID)
+        await lock.publish(lease, b"chunk1")
+
+        async def crash():
+            await asyncio.sleep(POLL_INTERVAL * 3)
+            await fake_async_redis.delete(_make_redis_lock_key(CONVERSATION_ID))
+
+        crashing = asyncio.create_task(crash())
+        attached_chunks = [chunk async for chunk in lock.attach(CONVERSATION_ID)]
+        await crashing
+
+        assert attached_chunks == [b"chunk1"]
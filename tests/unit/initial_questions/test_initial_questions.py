@@ -1,10 +1,12 @@
-from unittest.mock import Mock, patch
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 import tiktoken
 
 from agents.common.data import Message
 from initial_questions.inital_questions import InitialQuestionsHandler
+from services.k8s import NOT_RUNNING_PODS_FIELD_SELECTOR
 
 KEY = "key"
 LIST_NOT_RUNNING_PODS = "list_not_running_pods"
@@ -76,7 +78,7 @@ def test_generate_questions(mock_init):
 
 @pytest.fixture
 def mock_k8s_client():
-    mock = Mock()
+    mock = AsyncMock()
     mock.list_not_running_pods.return_value = [{KEY: LIST_NOT_RUNNING_PODS}, MOCK_DICT]
     mock.list_nodes_metrics.return_value = [{KEY: LIST_NODES_METRICS}, MOCK_DICT]
     mock.list_k8s_warning_events.return_value = [
@@ -90,6 +92,17 @@ def mock_k8s_client():
     ]
     mock.get_resource.return_value = {KEY: GET_RESOURCE}
     mock.describe_resource.return_value = {KEY: DESCRIBE_RESOURCE}
+
+    async def iter_resources(api_version, kind, namespace, field_selector=""):
+        marker = (
+            LIST_NOT_RUNNING_PODS
+            if field_selector == NOT_RUNNING_PODS_FIELD_SELECTOR
+            else LIST_K8S_WARNING_EVENTS
+        )
+        for item in [{KEY: marker}, MOCK_DICT]:
+            yield item
+
+    mock.iter_resources = Mock(side_effect=iter_resources)
     return mock
 
 
@@ -138,14 +151,155 @@ def mock_k8s_client():
         ),
     ],
 )
-def test_fetch_relevant_data_from_k8s_cluster(message, expected_calls, mock_k8s_client):
+@pytest.mark.asyncio
+async def test_fetch_relevant_data_from_k8s_cluster(
+    message, expected_calls, mock_k8s_client
+):
     # Given:
     mock_model = Mock()
     handler = InitialQuestionsHandler(model=mock_model)
 
     # When:
-    result = handler.fetch_relevant_data_from_k8s_cluster(message, mock_k8s_client)
+    result = await handler.fetch_relevant_data_from_k8s_cluster(
+        message, mock_k8s_client
+    )
 
     # Then:
     for call in expected_calls:
         assert call in result
+
+
+@pytest.mark.asyncio
+async def test_fetch_relevant_data_from_k8s_cluster_stops_at_token_limit():
+    # Given:
+    resources = [{KEY: f"pod-{i}"} for i in range(10)]
+    fetched = []
+
+    async def iter_resources(api_version, kind, namespace, field_selector=""):
+        for resource in resources:
+            fetched.append(resource)
+            yield resource
+
+    k8s_client = AsyncMock()
+    k8s_client.iter_resources = Mock(side_effect=iter_resources)
+    # Every resource is counted as 10 tokens.
+    tokenizer = Mock(encode=Mock(return_value=list(range(10))))
+    handler = InitialQuestionsHandler(model=Mock(), tokenizer=tokenizer)
+    message = Message(
+        query="test",
+        namespace="test-namespace",
+        resource_kind="namespace",
+        resource_name=None,
+        resource_api_version=None,
+    )
+
+    # When:
+    result = await handler.fetch_relevant_data_from_k8s_cluster(
+        message, k8s_client, token_limit=25
+    )
+
+    # Then:
+    assert len(fetched) == 3  # noqa: PLR2004
+    assert result == "key: pod-0\n---\nkey: pod-1\n---\nkey: pod-2\n"
+
+
+CLUSTER_MESSAGE = Message(
+    query="test",
+    namespace="",
+    resource_kind="cluster",
+    resource_name="",
+    resource_api_version="",
+)
+
+
+@pytest.mark.asyncio
+async def test_fetch_relevant_data_from_k8s_cluster_fetches_concurrently(
+    mock_k8s_client,
+):
+    # Given:
+    started = []
+    all_started = asyncio.Event()
+
+    async def list_nodes_metrics():
+        started.append(LIST_NODES_METRICS)
+        await asyncio.wait_for(all_started.wait(), timeout=1)
+        return [{KEY: LIST_NODES_METRICS}]
+
+    async def iter_resources(api_version, kind, namespace, field_selector=""):
+        started.append(field_selector)
+        if len(started) == 3:  # noqa: PLR2004
+            all_started.set()
+        await asyncio.wait_for(all_started.wait(), timeout=1)
+        yield {KEY: field_selector}
+
+    mock_k8s_client.list_nodes_metrics = list_nodes_metrics
+    mock_k8s_client.iter_resources = Mock(side_effect=iter_resources)
+    handler = InitialQuestionsHandler(model=Mock(), tokenizer=Mock())
+
+    # When:
+    result = await handler.fetch_relevant_data_from_k8s_cluster(
+        CLUSTER_MESSAGE, mock_k8s_client
+    )
+
+    # Then:
+    # every fetch waits until all fetches are started.
+    assert len(started) == 3  # noqa: PLR2004
+    assert LIST_NODES_METRICS in result
+    assert NOT_RUNNING_PODS_FIELD_SELECTOR in result
+
+
+@pytest.mark.parametrize(
+    "test_description, list_nodes_metrics, fetch_timeout",
+    [
+        (
+            "should skip failed fetches",
+            AsyncMock(side_effect=ValueError("failed")),
+            1,
+        ),
+        (
+            "should skip fetches exceeding the timeout",
+            AsyncMock(side_effect=lambda: asyncio.sleep(10)),
+            0.05,
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_fetch_relevant_data_from_k8s_cluster_returns_partial_data(
+    test_description, list_nodes_metrics, fetch_timeout, mock_k8s_client
+):
+    # Given:
+    mock_k8s_client.list_nodes_metrics = list_nodes_metrics
+    handler = InitialQuestionsHandler(
+        model=Mock(), tokenizer=Mock(), fetch_timeout=fetch_timeout
+    )
+
+    # When:
+    result = await handler.fetch_relevant_data_from_k8s_cluster(
+        CLUSTER_MESSAGE, mock_k8s_client
+    )
+
+    # Then:
+    assert LIST_NOT_RUNNING_PODS in result
+    assert LIST_K8S_WARNING_EVENTS in result
+    assert LIST_NODES_METRICS not in result
+
+
+@pytest.mark.asyncio
+async def test_fetch_relevant_data_from_k8s_cluster_raises_if_all_fetches_fail(
+    mock_k8s_client,
+):
+    # Given:
+    mock_k8s_client.describe_resource.side_effect = ValueError("not found")
+    mock_k8s_client.list_k8s_events_for_resource.side_effect = ValueError("failed")
+    handler = InitialQuestionsHandler(model=Mock(), tokenizer=Mock())
+    message = Message(
+        query="test",
+        namespace="test-namespace",
+        resource_kind="test-kind",
+        resource_name="test-name",
+        resource_api_version="v1",
+    )
+
+    # When/Then:
+    with pytest.raises(ValueError, match="not found"):
+        await handler.fetch_relevant_data_from_k8s_cluster(message, mock_k8s_client)
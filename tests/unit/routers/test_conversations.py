@@ -7,18 +7,23 @@ import pytest
 from fastapi.testclient import TestClient
 
 from agents.common.data import Message
+from agents.memory.conversation_lock import ConversationBusyError
 from main import app
 from routers.conversations import init_conversation_service
 from services.conversation import IService
 from services.k8s import IK8sClient
 
+BUSY_CONVERSATION_ID = "4"
+
 
 #
 class MockService(IService):
     def __init__(self, expected_error=None):
         self.expected_error = expected_error
 
-    def new_conversation(self, k8s_client: IK8sClient, message: Message) -> list[str]:
+    async def new_conversation(
+        self, k8s_client: IK8sClient, message: Message
+    ) -> list[str]:
         if self.expected_error:
             raise self.expected_error
         return ["Test question 1", "Test question 2", "Test question 3"]
@@ -37,6 +42,8 @@ class MockService(IService):
     ) -> AsyncGenerator[bytes, None]:
         if self.expected_error:
             raise self.expected_error
+        if conversation_id == BUSY_CONVERSATION_ID:
+            raise ConversationBusyError(conversation_id)
         yield (
             b'{"KymaAgent": {"messages": [{"content": '
             b'"To create an API Rule in Kyma to expose a service externally", "additional_kwargs": {}, '
@@ -118,6 +125,22 @@ def client_factory():
             },
             {"status_code": 422, "content-type": "application/json"},
         ),
+        (
+            {
+                "x-k8s-authorization": "non-empty-auth",
+                "x-cluster-url": "https://api.k8s.example.com",
+                "x-cluster-certificate-authority-data": "non-empty-ca-data",
+            },
+            BUSY_CONVERSATION_ID,
+            {
+                "query": "should return conflict when conversation is busy",
+                "resource_kind": "",
+                "resource_api_version": "",
+                "resource_name": "",
+                "namespace": "",
+            },
+            {"status_code": 409, "content-type": "application/json"},
+        ),
     ],
 )
 def test_messages_endpoint(
@@ -140,8 +163,11 @@ def test_messages_endpoint(
     assert response.status_code == expected_output["status_code"]
     assert response.headers["content-type"] == expected_output["content-type"]
 
-    if expected_output["status_code"] == HTTPStatus.UNPROCESSABLE_ENTITY:
-        # return if test case is to check for missing headers.
+    if expected_output["status_code"] in (
+        HTTPStatus.UNPROCESSABLE_ENTITY,
+        HTTPStatus.CONFLICT,
+    ):
+        # return if test case is to check for missing headers or a busy conversation.
         return
 
     content = response.content
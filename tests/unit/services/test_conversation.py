@@ -4,6 +4,11 @@ import pytest
 from langchain_core.messages import AIMessage
 
 from agents.common.data import Message
+from agents.memory.conversation_lock import (
+    ConversationBusyError,
+    ConversationLease,
+    ConversationLockPolicy,
+)
 from services.conversation import TOKEN_LIMIT, ConversationService
 from utils.models.factory import ModelType
 
@@ -57,7 +62,18 @@ class TestConversation:
     @pytest.fixture
     def mock_redis_saver(self):
         with patch("services.conversation.AsyncRedisSaver") as mock:
-            mock.from_conn_info.return_value = Mock()
+            mock.from_url.return_value = Mock()
+            yield mock
+
+    @pytest.fixture
+    def mock_conversation_lock(self):
+        with patch("services.conversation.ConversationLock") as mock:
+            mock.return_value.policy = ConversationLockPolicy.QUEUE
+            mock.return_value.acquire = AsyncMock(
+                return_value=ConversationLease(CONVERSATION_ID, "owner", 1)
+            )
+            mock.return_value.hold.return_value = AsyncMock()
+            mock.return_value.publish = AsyncMock()
             yield mock
 
     @pytest.fixture
@@ -66,7 +82,8 @@ class TestConversation:
         mock_config.sanitization_config = Mock()
         return mock_config
 
-    def test_new_conversation(
+    @pytest.mark.asyncio
+    async def test_new_conversation(
         self,
         mock_model_factory,
         mock_companion_graph,
@@ -75,7 +92,9 @@ class TestConversation:
     ) -> None:
         # Given:
         mock_handler = Mock()
-        mock_handler.fetch_relevant_data_from_k8s_cluster = Mock(return_value=POD_YAML)
+        mock_handler.fetch_relevant_data_from_k8s_cluster = AsyncMock(
+            return_value=POD_YAML
+        )
         mock_handler.apply_token_limit = Mock(return_value=POD_YAML)
         mock_handler.generate_questions = Mock(return_value=QUESTIONS)
         conversation_service = ConversationService(
@@ -86,14 +105,14 @@ class TestConversation:
         mock_k8s_client = Mock()
 
         # When:
-        result = conversation_service.new_conversation(
+        result = await conversation_service.new_conversation(
             k8s_client=mock_k8s_client, message=TEST_MESSAGE
         )
 
         # Then:
         assert result == QUESTIONS
         mock_handler.fetch_relevant_data_from_k8s_cluster.assert_called_once_with(
-            message=TEST_MESSAGE, k8s_client=mock_k8s_client
+            message=TEST_MESSAGE, k8s_client=mock_k8s_client, token_limit=TOKEN_LIMIT
         )
         mock_handler.apply_token_limit.assert_called_once_with(POD_YAML, TOKEN_LIMIT)
         mock_handler.generate_questions.assert_called_once_with(context=POD_YAML)
@@ -144,6 +163,7 @@ class TestConversation:
         mock_model_factory,
         mock_redis_saver,
         mock_companion_graph,
+        mock_conversation_lock,
         mock_config,
     ):
         # Given:
@@ -151,6 +171,7 @@ class TestConversation:
 
         # When:
         messaging_service = ConversationService(config=mock_config)
+        messaging_service._conversation_lock = mock_conversation_lock.return_value
 
         # Then:
         result = [
@@ -160,3 +181,52 @@ class TestConversation:
             )
         ]
         assert result == [b"chunk1", b"chunk2", b"chunk3"]
+        messaging_service._companion_graph.astream.assert_called_with(
+            CONVERSATION_ID, TEST_MESSAGE, mock_k8s_client, fencing_token=1
+        )
+        mock_conversation_lock.return_value.hold.assert_called_once()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "policy, expected_chunks",
+        [
+            (ConversationLockPolicy.REJECT, None),
+            (ConversationLockPolicy.ATTACH, [b"chunk1", b"chunk2"]),
+        ],
+    )
+    async def test_handle_request_busy_conversation(
+        self,
+        mock_model_factory,
+        mock_redis_saver,
+        mock_companion_graph,
+        mock_config,
+        policy,
+        expected_chunks,
+    ):
+        # Given:
+        mock_conversation_lock = Mock()
+        mock_conversation_lock.policy = policy
+        mock_conversation_lock.acquire = AsyncMock(
+            side_effect=ConversationBusyError(CONVERSATION_ID)
+        )
+        mock_conversation_lock.attach.return_value = AsyncMock()
+        mock_conversation_lock.attach.return_value.__aiter__.return_value = [
+            b"chunk1",
+            b"chunk2",
+        ]
+        messaging_service = ConversationService(
+            config=mock_config, conversation_lock=mock_conversation_lock
+        )
+        messaging_service._conversation_lock = mock_conversation_lock
+        messaging_service._companion_graph = Mock()
+
+        # When:
+        chunks = messaging_service.handle_request(CONVERSATION_ID, TEST_MESSAGE, Mock())
+
+        # Then:
+        if expected_chunks is None:
+            with pytest.raises(ConversationBusyError):
+                await anext(chunks)
+        else:
+            assert [chunk async for chunk in chunks] == expected_chunks
+        messaging_service._companion_graph.astream.assert_not_called()
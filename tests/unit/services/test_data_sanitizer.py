@@ -1,6 +1,17 @@
+import copy
+from concurrent.futures import Future
+from unittest.mock import Mock, patch
+
 import pytest
+import scrubadub
 
-from services.data_sanitizer import REDACTED_VALUE, DataSanitizer
+from services.data_sanitizer import (
+    CLEANED_STRINGS_CACHE_MAX_LENGTH,
+    REDACTED_VALUE,
+    DataSanitizer,
+    compile_keyword_matcher,
+)
+from services.pii_scrubber import FastPIIScrubber
 from utils.config import DataSanitizationConfig
 
 
@@ -1025,3 +1036,214 @@ class TestDataSanitizer:
         """Test sanitization of various Kubernetes resource types and edge cases."""
         sanitized = self.data_sanitizer.sanitize(test_data)
         assert sanitized == expected_results
+
+    def test_sanitize_does_not_modify_original(self):
+        """Test that only the changed parts are copied and the original is kept."""
+        pod = {
+            "kind": "Pod",
+            "metadata": {"name": "my-pod", "labels": {"app": "my-app"}},
+            "spec": {
+                "containers": [
+                    {
+                        "name": "app",
+                        "env": [{"name": "DB_PASSWORD", "value": "password123"}],
+                    }
+                ]
+            },
+            "status": {"message": "contact admin@example.com"},
+        }
+        config_map = {
+            "kind": "ConfigMap",
+            "metadata": {"name": "my-config"},
+            "data": {"password": "password123", "mode": "debug"},
+        }
+        original = copy.deepcopy([pod, config_map])
+
+        sanitized_pod, sanitized_config_map = self.data_sanitizer.sanitize(
+            [pod, config_map]
+        )
+
+        assert [pod, config_map] == original
+        assert sanitized_pod["spec"]["containers"][0]["env"][0]["value"] == (
+            REDACTED_VALUE
+        )
+        assert sanitized_pod["status"]["message"] == "contact {{EMAIL}}"
+        assert sanitized_config_map["data"]["password"] == REDACTED_VALUE
+        # unchanged parts are shared with the original.
+        assert sanitized_pod["metadata"] is pod["metadata"]
+        assert sanitized_config_map["metadata"] is config_map["metadata"]
+
+    @pytest.mark.parametrize(
+        "profile, expected_scrubber_type",
+        [("default", scrubadub.Scrubber), ("k8s-fast", FastPIIScrubber)],
+    )
+    def test_pii_detector_profiles(self, profile, expected_scrubber_type):
+        """Test that both PII detector profiles scrub values except of safe fields."""
+        DataSanitizer._instances = {}
+        data_sanitizer = DataSanitizer(
+            DataSanitizationConfig(pii_detector_profile=profile)
+        )
+        event = {
+            "kind": "Event",
+            "metadata": {"name": "my-event", "uid": "admin@example.com"},
+            "message": "contact admin@example.com",
+        }
+
+        sanitized = data_sanitizer.sanitize(event)
+
+        assert isinstance(data_sanitizer.scrubber, expected_scrubber_type)
+        assert sanitized["message"] == "contact {{EMAIL}}"
+        assert sanitized["metadata"] is event["metadata"]
+
+    def test_clean_string_memoizes_only_short_strings(self):
+        """Test that long strings are cleaned, but not kept for reuse."""
+        short_text = "contact admin@example.com"
+        long_text = short_text + " " * CLEANED_STRINGS_CACHE_MAX_LENGTH
+
+        assert self.data_sanitizer._clean_string(short_text) == "contact {{EMAIL}}"
+        assert self.data_sanitizer._clean_string(long_text).startswith(
+            "contact {{EMAIL}}"
+        )
+        assert self.data_sanitizer._clean_short_string.cache_info().currsize == 1
+
+    def test_sanitize_reuses_results_of_unchanged_objects(self):
+        """Test that unchanged K8s objects are not sanitized again."""
+        pod = {
+            "kind": "Pod",
+            "metadata": {"name": "my-pod", "uid": "123", "resourceVersion": "1"},
+            "status": {"message": "contact admin@example.com"},
+        }
+        updated_pod = {
+            **pod,
+            "metadata": {**pod["metadata"], "resourceVersion": "2"},
+        }
+
+        first = self.data_sanitizer.sanitize([pod])
+        second = self.data_sanitizer.sanitize(copy.deepcopy(pod))
+        updated = self.data_sanitizer.sanitize(updated_pod)
+
+        assert second is first[0]
+        assert updated is not first[0]
+        assert updated["status"]["message"] == "contact {{EMAIL}}"
+
+    def test_sanitize_distinguishes_api_versions(self):
+        """Test that a cached object of another apiVersion is not reused."""
+        api_rule = {
+            "apiVersion": "gateway.kyma-project.io/v1beta1",
+            "kind": "APIRule",
+            "metadata": {"name": "my-rule", "uid": "123", "resourceVersion": "1"},
+            "spec": {"host": "v1beta1.example.com"},
+        }
+        api_rule_v2 = {
+            **api_rule,
+            "apiVersion": "gateway.kyma-project.io/v2",
+            "spec": {"hosts": ["v2.example.com"]},
+        }
+
+        self.data_sanitizer.sanitize(api_rule)
+
+        assert self.data_sanitizer.sanitize(api_rule_v2) == api_rule_v2
+
+    def test_sanitize_without_cache(self):
+        """Test that objects are sanitized every time if the cache is disabled."""
+        DataSanitizer._instances = {}
+        data_sanitizer = DataSanitizer(cache_size=0)
+        config_map = {"kind": "ConfigMap", "data": {"password": "password123"}}
+
+        first = data_sanitizer.sanitize(config_map)
+
+        assert data_sanitizer.cache is None
+        assert data_sanitizer.sanitize(config_map) is not first
+
+    def test_sanitize_iter_is_lazy(self):
+        """Test that objects are consumed and sanitized one at a time."""
+        consumed = []
+
+        def objects():
+            for index in range(3):
+                consumed.append(index)
+                yield {"kind": "ConfigMap", "data": {"password": f"pass{index}"}}
+
+        sanitized = self.data_sanitizer.sanitize_iter(objects())
+
+        assert next(sanitized) == {
+            "kind": "ConfigMap",
+            "data": {"password": REDACTED_VALUE},
+        }
+        assert consumed == [0]
+        assert len(list(sanitized)) == 2  # noqa: PLR2004
+        assert consumed == [0, 1, 2]
+
+    @pytest.mark.parametrize(
+        "test_description, object_count, expected_pool_used",
+        [
+            ("should sanitize small lists locally", 3, False),
+            ("should sanitize large lists in the process pool", 5, True),
+        ],
+    )
+    def test_sanitize_with_process_pool(
+        self, test_description, object_count, expected_pool_used
+    ):
+        """Test that large lists are sanitized by the worker processes, keeping the order."""
+        DataSanitizer._instances = {}
+        data_sanitizer = DataSanitizer(
+            processes=2, parallel_min_items=4, chunk_size=2, max_in_flight_chunks=2
+        )
+        objects = [
+            {
+                "kind": "ConfigMap",
+                "metadata": {"name": f"config-{index}"},
+                "data": {"token": "t"},
+            }
+            for index in range(object_count)
+        ]
+
+        sanitized = data_sanitizer.sanitize(objects)
+
+        assert sanitized == [
+            {**obj, "data": {"token": REDACTED_VALUE}} for obj in objects
+        ]
+        assert (data_sanitizer._process_pool is not None) == expected_pool_used
+        if data_sanitizer._process_pool is not None:
+            data_sanitizer._process_pool.shutdown()
+
+    def test_sanitize_iter_bounds_in_flight_chunks(self):
+        """Test that at most max_in_flight_chunks chunks are submitted ahead of the consumer."""
+        DataSanitizer._instances = {}
+        data_sanitizer = DataSanitizer(
+            processes=2, parallel_min_items=2, chunk_size=2, max_in_flight_chunks=2
+        )
+        pool = Mock()
+
+        def submit(function, config, chunk):
+            future: Future = Future()
+            future.set_result([{"sanitized": obj["name"]} for obj in chunk])
+            return future
+
+        pool.submit.side_effect = submit
+        objects = [{"name": index} for index in range(10)]
+
+        with patch.object(data_sanitizer, "_get_process_pool", return_value=pool):
+            sanitized = data_sanitizer.sanitize_iter(objects)
+            assert next(sanitized) == {"sanitized": 0}
+            assert pool.submit.call_count == 2  # noqa: PLR2004
+            assert list(sanitized) == [{"sanitized": index} for index in range(1, 10)]
+
+
+@pytest.mark.parametrize(
+    "test_description, keywords, text, expected_result",
+    [
+        ("should match keyword case-insensitively", ["token"], "API_TOKEN", True),
+        ("should match any keyword", ["password", "secret"], "clientSecret", True),
+        ("should not match other text", ["password", "secret"], "name", False),
+        ("should escape keywords", ["user.name"], "username", False),
+        ("should never match without keywords", [], "password", False),
+        ("should never match with keywords unset", None, "password", False),
+    ],
+)
+def test_compile_keyword_matcher(test_description, keywords, text, expected_result):
+    matches = compile_keyword_matcher(keywords)
+
+    assert matches(text) == expected_result
+    # the decision is memoized.
+    assert matches(text) == expected_result
@@ -0,0 +1,144 @@
+import pytest
+
+from services.field_projector import TRUNCATED_SUFFIX, FieldProjector
+from utils.config import FieldProjectionConfig, FieldProjectionProfile
+
+POD = {
+    "kind": "Pod",
+    "metadata": {
+        "name": "my-pod",
+        "managedFields": [{"manager": "kubectl"}],
+        "annotations": {
+            "kubectl.kubernetes.io/last-applied-configuration": "{...}",
+            "app": "my-app",
+        },
+    },
+    "spec": {
+        "containers": [
+            {"name": "app", "env": [{"name": "A", "value": "a"}]},
+            {"name": "sidecar", "env": [{"name": "B", "value": "b"}]},
+        ]
+    },
+    "status": {"conditions": [{"type": str(i)} for i in range(12)]},
+}
+
+
+class TestFieldProjector:
+    def test_default_profile(self):
+        projector = FieldProjector()
+
+        result = projector.project(POD)
+
+        assert result["metadata"] == {
+            "name": "my-pod",
+            "annotations": {"app": "my-app"},
+        }
+        assert result["spec"] is POD["spec"]
+        # The last conditions are kept.
+        assert [c["type"] for c in result["status"]["conditions"]] == [
+            str(i) for i in range(2, 12)
+        ]
+        # The original object is not modified.
+        assert "managedFields" in POD["metadata"]
+        assert len(POD["status"]["conditions"]) == 12  # noqa: PLR2004
+
+    @pytest.mark.parametrize(
+        "test_description, config, data, kind, expected_result",
+        [
+            (
+                "should exclude fields in lists of a kind profile",
+                FieldProjectionConfig(
+                    kind_profiles={
+                        "Pod": FieldProjectionProfile(
+                            exclude_fields=["/spec/containers/env"]
+                        )
+                    }
+                ),
+                POD,
+                None,
+                {
+                    **POD,
+                    "spec": {"containers": [{"name": "app"}, {"name": "sidecar"}]},
+                },
+            ),
+            (
+                "should not apply a kind profile to other kinds",
+                FieldProjectionConfig(
+                    kind_profiles={
+                        "Pod": FieldProjectionProfile(exclude_fields=["/spec"])
+                    }
+                ),
+                {"kind": "Deployment", "spec": {"replicas": 1}},
+                None,
+                {"kind": "Deployment", "spec": {"replicas": 1}},
+            ),
+            (
+                "should use the given kind for objects without kind",
+                FieldProjectionConfig(
+                    kind_profiles={
+                        "Pod": FieldProjectionProfile(exclude_fields=["/spec"])
+                    }
+                ),
+                [{"metadata": {"name": "my-pod"}, "spec": {}}],
+                "Pod",
+                [{"metadata": {"name": "my-pod"}}],
+            ),
+            (
+                "should use the item kind for items of list objects",
+                FieldProjectionConfig(
+                    kind_profiles={
+                        "Pod": FieldProjectionProfile(exclude_fields=["/spec"])
+                    }
+                ),
+                {"kind": "PodList", "items": [{"spec": {}, "status": {}}]},
+                None,
+                {"kind": "PodList", "items": [{"status": {}}]},
+            ),
+            (
+                "should truncate long strings",
+                FieldProjectionConfig(
+                    default_profile=FieldProjectionProfile(max_string_length=10)
+                ),
+                {"kind": "ConfigMap", "data": {"a": "a" * 12, "b": ["b", "c" * 12]}},
+                None,
+                {
+                    "kind": "ConfigMap",
+                    "data": {
+                        "a": "a" * 10 + TRUNCATED_SUFFIX,
+                        "b": ["b", "c" * 10 + TRUNCATED_SUFFIX],
+                    },
+                },
+            ),
+            (
+                "should drop all items of lists with maximum length zero",
+                FieldProjectionConfig(
+                    default_profile=FieldProjectionProfile(
+                        max_list_lengths={"/status/conditions": 0}
+                    )
+                ),
+                {"kind": "Pod", "status": {"conditions": [{"type": "Ready"}]}},
+                None,
+                {"kind": "Pod", "status": {"conditions": []}},
+            ),
+        ],
+    )
+    def test_project(self, test_description, config, data, kind, expected_result):
+        projector = FieldProjector(config)
+
+        result = projector.project(data, kind)
+
+        assert result == expected_result
+
+    def test_project_invalid_pointer(self):
+        projector = FieldProjector(
+            FieldProjectionConfig(
+                default_profile=FieldProjectionProfile(exclude_fields=["metadata"])
+            )
+        )
+
+        with pytest.raises(ValueError, match="Invalid JSON pointer"):
+            projector.project({"kind": "Pod"})
+
+    def test_project_invalid_data(self):
+        with pytest.raises(ValueError):
+            FieldProjector().project("invalid")  # type: ignore
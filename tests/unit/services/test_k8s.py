@@ -1,9 +1,13 @@
+import asyncio
+import threading
 from http import HTTPStatus
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
-from services.k8s import K8sClient
+from services.k8s import K8sClient, K8sClientRegistry
+from services.k8s_cache import K8sResponseCache
+from services.k8s_discovery import APIResource, K8sDiscoveryCache
 
 
 def sample_k8s_secret():
@@ -48,6 +52,32 @@ def sample_k8s_pod():
     }
 
 
+def list_response(items: list[dict], continue_token: str = "", size: int = 100):
+    return Mock(
+        status_code=HTTPStatus.OK,
+        json=Mock(
+            return_value={"items": items, "metadata": {"continue": continue_token}}
+        ),
+        content=b"x" * size,
+    )
+
+
+def stream_response(lines: list[str], status_code: int = HTTPStatus.OK):
+    async def aiter_lines():
+        for line in lines:
+            yield line
+
+    response = Mock(
+        status_code=status_code,
+        text="\n".join(lines),
+        aread=AsyncMock(),
+        aiter_lines=aiter_lines,
+    )
+    context_manager = AsyncMock()
+    context_manager.__aenter__.return_value = response
+    return context_manager
+
+
 class TestK8sClient:
     @pytest.fixture
     def k8s_client(self):
@@ -55,6 +85,43 @@ class TestK8sClient:
             k8s_client = K8sClient()
             return k8s_client
 
+    @pytest.mark.parametrize(
+        "test_description, kwargs, expected_cache",
+        [
+            ("should create a response cache by default", {}, K8sResponseCache),
+            (
+                "should use the given response cache",
+                {"response_cache": K8sResponseCache(ttl=1)},
+                K8sResponseCache,
+            ),
+            (
+                "should disable the response cache",
+                {"response_cache_enabled": False},
+                type(None),
+            ),
+        ],
+    )
+    def test_response_cache_enabled(self, test_description, kwargs, expected_cache):
+        with patch.object(K8sClient, "_create_http_client"):
+            k8s_client = K8sClient("https://api.example.com", "token", "ca", **kwargs)
+
+        assert isinstance(k8s_client.response_cache, expected_cache)
+        if "response_cache" in kwargs:
+            assert k8s_client.response_cache is kwargs["response_cache"]
+
+    def test_shares_empty_discovery_cache(self):
+        discovery_cache = K8sDiscoveryCache()
+
+        with patch.object(K8sClient, "_create_http_client"):
+            k8s_client = K8sClient(
+                "https://api.example.com",
+                "token",
+                "ca",
+                discovery_cache=discovery_cache,
+            )
+
+        assert k8s_client.discovery_cache is discovery_cache
+
     @pytest.mark.parametrize(
         "test_description, given_ca_data, expected_result",
         [
@@ -124,24 +191,30 @@ class TestK8sClient:
             ),
         ],
     )
-    def test_get_api_request(
+    @pytest.mark.asyncio
+    async def test_get_api_request(
         self, k8s_client, test_description, data_sanitizer, raw_data, expected_result
     ):
         # given
         k8s_client.api_server = "https://api.example.com"
         k8s_client.user_token = "test-token"
-        k8s_client.ca_temp_filename = "test-ca-file"
         k8s_client.data_sanitizer = data_sanitizer
 
         response_mock = Mock(
             status_code=HTTPStatus.OK, json=Mock(return_value=raw_data)
         )
 
+        k8s_client.http_client = Mock(get=AsyncMock(return_value=response_mock))
+
         # when
-        with patch("requests.get", return_value=response_mock):
-            result = k8s_client.execute_get_api_request("/test/uri")
+        result = await k8s_client.execute_get_api_request("/test/uri")
 
         # then
+        k8s_client.http_client.get.assert_called_once_with(
+            url="https://api.example.com/test/uri",
+            headers=k8s_client._get_auth_headers(),
+            params=None,
+        )
         if data_sanitizer:
             data_sanitizer.sanitize.assert_called_once_with(raw_data)
         assert result == expected_result
@@ -163,25 +236,24 @@ class TestK8sClient:
             ),
         ],
     )
-    def test_list_resources(
+    @pytest.mark.asyncio
+    async def test_list_resources(
         self, k8s_client, test_description, data_sanitizer, raw_data, expected_result
     ):
         # given
         k8s_client.data_sanitizer = data_sanitizer
 
-        mock_resource = Mock()
-        mock_item = Mock()
-        mock_item.to_dict.return_value = raw_data[0]
-        mock_resource.items = [mock_item]
-
-        mock_dynamic_client = Mock()
-        mock_dynamic_client.resources.get.return_value.get.return_value = mock_resource
-        k8s_client.dynamic_client = mock_dynamic_client
+        k8s_client._get_resource_response = AsyncMock(
+            return_value=list_response(raw_data)
+        )
 
         # when
-        result = k8s_client.list_resources("v1", "Pod", "default")
+        result = await k8s_client.list_resources("v1", "Pod", "default")
 
         # then
+        k8s_client._get_resource_response.assert_called_once_with(
+            "v1", "Pod", namespace="default", params={"limit": "500"}
+        )
         if data_sanitizer:
             data_sanitizer.sanitize.assert_called_once_with(raw_data)
         assert result == expected_result
@@ -203,26 +275,51 @@ class TestK8sClient:
             ),
         ],
     )
-    def test_get_resource(
+    @pytest.mark.asyncio
+    async def test_get_resource(
         self, k8s_client, test_description, data_sanitizer, raw_data, expected_result
     ):
         # given
         k8s_client.data_sanitizer = data_sanitizer
 
-        mock_dynamic_client = Mock()
-        mock_dynamic_client.resources.get.return_value.get.return_value.to_dict.return_value = (
-            raw_data
-        )
-        k8s_client.dynamic_client = mock_dynamic_client
+        k8s_client._get_resource_json = AsyncMock(return_value=raw_data)
 
         # when
-        result = k8s_client.get_resource("v1", "Pod", "test-pod", "default")
+        result = await k8s_client.get_resource("v1", "Pod", "test-pod", "default")
 
         # then
+        k8s_client._get_resource_json.assert_called_once_with(
+            "v1", "Pod", "test-pod", "default"
+        )
         if data_sanitizer:
             data_sanitizer.sanitize.assert_called_once_with(raw_data)
         assert result == expected_result
 
+    @pytest.mark.asyncio
+    async def test_get_resource_projects_before_sanitizing(self, k8s_client):
+        # given
+        calls = []
+        k8s_client.field_projector = Mock(
+            project=Mock(
+                side_effect=lambda data, kind: calls.append("project")
+                or {"projected": kind}
+            )
+        )
+        k8s_client.data_sanitizer = Mock(
+            sanitize=Mock(side_effect=lambda data: calls.append("sanitize") or data)
+        )
+        k8s_client._get_resource_json = AsyncMock(return_value={"raw": "data"})
+
+        # when
+        result = await k8s_client.get_resource("v1", "Pod", "test-pod", "default")
+
+        # then
+        k8s_client.field_projector.project.assert_called_once_with(
+            {"raw": "data"}, "Pod"
+        )
+        assert calls == ["project", "sanitize"]
+        assert result == {"projected": "Pod"}
+
     @pytest.mark.parametrize(
         "test_description, data_sanitizer, raw_data, raw_events, expected_result",
         [
@@ -242,7 +339,8 @@ class TestK8sClient:
             ),
         ],
     )
-    def test_describe_resource(
+    @pytest.mark.asyncio
+    async def test_describe_resource(
         self,
         k8s_client,
         test_description,
@@ -264,13 +362,36 @@ class TestK8sClient:
             mock_list_events.return_value = raw_events
 
             # when
-            result = k8s_client.describe_resource("v1", "Pod", "test-pod", "default")
+            result = await k8s_client.describe_resource(
+                "v1", "Pod", "test-pod", "default"
+            )
 
         # then
         if data_sanitizer:
             data_sanitizer.sanitize.assert_called_once()
         assert result == expected_result
 
+    @pytest.mark.asyncio
+    async def test_describe_resource_sanitizes_off_the_event_loop(self, k8s_client):
+        # given
+        sanitizing_threads = []
+
+        def sanitize(data):
+            sanitizing_threads.append(threading.get_ident())
+            return data
+
+        k8s_client.data_sanitizer = Mock(sanitize=Mock(side_effect=sanitize))
+        k8s_client.get_resource = AsyncMock(return_value={"kind": "Pod"})
+        k8s_client.list_k8s_events_for_resource = AsyncMock(return_value=[])
+
+        # when
+        result = await k8s_client.describe_resource("v1", "Pod", "my-pod", "default")
+
+        # then
+        assert result == {"kind": "Pod", "events": []}
+        assert sanitizing_threads
+        assert threading.get_ident() not in sanitizing_threads
+
     @pytest.mark.parametrize(
         "test_description, data_sanitizer, raw_data, expected_result",
         [
@@ -288,25 +409,439 @@ class TestK8sClient:
             ),
         ],
     )
-    def test_list_k8s_events(
+    @pytest.mark.asyncio
+    async def test_list_k8s_events(
         self, k8s_client, test_description, data_sanitizer, raw_data, expected_result
     ):
         # given
         k8s_client.data_sanitizer = data_sanitizer
 
-        mock_resource = Mock()
-        mock_item = Mock()
-        mock_item.to_dict.return_value = raw_data[0]
-        mock_resource.items = [mock_item]
-
-        mock_dynamic_client = Mock()
-        mock_dynamic_client.resources.get.return_value.get.return_value = mock_resource
-        k8s_client.dynamic_client = mock_dynamic_client
+        k8s_client._get_resource_response = AsyncMock(
+            return_value=list_response(raw_data)
+        )
 
         # when
-        result = k8s_client.list_k8s_events("default")
+        result = await k8s_client.list_k8s_events("default")
 
         # then
+        k8s_client._get_resource_response.assert_called_once_with(
+            "v1", "Event", namespace="default", params={"limit": "500"}
+        )
         if data_sanitizer:
             data_sanitizer.sanitize.assert_called_once_with(raw_data)
         assert result == expected_result
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "test_description, is_terminated, limit_bytes, since_seconds, expected_params",
+        [
+            (
+                "should fetch logs of running container",
+                False,
+                None,
+                None,
+                {"container": "my-container", "tailLines": "10"},
+            ),
+            (
+                "should fetch logs of previous container if terminated",
+                True,
+                None,
+                None,
+                {"container": "my-container", "tailLines": "10", "previous": "true"},
+            ),
+            (
+                "should limit logs by time and not pass the byte limit to the API server",
+                False,
+                1024,
+                60,
+                {
+                    "container": "my-container",
+                    "tailLines": "10",
+                    "sinceSeconds": "60",
+                },
+            ),
+        ],
+    )
+    async def test_fetch_pod_logs(
+        self,
+        k8s_client,
+        test_description,
+        is_terminated,
+        limit_bytes,
+        since_seconds,
+        expected_params,
+    ):
+        # given
+        k8s_client.api_server = "https://api.example.com"
+        k8s_client.user_token = "test-token"
+        response_mock = stream_response(
+            ["line 1", "error 1", "error 2", "  at frame", "error 3", "  at frame"]
+        )
+        k8s_client.http_client = Mock(stream=Mock(return_value=response_mock))
+
+        # when
+        result = await k8s_client.fetch_pod_logs(
+            "my-pod",
+            "default",
+            "my-container",
+            is_terminated,
+            10,
+            limit_bytes=limit_bytes,
+            since_seconds=since_seconds,
+        )
+
+        # then
+        k8s_client.http_client.stream.assert_called_once_with(
+            "GET",
+            url="https://api.example.com/api/v1/namespaces/default/pods/my-pod/log",
+            headers=k8s_client._get_auth_headers(),
+            params=expected_params,
+        )
+        assert result == [
+            "line 1",
+            "error 1",
+            "[repeated 2 times] error 3",
+            "  at frame",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_fetch_pod_logs_keeps_newest_lines(self, k8s_client):
+        # given
+        k8s_client.api_server = "https://api.example.com"
+        k8s_client.user_token = "test-token"
+        response_mock = stream_response(["old line 1", "old line 2", "new", "newest"])
+        k8s_client.http_client = Mock(stream=Mock(return_value=response_mock))
+
+        # when
+        result = await k8s_client.fetch_pod_logs(
+            "my-pod", "default", "my-container", False, 10, limit_bytes=12
+        )
+
+        # then
+        assert result == ["new", "newest"]
+
+    @pytest.mark.asyncio
+    async def test_fetch_pod_logs_error(self, k8s_client):
+        # given
+        k8s_client.api_server = "https://api.example.com"
+        k8s_client.user_token = "test-token"
+        response_mock = stream_response([], status_code=HTTPStatus.NOT_FOUND)
+        k8s_client.http_client = Mock(stream=Mock(return_value=response_mock))
+
+        # when/then
+        with pytest.raises(ValueError, match="Failed to fetch logs for pod my-pod"):
+            await k8s_client.fetch_pod_logs(
+                "my-pod", "default", "my-container", False, 10
+            )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "test_description, status_code, expect_invalidated",
+        [
+            ("should keep discovery on success", HTTPStatus.OK, False),
+            ("should invalidate discovery on not found", HTTPStatus.NOT_FOUND, True),
+        ],
+    )
+    async def test_get_resource_json(
+        self, k8s_client, test_description, status_code, expect_invalidated
+    ):
+        # given
+        k8s_client.api_server = "https://api.example.com"
+        k8s_client.user_token = "test-token"
+        k8s_client.discovery_cache = Mock(
+            get_resource=AsyncMock(
+                return_value=APIResource("apps/v1", "Deployment", "deployments", True)
+            )
+        )
+        response_mock = Mock(
+            status_code=status_code, json=Mock(return_value={"kind": "Deployment"})
+        )
+        k8s_client.http_client = Mock(get=AsyncMock(return_value=response_mock))
+
+        # when
+        if expect_invalidated:
+            with pytest.raises(ValueError):
+                await k8s_client._get_resource_json(
+                    "apps/v1", "Deployment", "my-app", "default"
+                )
+        else:
+            result = await k8s_client._get_resource_json(
+                "apps/v1", "Deployment", "my-app", "default"
+            )
+            assert result == {"kind": "Deployment"}
+
+        # then
+        k8s_client.http_client.get.assert_called_once_with(
+            url="https://api.example.com/apis/apps/v1/namespaces/default/deployments/my-app",
+            headers=k8s_client._get_auth_headers(),
+            params=None,
+        )
+        if expect_invalidated:
+            k8s_client.discovery_cache.invalidate.assert_called_once_with(
+                "https://api.example.com", "apps/v1"
+            )
+        else:
+            k8s_client.discovery_cache.invalidate.assert_not_called()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "test_description, method, args, expected_kind, expected_field_selector",
+        [
+            (
+                "should list not running pods",
+                "list_not_running_pods",
+                ("default",),
+                "Pod",
+                "status.phase!=Running",
+            ),
+            (
+                "should list warning events",
+                "list_k8s_warning_events",
+                ("default",),
+                "Event",
+                "type=Warning",
+            ),
+            (
+                "should list events of a resource",
+                "list_k8s_events_for_resource",
+                ("Deployment", "my-app", "default"),
+                "Event",
+                "involvedObject.kind=Deployment,involvedObject.name=my-app",
+            ),
+        ],
+    )
+    async def test_list_with_field_selector(
+        self,
+        k8s_client,
+        test_description,
+        method,
+        args,
+        expected_kind,
+        expected_field_selector,
+    ):
+        # given
+        k8s_client.data_sanitizer = None
+        items = [{"kind": expected_kind}]
+        k8s_client._get_resource_response = AsyncMock(return_value=list_response(items))
+
+        # when
+        result = await getattr(k8s_client, method)(*args)
+
+        # then
+        # the filtering is done by the API server.
+        k8s_client._get_resource_response.assert_called_once_with(
+            "v1",
+            expected_kind,
+            namespace="default",
+            params={"limit": "500", "fieldSelector": expected_field_selector},
+        )
+        assert result == items
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "test_description, max_items, max_bytes, expected_names, expected_requests",
+        [
+            ("should fetch all pages", 100, 1000, ["a", "b", "c", "d", "e"], 3),
+            ("should stop after max items", 3, 1000, ["a", "b", "c"], 2),
+            ("should stop after max bytes", 100, 150, ["a", "b", "c", "d"], 2),
+        ],
+    )
+    async def test_iter_resources(
+        self,
+        k8s_client,
+        test_description,
+        max_items,
+        max_bytes,
+        expected_names,
+        expected_requests,
+    ):
+        # given
+        data_sanitizer = Mock(sanitize=Mock(side_effect=lambda items: items))
+        k8s_client.data_sanitizer = data_sanitizer
+        pages = [
+            list_response([{"name": "a"}, {"name": "b"}], continue_token="token1"),
+            list_response([{"name": "c"}, {"name": "d"}], continue_token="token2"),
+            list_response([{"name": "e"}]),
+        ]
+        continue_tokens = []
+
+        async def get_resource_response(*args, params, **kwargs):
+            continue_tokens.append(params.get("continue"))
+            return pages[len(continue_tokens) - 1]
+
+        k8s_client._get_resource_response = get_resource_response
+
+        # when
+        result = [
+            item
+            async for item in k8s_client.iter_resources(
+                "v1",
+                "Pod",
+                "",
+                page_size=2,
+                max_items=max_items,
+                max_bytes=max_bytes,
+            )
+        ]
+
+        # then
+        assert [item["name"] for item in result] == expected_names
+        assert continue_tokens == [None, "token1", "token2"][:expected_requests]
+        # every page is sanitized on its own.
+        assert data_sanitizer.sanitize.call_count == expected_requests
+
+    @pytest.mark.asyncio
+    async def test_response_cache(self, k8s_client):
+        # given
+        k8s_client.response_cache = K8sResponseCache(ttl=10)
+        k8s_client.data_sanitizer = Mock(sanitize=Mock(side_effect=lambda data: data))
+        k8s_client._get_json = AsyncMock(return_value={"kind": "PodList"})
+        k8s_client._get_resource_json = AsyncMock(return_value=sample_k8s_pod())
+        k8s_client._get_resource_response = AsyncMock(
+            return_value=list_response([{"kind": "Event"}])
+        )
+
+        # when
+        for _ in range(2):
+            await k8s_client.execute_get_api_request("api/v1/pods")
+            await k8s_client.get_resource("v1", "Pod", "my-pod", "default")
+            await k8s_client.list_k8s_events("default")
+
+        # then
+        # identical requests are sent and sanitized once.
+        k8s_client._get_json.assert_called_once()
+        k8s_client._get_resource_json.assert_called_once()
+        k8s_client._get_resource_response.assert_called_once()
+        assert k8s_client.data_sanitizer.sanitize.call_count == 3  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_describe_resource_does_not_modify_cached_events(self, k8s_client):
+        # given
+        k8s_client.response_cache = K8sResponseCache(ttl=10)
+        k8s_client.data_sanitizer = None
+        events = [{"involvedObject": {"name": "my-pod"}, "reason": "Failed"}]
+        k8s_client._get_resource_json = AsyncMock(return_value=sample_k8s_pod())
+        k8s_client._get_resource_response = AsyncMock(
+            return_value=list_response(events)
+        )
+
+        # when
+        first = await k8s_client.describe_resource("v1", "Pod", "my-pod", "default")
+        second = await k8s_client.describe_resource("v1", "Pod", "my-pod", "default")
+
+        # then
+        assert first["events"] == second["events"] == [{"reason": "Failed"}]
+        assert "involvedObject" in events[0]
+
+
+class TestK8sClientRegistry:
+    @pytest.fixture
+    def mock_k8s_client_class(self):
+        with patch(
+            "services.k8s.K8sClient",
+            side_effect=lambda **kwargs: Mock(aclose=AsyncMock(), **kwargs),
+        ) as mock_class:
+            yield mock_class
+
+    def test_get_client_reuses_client(self, mock_k8s_client_class):
+        data_sanitizer = Mock()
+        registry = K8sClientRegistry(data_sanitizer=data_sanitizer)
+
+        first_client = registry.get_client("https://api1", "token", "ca")
+        second_client = registry.get_client("https://api1", "token", "ca")
+
+        assert first_client is second_client
+        mock_k8s_client_class.assert_called_once_with(
+            api_server="https://api1",
+            user_token="token",
+            certificate_authority_data="ca",
+            data_sanitizer=data_sanitizer,
+            discovery_cache=registry.discovery_cache,
+            field_projector=None,
+        )
+
+    @pytest.mark.parametrize(
+        "test_description, other_credentials",
+        [
+            ("different API server", ("https://api2", "token", "ca")),
+            ("different user token", ("https://api1", "other-token", "ca")),
+            ("different certificate authority", ("https://api1", "token", "other-ca")),
+        ],
+    )
+    def test_get_client_keys_by_credentials(
+        self, mock_k8s_client_class, test_description, other_credentials
+    ):
+        registry = K8sClientRegistry()
+
+        first_client = registry.get_client("https://api1", "token", "ca")
+        other_client = registry.get_client(*other_credentials)
+
+        assert first_client is not other_client
+        assert len(registry) == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_get_client_recreates_expired_client(self, mock_k8s_client_class):
+        registry = K8sClientRegistry(ttl=10)
+
+        with patch("services.k8s.time.monotonic", return_value=100):
+            first_client = registry.get_client("https://api1", "token", "ca")
+        with patch("services.k8s.time.monotonic", return_value=105):
+            assert registry.get_client("https://api1", "token", "ca") is first_client
+        with patch("services.k8s.time.monotonic", return_value=111):
+            assert (
+                registry.get_client("https://api1", "token", "ca") is not first_client
+            )
+
+    @pytest.mark.asyncio
+    async def test_get_client_evicts_least_recently_used_client(
+        self, mock_k8s_client_class
+    ):
+        registry = K8sClientRegistry(max_size=2)
+
+        first_client = registry.get_client("https://api1", "token", "ca")
+        second_client = registry.get_client("https://api2", "token", "ca")
+        # Use the first client, so the second one is evicted.
+        registry.get_client("https://api1", "token", "ca")
+        registry.get_client("https://api3", "token", "ca")
+
+        assert len(registry) == 2  # noqa: PLR2004
+        assert registry.get_client("https://api1", "token", "ca") is first_client
+        assert registry.get_client("https://api2", "token", "ca") is not second_client
+
+    @pytest.mark.asyncio
+    async def test_release_client_closes_evicted_client(self, mock_k8s_client_class):
+        registry = K8sClientRegistry(max_size=1)
+        first_client = registry.get_client("https://api1", "token", "ca")
+        registry.get_client("https://api1", "token", "ca")
+
+        # Evict the first client, which is still used by two requests.
+        second_client = registry.get_client("https://api2", "token", "ca")
+        registry.release_client(first_client)
+        await asyncio.sleep(0)
+        first_client.aclose.assert_not_awaited()
+
+        registry.release_client(first_client)
+        await asyncio.gather(*registry._closing_tasks)
+        first_client.aclose.assert_awaited_once()
+        # Clients in the registry are kept open.
+        registry.release_client(second_client)
+        await asyncio.sleep(0)
+        second_client.aclose.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_get_client_closes_unused_expired_and_evicted_clients(
+        self, mock_k8s_client_class
+    ):
+        registry = K8sClientRegistry(max_size=1, ttl=10)
+        with patch("services.k8s.time.monotonic", return_value=100):
+            expired_client = registry.get_client("https://api1", "token", "ca")
+        registry.release_client(expired_client)
+
+        with patch("services.k8s.time.monotonic", return_value=111):
+            evicted_client = registry.get_client("https://api1", "token", "ca")
+            registry.release_client(evicted_client)
+            registry.get_client("https://api2", "token", "ca")
+        await asyncio.gather(*registry._closing_tasks)
+
+        expired_client.aclose.assert_awaited_once()
+        evicted_client.aclose.assert_awaited_once()
@@ -0,0 +1,106 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from services.k8s_cache import K8sResponseCache, get_resource_version
+
+
+def pod(resource_version: str) -> dict:
+    return {"kind": "Pod", "metadata": {"resourceVersion": resource_version}}
+
+
+@pytest.mark.parametrize(
+    "test_description, data, expected_result",
+    [
+        ("should get resourceVersion of an object", pod("42"), "42"),
+        ("should return None without metadata", {"kind": "Pod"}, None),
+        ("should return None for empty resourceVersion", pod(""), None),
+        ("should return None for lists", [pod("42")], None),
+    ],
+)
+def test_get_resource_version(test_description, data, expected_result):
+    assert get_resource_version(data) == expected_result
+
+
+@pytest.mark.asyncio
+class TestK8sResponseCache:
+    async def test_get_caches_processed_response(self):
+        cache = K8sResponseCache(ttl=10)
+        fetch = AsyncMock(return_value=pod("1"))
+        process = Mock(side_effect=lambda response: {"processed": response})
+
+        first = await cache.get("key", fetch, process)
+        second = await cache.get("key", fetch, process)
+        await cache.get("other-key", fetch, process)
+
+        assert first is second
+        assert fetch.call_count == 2  # noqa: PLR2004
+        assert process.call_count == 2  # noqa: PLR2004
+
+    async def test_get_coalesces_concurrent_requests(self):
+        cache = K8sResponseCache(ttl=10)
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return pod("1")
+
+        fetch_mock = AsyncMock(side_effect=fetch)
+        requests = [
+            asyncio.create_task(cache.get("key", fetch_mock, lambda r: r))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*requests)
+
+        assert fetch_mock.call_count == 1
+        assert results == [pod("1")] * 3
+
+    async def test_get_shares_and_does_not_cache_errors(self):
+        cache = K8sResponseCache(ttl=10)
+        fetch = AsyncMock(side_effect=[ValueError("failed"), pod("1")])
+
+        with pytest.raises(ValueError, match="failed"):
+            await cache.get("key", fetch, lambda r: r)
+
+        assert await cache.get("key", fetch, lambda r: r) == pod("1")
+        assert fetch.call_count == 2  # noqa: PLR2004
+
+    @pytest.mark.parametrize(
+        "test_description, new_resource_version, expected_process_calls",
+        [
+            ("should reuse value of unchanged resource", "1", 1),
+            ("should process changed resource", "2", 2),
+        ],
+    )
+    async def test_get_revalidates_expired_entries(
+        self, test_description, new_resource_version, expected_process_calls
+    ):
+        cache = K8sResponseCache(ttl=10)
+        fetch = AsyncMock(side_effect=[pod("1"), pod(new_resource_version)])
+        process = Mock(side_effect=lambda response: dict(response))
+
+        with patch("services.k8s_cache.time.monotonic", return_value=100):
+            await cache.get("key", fetch, process)
+        with patch("services.k8s_cache.time.monotonic", return_value=111):
+            result = await cache.get("key", fetch, process)
+
+        # expired entries are fetched again.
+        assert fetch.call_count == 2  # noqa: PLR2004
+        assert process.call_count == expected_process_calls
+        assert result == pod(new_resource_version)
+
+    async def test_get_evicts_least_recently_used(self):
+        cache = K8sResponseCache(ttl=10, max_size=2)
+        fetch = AsyncMock(return_value=pod("1"))
+
+        await cache.get("a", fetch, lambda r: r)
+        await cache.get("b", fetch, lambda r: r)
+        await cache.get("a", fetch, lambda r: r)
+        await cache.get("c", fetch, lambda r: r)
+        await cache.get("a", fetch, lambda r: r)
+
+        assert len(cache) == 2  # noqa: PLR2004
+        assert fetch.call_count == 3  # noqa: PLR2004
@@ -0,0 +1,133 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from services.k8s_discovery import APIResource, K8sDiscoveryCache
+
+API_SERVER = "https://api.example.com"
+
+CORE_V1_RESOURCES = {
+    "kind": "APIResourceList",
+    "groupVersion": "v1",
+    "resources": [
+        {"name": "pods", "kind": "Pod", "namespaced": True},
+        {"name": "pods/log", "kind": "Pod", "namespaced": True},
+        {"name": "nodes", "kind": "Node", "namespaced": False},
+    ],
+}
+
+APPS_V1_RESOURCES = {
+    "kind": "APIResourceList",
+    "groupVersion": "apps/v1",
+    "resources": [
+        {"name": "deployments", "kind": "Deployment", "namespaced": True},
+        {"name": "deployments/scale", "kind": "Scale", "namespaced": True},
+    ],
+}
+
+
+class TestAPIResource:
+    @pytest.mark.parametrize(
+        "test_description, resource, name, namespace, expected_path",
+        [
+            (
+                "should return path of core resources in a namespace",
+                APIResource("v1", "Pod", "pods", True),
+                "",
+                "default",
+                "/api/v1/namespaces/default/pods",
+            ),
+            (
+                "should return path of core resources in all namespaces",
+                APIResource("v1", "Pod", "pods", True),
+                "",
+                "",
+                "/api/v1/pods",
+            ),
+            (
+                "should return path of a named group resource",
+                APIResource("apps/v1", "Deployment", "deployments", True),
+                "my-app",
+                "default",
+                "/apis/apps/v1/namespaces/default/deployments/my-app",
+            ),
+            (
+                "should ignore namespace of cluster-scoped resources",
+                APIResource("v1", "Node", "nodes", False),
+                "node-1",
+                "default",
+                "/api/v1/nodes/node-1",
+            ),
+        ],
+    )
+    def test_path(self, test_description, resource, name, namespace, expected_path):
+        assert resource.path(name=name, namespace=namespace) == expected_path
+
+
+@pytest.mark.asyncio
+class TestK8sDiscoveryCache:
+    @pytest.fixture
+    def fetch(self):
+        return AsyncMock(
+            side_effect=lambda uri: (
+                CORE_V1_RESOURCES if uri == "/api/v1" else APPS_V1_RESOURCES
+            )
+        )
+
+    async def test_get_resource_discovers_group_version_once(self, fetch):
+        cache = K8sDiscoveryCache()
+
+        pod = await cache.get_resource(API_SERVER, "v1", "Pod", fetch)
+        node = await cache.get_resource(API_SERVER, "v1", "Node", fetch)
+        deployment = await cache.get_resource(
+            API_SERVER, "apps/v1", "Deployment", fetch
+        )
+
+        # Subresources do not override their parent kind.
+        assert pod == APIResource("v1", "Pod", "pods", True)
+        assert node == APIResource("v1", "Node", "nodes", False)
+        assert deployment == APIResource("apps/v1", "Deployment", "deployments", True)
+        assert [call.args[0] for call in fetch.call_args_list] == [
+            "/api/v1",
+            "/apis/apps/v1",
+        ]
+
+    async def test_get_resource_is_shared_per_api_server(self, fetch):
+        cache = K8sDiscoveryCache()
+
+        await cache.get_resource(API_SERVER, "v1", "Pod", fetch)
+        await cache.get_resource(API_SERVER, "v1", "Pod", AsyncMock())
+        await cache.get_resource("https://other.example.com", "v1", "Pod", fetch)
+
+        assert fetch.call_count == 2  # noqa: PLR2004
+        assert len(cache) == 2  # noqa: PLR2004
+
+    async def test_get_resource_unknown_kind(self, fetch):
+        cache = K8sDiscoveryCache()
+
+        with pytest.raises(ValueError, match="Function"):
+            await cache.get_resource(API_SERVER, "v1", "Function", fetch)
+
+        # The group version is discovered again, as the kind may be new.
+        assert fetch.call_count == 2  # noqa: PLR2004
+
+    async def test_get_resource_discovers_again_after_ttl(self, fetch):
+        cache = K8sDiscoveryCache(ttl=10)
+
+        with patch("services.k8s_discovery.time.monotonic", return_value=100):
+            await cache.get_resource(API_SERVER, "v1", "Pod", fetch)
+        with patch("services.k8s_discovery.time.monotonic", return_value=105):
+            await cache.get_resource(API_SERVER, "v1", "Pod", fetch)
+        assert fetch.call_count == 1
+        with patch("services.k8s_discovery.time.monotonic", return_value=111):
+            await cache.get_resource(API_SERVER, "v1", "Pod", fetch)
+        assert fetch.call_count == 2  # noqa: PLR2004
+
+    async def test_invalidate(self, fetch):
+        cache = K8sDiscoveryCache()
+        await cache.get_resource(API_SERVER, "v1", "Pod", fetch)
+
+        cache.invalidate(API_SERVER, "v1")
+        await cache.get_resource(API_SERVER, "v1", "Pod", fetch)
+
+        assert fetch.call_count == 2  # noqa: PLR2004
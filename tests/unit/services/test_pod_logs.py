@@ -0,0 +1,137 @@
+import pytest
+
+from services.pod_logs import PodLogCompactor, PodLogTail, get_log_template
+
+
+@pytest.mark.parametrize(
+    "test_description, text, expected_template",
+    [
+        (
+            "should replace timestamps and numbers",
+            "2024-10-01T12:00:00Z retry 3 failed after 250ms",
+            "<*>-<*>-<*>T<*>:<*>:<*>Z retry <*> failed after <*>ms",
+        ),
+        (
+            "should replace IDs",
+            "request 0b8e7c1a-4f0d-4e9a-8d7c-1a2b3c4d5e6f of pod app-7f9c4d failed",
+            "request <*> of pod app-<*> failed",
+        ),
+        (
+            "should keep words",
+            "connection refused",
+            "connection refused",
+        ),
+    ],
+)
+def test_get_log_template(test_description, text, expected_template):
+    assert get_log_template(text) == expected_template
+
+
+@pytest.mark.parametrize(
+    "test_description, lines, expected_lines",
+    [
+        (
+            "should keep distinct lines",
+            ["starting", "listening on port 8080", ""],
+            ["starting", "listening on port 8080"],
+        ),
+        (
+            "should collapse lines differing in variable parts",
+            [
+                "10:00:01 connection to db failed",
+                "10:00:02 connection to db failed",
+                "10:00:03 ready",
+                "10:00:04 connection to db failed",
+            ],
+            [
+                "10:00:03 ready",
+                "[repeated 3 times] 10:00:04 connection to db failed",
+            ],
+        ),
+        (
+            "should keep collapsed entries at their last occurrence",
+            [
+                "connection lost 1",
+                "retrying",
+                "connection lost 2",
+                "ready",
+                "serving request 1",
+                "serving request 2",
+            ],
+            [
+                "retrying",
+                "[repeated 2 times] connection lost 2",
+                "ready",
+                "[repeated 2 times] serving request 2",
+            ],
+        ),
+        (
+            "should collapse stack traces",
+            [
+                "Exception in thread main: timeout",
+                "    at Client.call(Client.java:12)",
+                "Caused by: java.net.SocketTimeoutException",
+                "... 3 more",
+                "Exception in thread main: timeout",
+                "    at Client.call(Client.java:12)",
+                "Caused by: java.net.SocketTimeoutException",
+                "... 3 more",
+                "Exception in thread main: timeout",
+                "    at Client.retry(Client.java:20)",
+            ],
+            [
+                "[repeated 2 times] Exception in thread main: timeout",
+                "    at Client.call(Client.java:12)",
+                "Caused by: java.net.SocketTimeoutException",
+                "... 3 more",
+                "Exception in thread main: timeout",
+                "    at Client.retry(Client.java:20)",
+            ],
+        ),
+    ],
+)
+def test_pod_log_compactor(test_description, lines, expected_lines):
+    compactor = PodLogCompactor()
+
+    for line in lines:
+        compactor.add(line)
+
+    assert compactor.lines() == expected_lines
+
+
+@pytest.mark.parametrize(
+    "test_description, limit_bytes, lines, expected_lines",
+    [
+        (
+            "should keep all lines without limit",
+            None,
+            ["first", "second"],
+            ["first", "second"],
+        ),
+        (
+            "should drop the oldest lines beyond the limit",
+            11,
+            ["first", "second", "third"],
+            ["second", "third"],
+        ),
+        (
+            "should keep the end of a line exceeding the limit",
+            5,
+            ["first", "a very long line"],
+            [" line"],
+        ),
+        (
+            "should not split multi-byte characters",
+            5,
+            ["größer"],
+            ["ßer"],
+        ),
+    ],
+)
+def test_pod_log_tail(test_description, limit_bytes, lines, expected_lines):
+    tail = PodLogTail(limit_bytes)
+
+    for line in lines:
+        tail.add(line)
+
+    assert tail.lines() == expected_lines
@@ -0,0 +1,132 @@
+import pytest
+
+from services.sanitization_cache import (
+    OBJECT_OVERHEAD_BYTES,
+    SanitizationCache,
+    estimate_size,
+    get_object_cache_key,
+)
+
+
+def pod(resource_version: str = "1", **fields) -> dict:
+    return {
+        "kind": "Pod",
+        "metadata": {
+            "name": "my-pod",
+            "uid": "123",
+            "resourceVersion": resource_version,
+        },
+        **fields,
+    }
+
+
+@pytest.mark.parametrize(
+    "test_description, first, second, expected_equal",
+    [
+        (
+            "should identify K8s objects by uid and resourceVersion",
+            pod(status={"phase": "Running"}),
+            pod(status={"phase": "Pending"}),
+            True,
+        ),
+        (
+            "should distinguish apiVersions",
+            pod(apiVersion="gateway.kyma-project.io/v1beta1"),
+            pod(apiVersion="gateway.kyma-project.io/v2"),
+            False,
+        ),
+        (
+            "should distinguish resourceVersions",
+            pod("1"),
+            pod("2"),
+            False,
+        ),
+    ],
+)
+def test_get_object_cache_key(test_description, first, second, expected_equal):
+    assert (get_object_cache_key(first) == get_object_cache_key(second)) == (
+        expected_equal
+    )
+
+
+@pytest.mark.parametrize(
+    "test_description, obj",
+    [
+        (
+            "should not cache objects without uid",
+            {"kind": "ConfigMap", "metadata": {"resourceVersion": "1"}},
+        ),
+        (
+            "should not cache objects without resourceVersion",
+            {"kind": "ConfigMap", "metadata": {"uid": "123"}},
+        ),
+        ("should not cache objects without metadata", {"kind": "PodList"}),
+        (
+            "should not cache objects with other top-level fields",
+            pod(events=[{"reason": "Failed"}]),
+        ),
+    ],
+)
+def test_get_object_cache_key_returns_none(test_description, obj):
+    assert get_object_cache_key(obj) is None
+
+
+@pytest.mark.parametrize(
+    "test_description, value, expected_size",
+    [
+        ("should count the characters of strings", "abc", OBJECT_OVERHEAD_BYTES + 3),
+        ("should count other scalars", 42, OBJECT_OVERHEAD_BYTES),
+        (
+            "should count keys and values of nested objects",
+            {"data": ["ab", None]},
+            # dict, key, list, string and None
+            5 * OBJECT_OVERHEAD_BYTES + len("data") + len("ab"),
+        ),
+    ],
+)
+def test_estimate_size(test_description, value, expected_size):
+    assert estimate_size(value) == expected_size
+
+
+class TestSanitizationCache:
+    def test_get_returns_cached_object(self):
+        cache = SanitizationCache()
+        value = {"sanitized": True}
+
+        cache.put("key", value)
+
+        assert cache.get("key") is value
+        assert cache.get("other-key") is None
+
+    def test_put_evicts_least_recently_used_beyond_max_entries(self):
+        cache = SanitizationCache(max_entries=2)
+
+        cache.put("a", {"value": 1})
+        cache.put("b", {"value": 2})
+        cache.get("a")
+        cache.put("c", {"value": 3})
+
+        assert len(cache) == 2  # noqa: PLR2004
+        assert cache.get("b") is None
+        assert cache.get("a") == {"value": 1}
+
+    def test_put_evicts_least_recently_used_beyond_max_bytes(self):
+        value_size = estimate_size({"data": "x" * 100})
+        cache = SanitizationCache(max_bytes=2 * value_size)
+
+        cache.put("a", {"data": "a" * 100})
+        cache.put("b", {"data": "b" * 100})
+        cache.put("c", {"data": "c" * 100})
+
+        assert len(cache) == 2  # noqa: PLR2004
+        assert cache.size_bytes == 2 * value_size
+        assert cache.get("a") is None
+
+    def test_put_skips_objects_larger_than_max_bytes(self):
+        cache = SanitizationCache(max_bytes=1024)
+        cache.put("small", {"data": "small"})
+
+        cache.put("large", {"data": "x" * 1024})
+
+        assert cache.get("large") is None
+        assert cache.get("small") == {"data": "small"}
@@ -3,7 +3,14 @@ from unittest.mock import mock_open, patch
 
 import pytest
 
-from utils.config import Config, DataSanitizationConfig, ModelConfig, get_config
+from utils.config import (
+    Config,
+    DataSanitizationConfig,
+    FieldProjectionConfig,
+    FieldProjectionProfile,
+    ModelConfig,
+    get_config,
+)
 
 
 @pytest.mark.parametrize(
@@ -141,6 +148,40 @@ from utils.config import Config, DataSanitizationConfig, ModelConfig, get_config
             """,
             Config(models=[], sanitization_config=None),
         ),
+        (
+            # Given: no models, field projection config
+            # Expected: Config object with field projection profiles
+            """
+            {
+                "models": [],
+                "field_projection_config": {
+                    "default_profile": {
+                        "exclude_fields": ["/metadata/managedFields"]
+                    },
+                    "kind_profiles": {
+                        "Pod": {
+                            "max_list_lengths": {"/status/conditions": 5},
+                            "max_string_length": 100
+                        }
+                    }
+                }
+            }
+            """,
+            Config(
+                models=[],
+                field_projection_config=FieldProjectionConfig(
+                    default_profile=FieldProjectionProfile(
+                        exclude_fields=["/metadata/managedFields"]
+                    ),
+                    kind_profiles={
+                        "Pod": FieldProjectionProfile(
+                            max_list_lengths={"/status/conditions": 5},
+                            max_string_length=100,
+                        )
+                    },
+                ),
+            ),
+        ),
     ],
 )
 def test_get_config(json_content, expected_config):